@@ -0,0 +1,92 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Measures :py:func:`envprobe.vartypes.array.diff_elements` on 1000-element
+arrays, compared to the :py:func:`difflib.ndiff` based implementation it
+replaced.
+"""
+from difflib import ndiff
+import random
+
+from common import best_of, report
+
+from envprobe.vartypes.array import diff_elements
+
+
+ELEMENT_COUNT = 1000
+
+
+def ndiff_elements(old, new):
+    """The element diff that was implemented with :py:func:`difflib.ndiff`.
+    """
+    ret = list()
+    for line in ndiff(old, new):
+        parts = line.split(' ', 1)
+        mode, value = parts[0], parts[1]
+        if mode == '-':
+            ret.append(('-', value))
+        elif mode == '':
+            ret.append(('=', value[1:]))
+        elif mode == '+':
+            ret.append(('+', value))
+    return ret
+
+
+def create_cases():
+    """Returns the pairs of old and new arrays to compare, by name."""
+    rng = random.Random(0)
+    paths = ["/opt/modules/package{0}/1.0/bin".format(i)
+             for i in range(ELEMENT_COUNT)]
+
+    edited = list(paths)
+    for _ in range(20):
+        index = rng.randrange(len(edited))
+        if rng.random() < 0.5:
+            del edited[index]
+        else:
+            edited.insert(index, "/new/{0}".format(index))
+
+    # Swapping a module changes a block of paths to similar looking ones.
+    swapped = paths[:400] + [p.replace("1.0", "2.0") for p in paths[400:600]] \
+        + paths[600:]
+
+    # The last element of each case tells whether the ndiff implementation
+    # finishes in reasonable time. Its intraline matching of similar looking
+    # but different elements is quadratic, the "swap" case alone takes about
+    # half a minute with it.
+    return [("20 random edits", paths, edited, True),
+            ("prepend one element", paths, ["/first"] + paths, True),
+            ("reversed order", paths, list(reversed(paths)), True),
+            ("swap 200 similar paths", paths, swapped, False),
+            ("all elements replaced", paths,
+             [p + "/sub" for p in paths], False)
+            ]
+
+
+def main():
+    print("Array element diff, {0} elements:".format(ELEMENT_COUNT))
+    for name, old, new, run_ndiff in create_cases():
+        if run_ndiff:
+            report(name + ", ndiff",
+                   best_of(lambda: ndiff_elements(old, new), repeat=1))
+        else:
+            print("    {0:<48} {1:>13}".format(name + ", ndiff", "skipped"))
+        report(name + ", Myers", best_of(lambda: diff_elements(old, new),
+                                         repeat=5))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Measures the startup time of individual Envprobe commands, executed in a
+new interpreter each, as they are when called from a hooked shell.
+
+Commands such as ``list`` or ``consume`` do not need the environment and the
+tracking, and should not pay for creating them.
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from common import isolate_user_directories, report
+
+
+ENTRY_POINT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "src", "envprobe", "__main__.py")
+RUN_COUNT = 30
+
+COMMANDS = [["config", "consume"],
+            ["main", "list"],
+            ["main", "get", "HOME"],
+            ["main", "+", "PATH", "/tmp"],
+            ["main", "diff"]
+            ]
+
+
+def run(command, env):
+    """Executes `command` and returns the wall-clock time it took, in
+    seconds."""
+    start = time.perf_counter()
+    subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def median_of(command, env):
+    """Returns the median time, in seconds, of :py:data:`RUN_COUNT`
+    executions of `command`."""
+    return statistics.median(run(command, env) for _ in range(RUN_COUNT))
+
+
+def create_hooked_environment():
+    """Executes the ``hook`` command, as the shell would at its start, and
+    returns the environment of the hooked shell."""
+    env = dict(os.environ)
+    env.pop("ENVPROBE_DAEMON", None)
+    hook = subprocess.run([sys.executable, ENTRY_POINT, "config", "hook",
+                           "bash", str(os.getpid())],
+                          env=env, stdout=subprocess.PIPE, check=True,
+                          universal_newlines=True).stdout
+    for name in ["ENVPROBE_CONFIG", "ENVPROBE_SHELL_PID",
+                 "ENVPROBE_SHELL_TYPE"]:
+        env[name] = re.search(r'export {0}="?([^";]*)"?;'.format(name),
+                              hook).group(1)
+    return env
+
+
+def main():
+    isolate_user_directories()
+    env = create_hooked_environment()
+
+    print("Command startup, median of {0} runs:".format(RUN_COUNT))
+    # Starting the interpreter is the lower bound for every command.
+    report("python3 -c pass", median_of([sys.executable, "-c", "pass"], env))
+    for argv in COMMANDS:
+        report(' '.join(argv),
+               median_of([sys.executable, ENTRY_POINT] + argv, env))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Measures the loading, change tracking and saving of a large
+:py:class:`envprobe.settings.config_file.ConfigurationFile`, a snapshot with
+10,000 saved variables and 500 unset names.
+"""
+import os
+import time
+import tracemalloc
+
+from common import best_of, isolate_user_directories, report
+
+from envprobe.settings.config_file import ConfigurationFile
+from envprobe.settings.snapshot import K_UNSETS, K_VARIABLES, Snapshot
+
+
+VARIABLE_COUNT = 10000
+UNSET_COUNT = 500
+
+
+def create_snapshot(path):
+    """Writes the snapshot file to `path`."""
+    with ConfigurationFile(path, Snapshot.config_schema) as conf:
+        for i in range(VARIABLE_COUNT):
+            conf[K_VARIABLES]["VAR_{0}".format(i)] = {
+                "local": ["/a/{0}".format(i), "/b"], "remote": []}
+        for i in range(UNSET_COUNT):
+            conf[K_UNSETS].add("UNSET_{0}".format(i))
+
+
+def main():
+    path = os.path.join(isolate_user_directories(), "snapshot.json")
+    create_snapshot(path)
+
+    def no_change():
+        with ConfigurationFile(path, Snapshot.config_schema) as conf:
+            conf[K_VARIABLES]["VAR_1"]
+
+    def one_edit():
+        with ConfigurationFile(path, Snapshot.config_schema) as conf:
+            conf[K_VARIABLES]["VAR_1"]["local"][0] = str(time.time())
+
+    def read_only():
+        ConfigurationFile(path, Snapshot.config_schema, read_only=True).load()
+
+    changed_conf = ConfigurationFile(path, Snapshot.config_schema)
+    changed_conf.load()
+    changed_conf[K_VARIABLES]["VAR_2"] = {"local": ["/x"], "remote": []}
+
+    def changed():
+        for _ in range(100):
+            changed_conf.changed
+
+    print("Snapshot of {0} variables and {1} unset names:"
+          .format(VARIABLE_COUNT, UNSET_COUNT))
+    report("context, no change", best_of(no_change))
+    report("context, one edit", best_of(one_edit))
+    report("read-only, cached load", best_of(read_only))
+    report("changed, 100 calls", best_of(changed))
+
+    tracemalloc.start()
+    with ConfigurationFile(path, Snapshot.config_schema):
+        retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("    {0:<48} {1:>10.1f} MiB".format(
+        "memory in context", retained / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
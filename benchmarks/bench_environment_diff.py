@@ -0,0 +1,94 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Measures :py:meth:`envprobe.environment.Environment.diff` on a 500-variable
+environment in which only a few variables changed, compared to resolving the
+types of every variable, which is what ``diff`` did before comparing the raw
+values first.
+"""
+from common import best_of, isolate_user_directories, report
+
+from envprobe.environment import Environment
+from envprobe.library import get_variable_information_manager
+from envprobe.community_descriptions.local_data import \
+    get_variable_information_manager as get_community_manager
+from envprobe.shell import FakeShell
+from envprobe.vartype_heuristics import \
+    assemble_standard_type_heuristics_pipeline
+
+
+VARIABLE_COUNT = 500
+CHANGED_COUNT = 5
+
+
+def create_environment():
+    """Creates an environment with a mix of string, numeric and path-like
+    variables, stamps it, and then changes some of the variables.
+    """
+    env = dict()
+    for i in range(VARIABLE_COUNT):
+        if i % 3 == 0:
+            env["VAR_{0}_PATH".format(i)] = ':'.join(
+                "/opt/package{0}/{1}/bin".format(i, j) for j in range(10))
+        elif i % 3 == 1:
+            env["VAR_{0}_COUNT".format(i)] = str(i)
+        else:
+            env["VAR_{0}".format(i)] = "Some value {0}".format(i)
+
+    pipeline = assemble_standard_type_heuristics_pipeline(
+        varcfg_user_loader=lambda name:
+            get_variable_information_manager(name, read_only=True),
+        varcfg_description_loader=lambda name:
+            get_community_manager(name, read_only=True))
+    environment = Environment(FakeShell(), env, pipeline)
+    environment.stamp()
+
+    for name in sorted(env)[:CHANGED_COUNT]:
+        if name.endswith("_COUNT"):
+            environment.current_environment[name] = str(int(env[name]) + 1)
+        else:
+            environment.current_environment[name] = env[name] + ":/changed"
+    return environment
+
+
+def diff_every_variable(environment):
+    """Resolves the types of every variable in both environments, and
+    compares them as typed variables."""
+    names = list(environment.current_environment.keys())
+    old_variables = environment.variables(names, stamped=True)
+    new_variables = environment.variables(names)
+    for name in names:
+        old, _ = old_variables[name]
+        new, _ = new_variables[name]
+        if old.value != new.value:
+            type(old).diff(old, new)
+
+
+def main():
+    isolate_user_directories()
+    environment = create_environment()
+    assert(len(environment.diff()) == CHANGED_COUNT)
+
+    print("Environment.diff(), {0} variables, {1} changed:"
+          .format(VARIABLE_COUNT, CHANGED_COUNT))
+    report("resolving every variable", best_of(
+        lambda: diff_every_variable(environment), repeat=5))
+    report("comparing raw values first (diff())", best_of(
+        environment.diff, repeat=5))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Measures the time and memory of creating and stamping an
+:py:class:`envprobe.environment.Environment` over a large environment, as
+exported by module systems on HPC clusters, compared to deep-copying the
+environment twice, which is what the environment did before it read through
+an :py:class:`envprobe.environment.OverlayMapping`.
+"""
+from copy import deepcopy
+import os
+import time
+import tracemalloc
+
+from common import report
+
+from envprobe.environment import Environment
+from envprobe.shell import FakeShell
+
+
+MODULE_VARIABLE_COUNT = 200
+ITERATIONS = 20
+
+
+def create_module_variables():
+    """Adds variables of about 4 KiB each to :py:data:`os.environ`, like the
+    ones a module system exports."""
+    for i in range(MODULE_VARIABLE_COUNT):
+        os.environ["MODULE_VAR_{0}".format(i)] = \
+            ("/opt/modules/package{0}/lib:".format(i)) * 180
+
+
+def deep_copies():
+    """Copies the environment the way the environment did before."""
+    current = dict(deepcopy(os.environ))
+    stamped = dict(deepcopy(current))
+    return current["HOME"], stamped
+
+
+def overlay():
+    """Creates and stamps an environment over :py:data:`os.environ`."""
+    environment = Environment(FakeShell(), os.environ)
+    environment.stamp()
+    return environment.current_environment["HOME"], environment
+
+
+def measure(label, func):
+    """Reports the time of `func` and the memory retained by, and the peak
+    usage of, :py:data:`ITERATIONS` results kept alive."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = [func() for _ in range(ITERATIONS)]
+    elapsed = (time.perf_counter() - start) / ITERATIONS
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+
+    report(label + ", time", elapsed)
+    for name, size in [("retained", retained), ("peak", peak)]:
+        print("    {0:<48} {1:>10.0f} KiB".format(
+            label + ", " + name, size / 1024))
+
+
+def main():
+    create_module_variables()
+    size = sum(len(k) + len(v) for k, v in os.environ.items())
+    print("Environment and stamp, {0} variables of {1:.0f} KiB, {2} times:"
+          .format(len(os.environ), size / 1024, ITERATIONS))
+    measure("deep copies", deep_copies)
+    measure("overlay", overlay)
+
+
+if __name__ == '__main__':
+    main()
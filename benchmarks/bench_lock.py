@@ -0,0 +1,63 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Measures how many times the lock of a file can be acquired and released
+per second by :py:class:`envprobe.settings.config_file.LockedFileHandle`,
+with the locking strategies available, compared to the sidecar lock with the
+lockline written, which was the only behaviour before.
+"""
+import os
+
+from common import best_of, isolate_user_directories
+
+from envprobe.settings.config_file import LockedFileHandle, LockMode
+
+
+PAIR_COUNT = 5000
+
+STRATEGIES = [("sidecar, with lockline (old default)",
+               {"lock_mode": LockMode.SIDECAR, "lockline": True}),
+              ("sidecar", {"lock_mode": LockMode.SIDECAR}),
+              ("direct", {"lock_mode": LockMode.DIRECT})
+              ]
+
+
+def acquire_release(path, mode, options):
+    """Acquires and releases the lock of `path` :py:data:`PAIR_COUNT`
+    times."""
+    for _ in range(PAIR_COUNT):
+        handle = LockedFileHandle(path, mode, **options)
+        handle.acquire()
+        handle.release()
+
+
+def main():
+    path = os.path.join(isolate_user_directories(), "locked.json")
+    with open(path, 'w') as handle:
+        handle.write("{}")
+
+    print("LockedFileHandle acquire and release, {0} pairs:"
+          .format(PAIR_COUNT))
+    for label, options in STRATEGIES:
+        for mode, kind in [('r', "shared"), ('r+', "exclusive")]:
+            seconds = best_of(lambda: acquire_release(path, mode, options),
+                              repeat=5)
+            print("    {0:<48} {1:>10.0f} pairs/s".format(
+                label + ", " + kind, PAIR_COUNT / seconds))
+
+
+if __name__ == '__main__':
+    main()
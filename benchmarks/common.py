@@ -0,0 +1,63 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Helpers shared by the benchmarks.
+
+The benchmarks are standalone scripts that measure the hot paths of Envprobe
+with the sources in the repository, and print the timings to the standard
+output.
+Run them through ``make benchmark``, or one by one with ``python3``.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "src"))
+
+
+def isolate_user_directories():
+    """Points the configuration, data and runtime directories of Envprobe to
+    a new temporary directory, which is removed when the benchmark exits, so
+    the user's files are neither read nor changed.
+
+    Returns
+    -------
+    str
+        The path of the temporary directory.
+    """
+    root = tempfile.mkdtemp(prefix="envprobe-benchmark-")
+    atexit.register(shutil.rmtree, root, ignore_errors=True)
+    for variable, directory in [("XDG_CONFIG_HOME", "config"),
+                                ("XDG_DATA_HOME", "data"),
+                                ("XDG_RUNTIME_DIR", "run")]:
+        os.environ[variable] = os.path.join(root, directory)
+    return root
+
+
+def best_of(func, repeat=7, number=1):
+    """Returns the best time, in seconds, of `number` calls to `func`, out of
+    `repeat` measurements.
+    """
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def report(label, seconds):
+    """Prints the measured time of `label`."""
+    print("    {0:<48} {1:>10.3f} ms".format(label, seconds * 1000))
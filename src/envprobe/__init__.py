@@ -17,13 +17,7 @@
 """Envprobe: Easy environment variable manager with saved states on a per-shell
 basis.
 """
-from . import environment
-from . import main
-from . import shell
-from . import vartypes
-from . import vartype_heuristics
-from .library import get_shell_and_env_always, get_snapshot, \
-    get_variable_information_manager, get_variable_tracking
+from envprobe.compatibility import lazy_package
 
 __all__ = [
     'environment',
@@ -36,3 +30,19 @@ __all__ = [
     'get_variable_information_manager',
     'get_variable_tracking'
     ]
+
+# The package is imported for every invocation of the tool, so the submodules
+# are only loaded once they are actually used.
+__getattr__, __dir__ = lazy_package(
+    __name__, globals(),
+    submodules=['environment',
+                'main',
+                'shell',
+                'vartypes',
+                'vartype_heuristics'
+                ],
+    attributes={'get_shell_and_env_always': 'library',
+                'get_snapshot': 'library',
+                'get_variable_information_manager': 'library',
+                'get_variable_tracking': 'library'
+                })
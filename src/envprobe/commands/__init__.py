@@ -17,8 +17,7 @@
 """This package implements the individual user-facing subcommands of
 `envprobe`.
 """
-from .core import get_command, get_module, get_known_commands, load, load_all
-from .shortcuts import transform_subcommand_shortcut
+from envprobe.compatibility import lazy_package
 
 __all__ = [
     'get_command',
@@ -28,3 +27,13 @@ __all__ = [
     'load_all',
     'transform_subcommand_shortcut'
 ]
+
+__getattr__, __dir__ = lazy_package(
+    __name__, globals(),
+    attributes={'get_command': 'core',
+                'get_module': 'core',
+                'get_known_commands': 'core',
+                'load': 'core',
+                'load_all': 'core',
+                'transform_subcommand_shortcut': 'shortcuts'
+                })
@@ -14,6 +14,8 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from types import SimpleNamespace
+
 from envprobe.vartypes.array import Array
 
 
@@ -75,6 +77,37 @@ def command(args):
     args.shell.set_environment_variable(env_var)
 
 
+def parse_fast(argv, shell):
+    """Parses the arguments of the common invocations,
+    ``add [--position N] VARIABLE VALUE...`` (which is what ``+VARIABLE`` and
+    ``VARIABLE+`` expand to), without building an argument parser.
+
+    Returns
+    -------
+    types.SimpleNamespace
+        The parsed arguments, as if returned by the parser created in
+        :py:func:`register`.
+    None
+        If the invocation contains any other option, and must be parsed in
+        full.
+    """
+    if not (shell.is_envprobe_capable and shell.manages_environment_variables):
+        return None
+
+    position = 0
+    if len(argv) >= 2 and argv[0] == "--position":
+        try:
+            position = int(argv[1])
+        except ValueError:
+            return None
+        argv = argv[2:]
+    if len(argv) < 2 or any(arg.startswith('-') for arg in argv):
+        return None
+
+    return SimpleNamespace(VARIABLE=argv[0], VALUE=argv[1:],
+                           position=position, func=command)
+
+
 def register(argparser, shell):
     if not (shell.is_envprobe_capable and shell.manages_environment_variables):
         return
@@ -15,6 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import shutil
+from types import SimpleNamespace
 
 
 name = 'consume'
@@ -47,6 +48,28 @@ def command(args):
         print(args.shell.get_shell_unhook())
 
 
+def parse_fast(argv, shell):
+    """Parses the arguments of the invocation made by the shell's prompt hook
+    without building an argument parser.
+
+    Returns
+    -------
+    types.SimpleNamespace
+        The parsed arguments, as if returned by the parser created in
+        :py:func:`register`.
+    None
+        If the invocation is not a plain ``consume`` or ``consume --detach``,
+        and must be parsed in full.
+    """
+    if not shell.is_envprobe_capable:
+        return None
+    if not argv:
+        return SimpleNamespace(detach=False, func=command)
+    if argv in [["-d"], ["--detach"]]:
+        return SimpleNamespace(detach=True, func=command)
+    return None
+
+
 def register(argparser, shell):
     if not shell.is_envprobe_capable:
         return
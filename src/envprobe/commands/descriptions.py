@@ -15,7 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import sys
-import tempfile
+import time
 
 from envprobe.community_descriptions import downloader, local_data
 from envprobe.vartypes import EnvVarExtendedInformation
@@ -53,69 +53,114 @@ def update_command(args):
           "Knowledge Base project.")
     storage_cfg = local_data.get_storage_configuration(read_only=False)
     new_version = downloader.fetch_latest_version_information()
+    old_version = storage_cfg.version
 
-    if new_version == storage_cfg.version:
-        # Right now, we use a simple equality check, because the versions are
-        # pure commit IDs.
+    if new_version == old_version:
+        # Right now, we use a simple equality check, because the versions
+        # are pure commit IDs.
         print("Nothing to update - the latest data is already available.")
+        if not local_data.is_index_compiled():
+            print("Compiling index...")
+            print("\tindexed {} records.".format(local_data.compile_index()))
         return
 
-    # Open all the variable information managers for the saved data. This is
-    # needed so we can gather which keys to delete.
-    variables_to_clear = set()
-    for manager in local_data.generate_variable_information_managers():
-        variables_to_clear.update(manager.keys())
-
-    with tempfile.TemporaryDirectory(prefix="envprobe-community-kb-") as tempd:
-        sources = downloader.download_latest_data(tempd)
-        for source in sources:
-            print("Extracting '{}'...".format(source.name))
-            try:
-                source.parse()
-            except Exception as e:
-                print("[WARN] Failed to parse '{}':\t{}"
-                      .format(source.name, str(e)),
-                      file=sys.stderr)
-                continue
-
-            storage_cfg.set_comment_for(source.name, source.comment)
-            set_vars = 0
-            for variable in source:
-                information = EnvVarExtendedInformation()
-                information.apply(source[variable])
-
-                try:
-                    manager = local_data.get_variable_information_manager(
-                        variable, read_only=False)
-                    manager.set(variable, information, source.name)
-                    set_vars += 1
-
-                    try:
-                        variables_to_clear.remove(variable)
-                    except KeyError:
-                        pass
-                except Exception as e:
-                    print("[WARN] Failed to update configuration for "
-                          "'{}':\t{}".format(variable, str(e)),
-                          file=sys.stderr)
-                    continue
-            print("\textracted {} variables.".format(set_vars))
-
-    print("Cleaning up old information...")
-    set_vars = 0
-    for variable in variables_to_clear:
+    # The hashes of the records installed by the previous update tell which
+    # variables are stored. If there are none, all the variable information
+    # managers for the saved data must be opened to gather which keys to
+    # delete.
+    old_hashes = storage_cfg.record_hashes
+    if old_hashes:
+        variables_to_clear = set(old_hashes.keys())
+    else:
+        variables_to_clear = set()
+        for manager in local_data.generate_variable_information_managers():
+            variables_to_clear.update(manager.keys())
+
+    # The records are hashed as they are read from the archive, and only the
+    # ones that differ from the installed data are kept.
+    records, hashes, comments = dict(), dict(), dict()
+    for source in downloader.download_latest_data():
+        print("Extracting '{}'...".format(source.name))
+        source_records, source_hashes = dict(), dict()
         try:
-            manager = local_data.get_variable_information_manager(
-                variable, read_only=False)
-            del manager[variable]
-            set_vars += 1
+            for variable, record in source.records():
+                source_hashes[variable] = source.record_hash(variable, record)
+                if old_hashes.get(variable) == source_hashes[variable]:
+                    source_records[variable] = None
+                    continue
+                information = EnvVarExtendedInformation()
+                information.apply(record)
+                source_records[variable] = (information, source.name)
         except Exception as e:
-            print("[WARN] Failed to clean up '{}':\t{}".format(variable,
-                                                               str(e)),
+            print("[WARN] Failed to parse '{}':\t{}"
+                  .format(source.name, str(e)),
                   file=sys.stderr)
-    print("\tcleaned up {} records.".format(set_vars))
-
-    storage_cfg.version = new_version
+            continue
+
+        comments[source.name] = source.comment
+        records.update(source_records)
+        hashes.update(source_hashes)
+        print("\textracted {} variables.".format(len(source_hashes)))
+
+    variables_to_clear.difference_update(hashes.keys())
+    variables_to_set = {variable for variable in records
+                        if records[variable] is not None}
+    print("{} new or changed, {} removed, {} unchanged records."
+          .format(len(variables_to_set), len(variables_to_clear),
+                  len(hashes) - len(variables_to_set)))
+
+    # Only comparing the installed version and writing the records happens
+    # with the storage locked. The metadata is saved at once, after every
+    # record was written.
+    with storage_cfg.transaction():
+        if storage_cfg.version != old_version:
+            print("[ERROR] The descriptions were updated by another process "
+                  "in the meantime, please try again.", file=sys.stderr)
+            return 1
+
+        # Write the information grouped by the file it is stored in, so every
+        # file is only opened and saved once.
+        print("Saving information...")
+        set_vars, cleared_vars = 0, 0
+        start = time.perf_counter()
+        for manager, variables in \
+                local_data.group_variable_information_managers(
+                    variables_to_set | variables_to_clear, read_only=False):
+            to_set = [(variable, ) + records[variable]
+                      for variable in variables
+                      if variable in variables_to_set]
+            to_clear = [variable for variable in variables
+                        if variable in variables_to_clear]
+            try:
+                manager.bulk_update(to_set, to_clear)
+                set_vars += len(to_set)
+                cleared_vars += len(to_clear)
+            except Exception as e:
+                print("[WARN] Failed to update configuration for {} variables "
+                      "('{}', ...):\t{}"
+                      .format(len(variables), variables[0], str(e)),
+                      file=sys.stderr)
+                # Keep the hashes of what is actually stored, so the next
+                # update retries these variables.
+                for variable in variables:
+                    if variable in old_hashes:
+                        hashes[variable] = old_hashes[variable]
+                    else:
+                        hashes.pop(variable, None)
+        elapsed = time.perf_counter() - start
+        print("\tsaved {} records, cleaned up {} records in {:.2f} seconds "
+              "({:.0f} records/s).".format(
+                  set_vars, cleared_vars, elapsed,
+                  (set_vars + cleared_vars) / elapsed if elapsed else 0))
+
+        if set_vars or cleared_vars or not local_data.is_index_compiled():
+            print("Compiling index...")
+            print("\tindexed {} records.".format(local_data.compile_index()))
+
+        for source_name, comment in comments.items():
+            storage_cfg.set_comment_for(source_name, comment)
+        storage_cfg.record_hashes = hashes
+        storage_cfg.version = new_version
 
 
 def register_update(argparser):
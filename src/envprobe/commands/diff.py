@@ -108,10 +108,7 @@ def command(args):
     variables = set(args.VARIABLE) & set(diff.keys()) if args.VARIABLE \
         else set(diff.keys())
 
-    for variable in sorted(variables):
-        if not args.tracking.is_tracked(variable):
-            continue
-
+    for variable in sorted(args.tracking.tracked_subset(variables)):
         if args.output_type == Format.HUMAN_READABLE:
             Format.human_readable(variable, diff[variable])
         elif args.output_type == Format.UNIFIED:
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import shlex
 import sys
+from types import SimpleNamespace
 
 from envprobe.vartypes import get_kind
 from envprobe.vartypes.array import Array
@@ -92,6 +93,27 @@ def command(args):
                 print("Source: {0}".format(source))
 
 
+def parse_fast(argv, shell):
+    """Parses the arguments of the most common invocation, ``get VARIABLE``,
+    without building an argument parser.
+
+    Returns
+    -------
+    types.SimpleNamespace
+        The parsed arguments, as if returned by the parser created in
+        :py:func:`register`.
+    None
+        If the invocation is not a plain ``get VARIABLE`` and must be parsed
+        in full.
+    """
+    if not (shell.is_envprobe_capable and shell.manages_environment_variables):
+        return None
+    if len(argv) != 1 or argv[0].startswith('-'):
+        return None
+
+    return SimpleNamespace(VARIABLE=argv[0], info=False, func=command)
+
+
 def register(argparser, shell):
     if not (shell.is_envprobe_capable and shell.manages_environment_variables):
         return
@@ -18,7 +18,9 @@ import os
 import stat
 import tempfile
 
+from envprobe import daemon
 from envprobe.environment import Environment
+from envprobe.library import get_vartype_cache
 from envprobe.settings import get_runtime_directory
 from envprobe.shell import load, load_all, get_known_kinds
 
@@ -56,6 +58,22 @@ def command(args):
     environment.stamp()
     environment.save()
 
+    # Resolve the types of the variables present in the shell, so that the
+    # commands executed in it can read them from the shell's table.
+    heuristics = environment.type_heuristics
+    original_cache, heuristics.cache = heuristics.cache, \
+        get_vartype_cache(shell)
+    try:
+        environment.variables(list(environment.current_environment.keys()))
+        heuristics.cache.save()
+    finally:
+        heuristics.cache = original_cache
+
+    if args.daemon:
+        daemon.start()
+        # The commands are only sent to the daemon if the user opted in.
+        print("export {0}=1;".format(daemon.OPT_IN_VARIABLE))
+
     print(shell.get_shell_hook(args.envprobe_root))
 
 
@@ -76,4 +94,12 @@ def register(argparser, shell):
                         type=int,
                         help="The process ID (PID) of the running shell "
                              "process.")
+    parser.add_argument('-D', '--daemon',
+                        action='store_true',
+                        help="Start the per-user Envprobe daemon in the "
+                             "background, if it is not running already. The "
+                             "daemon keeps Envprobe loaded in memory and "
+                             "executes the commands of every hooked shell, "
+                             "which makes them respond faster. If the daemon "
+                             "is not running, commands are executed normally.")
     parser.set_defaults(func=command)
@@ -0,0 +1,58 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
+
+from envprobe.community_descriptions import local_data
+from envprobe.settings import get_configuration_directory
+from envprobe.settings.information_database import migrate_information_files
+from envprobe.settings.variable_information import \
+    get_information_database_name, get_variable_directory_name
+
+
+name = 'migrate'
+description = \
+    """Move the additional information stored for variables from the
+    per-letter files into a single, indexed database.
+
+    Both the settings of the user (as set by 'set'), and the local copy of the
+    community descriptions are migrated. The original files are removed
+    afterwards, and subsequent calls to Envprobe will use the database.
+    """
+help = "Migrate variable information to an indexed database."
+
+
+def command(args):
+    user_records = migrate_information_files(
+        os.path.join(get_configuration_directory(),
+                     get_variable_directory_name()),
+        os.path.join(get_configuration_directory(),
+                     get_information_database_name()))
+    print("Migrated {} user-specific records.".format(user_records))
+
+    community_records = local_data.migrate_variable_information()
+    print("Migrated {} community description records."
+          .format(community_records))
+
+
+def register(argparser, shell):
+    parser = argparser.add_parser(
+            name=name,
+            description=description,
+            help=help
+    )
+
+    parser.set_defaults(func=command)
@@ -42,44 +42,36 @@ def command(args):
         return not args.patch or prompt()
 
     snapshot = get_snapshot(args.SNAPSHOT, read_only=False)
-    for variable in sorted(variables):
-        if not args.tracking.is_tracked(variable):
-            continue
+    tracked = sorted(args.tracking.tracked_subset(variables))
+    env_vars = args.environment.variables(tracked)
 
-        var, _ = args.environment[variable]
+    # Every change is decided (and the user is asked about it) first, so the
+    # snapshot is not locked while waiting for the answers.
+    new_values, unset_variables, element_diffs = dict(), list(), dict()
+    for variable in tracked:
         vdiff = diff[variable]
         if vdiff.is_new:
             # If a variable is new, save the current (existing) value.
             print("New variable '{0}' with value '{1}'."
                   .format(variable, vdiff.new_value))
             if actually_do_something():
-                snapshot[variable] = vdiff.new_value
-
-                # apply_change() marks a change to be saved in the pristine
-                # environment, rendering it no longer changed.
-                args.environment.apply_change(var)
+                new_values[variable] = vdiff.new_value
         elif vdiff.is_unset:
             # If a variable is unset, save this fact.
             print("Variable '{0}' (from value '{1}') undefined."
                   .format(variable, vdiff.old_value))
             if actually_do_something():
-                del snapshot[variable]
-                args.environment.apply_change(var, remove=True)
+                unset_variables.append(variable)
         elif vdiff.is_simple_change:
-            # If the change is a simple change, we are still only
-            # interested in persisting the new value.
+            # If the change is a simple change, we are still only interested
+            # in persisting the new value.
             print("Variable '{0}' changed from '{1}' to '{2}'."
                   .format(variable, vdiff.old_value, vdiff.new_value))
             if actually_do_something():
-                snapshot[variable] = vdiff.new_value
-                args.environment.apply_change(var)
+                new_values[variable] = vdiff.new_value
         else:
             # For more complex changes, we have to handle the changes
             # one-by-one.
-            diff_in_snapshot = snapshot[variable]
-            if not diff_in_snapshot:
-                diff_in_snapshot = list()
-
             current_diff = list()
             for mode, value in vdiff.diff_actions:
                 if mode == '=':
@@ -94,10 +86,29 @@ def command(args):
 
                 if actually_do_something():
                     current_diff.append((mode, value))
+            element_diffs[variable] = current_diff
+
+    with snapshot.transaction():
+        for variable, value in new_values.items():
+            snapshot[variable] = value
+
+            # apply_change() marks a change to be saved in the pristine
+            # environment, rendering it no longer changed.
+            args.environment.apply_change(env_vars[variable][0])
+
+        for variable in unset_variables:
+            del snapshot[variable]
+            args.environment.apply_change(env_vars[variable][0], remove=True)
+
+        for variable, current_diff in element_diffs.items():
+            var, _ = env_vars[variable]
+            diff_in_snapshot = snapshot[variable]
+            if not diff_in_snapshot:
+                diff_in_snapshot = list()
 
-            # Ensure that only the changes to be saved by the user are applied
-            # and removed from later diffs.
-            var.value = vdiff.old_value
+            # Ensure that only the changes to be saved by the user are
+            # applied and removed from later diffs.
+            var.value = diff[variable].old_value
             var.apply_diff(current_diff)
             args.environment.apply_change(var)
 
@@ -168,13 +168,14 @@ def command(args):
     )
     tracker = VariableTracking(global_config_file, local_config_file)
 
-    if args.default:
-        return _handle_default(tracker, args)
+    with tracker.transaction():
+        if args.default:
+            return _handle_default(tracker, args)
 
-    if args.setting == Mode.QUERY:
-        return _handle_querying_variable(tracker, args)
+        if args.setting == Mode.QUERY:
+            return _handle_querying_variable(tracker, args)
 
-    return _handle_setting_variable(tracker, args)
+        return _handle_setting_variable(tracker, args)
 
 
 def register(argparser, shell):
@@ -20,9 +20,17 @@
 This sister project of Envprobe allows sharing type, description, and usage
 information with the users for variables that are common across systems.
 """
-from . import downloader, local_data
+from envprobe.compatibility import lazy_package
 
 __all__ = [
     'downloader',
     'local_data'
 ]
+
+# Importing the downloader pulls in the networking libraries, which should not
+# be paid for when only the local data is used.
+__getattr__, __dir__ = lazy_package(
+    __name__, globals(),
+    submodules=['downloader',
+                'local_data'
+                ])
@@ -19,8 +19,13 @@ Provides methods that connect an Envprobe install to the community descriptions
 project, and handles downloading and installing the new knowledge-base.
 """
 import csv
+from functools import partial
+import hashlib
+import io
 import json
 import os
+import shutil
+import tempfile
 import urllib.request
 import zipfile
 
@@ -49,12 +54,15 @@ class DescriptionSource:
     """The handler class that is used to parse and understand the files of the
     downloaded knowledge-base.
     """
-    def __init__(self, source_file_path):
+    def __init__(self, source_file_path, opener=None):
         """
         Parameters
         ----------
         source_file_path : str
             The path to the CSV database.
+        opener : callable, optional
+            The function that returns the text stream of the CSV database.
+            If not specified, the file at `source_file_path` is opened.
 
         Note
         ----
@@ -63,6 +71,8 @@ class DescriptionSource:
         """
         self._name = os.path.basename(source_file_path).replace(".csv", "")
         self._file = source_file_path
+        self._opener = opener if opener else \
+            partial(open, source_file_path, 'r', newline='')
         self._data = dict()
 
         self._comment = None
@@ -79,16 +89,56 @@ class DescriptionSource:
 
     def parse(self):
         """Execute loading of the data from the backing file."""
-        with open(self._file, 'r') as handle:
-            reader = csv.DictReader(handle)
-            for record in reader:
+        for variable, record in self.records():
+            self._data[variable] = record
+
+    def records(self):
+        """Generates the records of the backing file one by one, as they are
+        read, without loading the data into the instance.
+
+        Meta records are handled when they are encountered, and are not
+        generated.
+
+        Returns
+        -------
+        generator(tuple(str, dict))
+            The name of the variable, and the configuration mapping of it, in
+            the format returned by :py:meth:`__getitem__`.
+        """
+        with self._opener() as handle:
+            for record in csv.DictReader(handle):
                 if record["Variable"] == "__META__":
                     self._handle_meta_record(record)
                     continue
 
-                self._data[record["Variable"]] = \
+                yield record["Variable"], \
                     self._transform_to_configuration_record(record)
 
+    def record_hash(self, variable, record=None):
+        """Returns a hash of the information for the given `variable`, which
+        changes if the stored configuration for it would change.
+
+        Parameters
+        ----------
+        variable : str
+            The name of the variable.
+        record : dict, optional
+            The configuration mapping of the variable, as generated by
+            :py:meth:`records`.
+            If not specified, the record loaded by :py:meth:`parse` is used.
+
+        Returns
+        -------
+        : str
+            The hexadecimal digest of the configuration mapping, and the name
+            of the source.
+        """
+        if record is None:
+            record = self._data[variable]
+        return hashlib.blake2b(
+            json.dumps([self._name, record], sort_keys=True).encode("utf-8"),
+            digest_size=8).hexdigest()
+
     def _handle_meta_record(self, record):
         if record["TypeKind"] == "COMMENT":
             self._comment = record["Description"]
@@ -152,21 +202,21 @@ def fetch_latest_version_information():
             return ref_entry["object"]["sha"]
 
 
-def download_latest_data(location):
-    """Downloads the latest information to the given location.
+def download_latest_data(url=None):
+    """Downloads the latest information and generates the sources in it.
 
     Parameters
     ----------
-    location : str
-        The path the downloader can use to extract the data to.
-        This directory **must exist** already, and will not be cleared up by
-        this function.
-        This is only used temporarily.
+    url : str, optional
+        The location of the release archive to download.
+        If not specified, the latest commit of the project's repository on
+        GitHub is downloaded.
 
     Returns
     -------
-    list(.DescriptionSource)
-        The handlers of the extracted knowledge source documents.
+    generator(.DescriptionSource)
+        The handlers of the knowledge source documents, as generated by
+        :py:func:`extract_release`.
 
     Note
     ----
@@ -182,16 +232,52 @@ def download_latest_data(location):
         IP address of the machine.
         Read more at http://docs.github.com/en/rest/overview/resources-in-the-rest-api#rate-limiting.
     """  # noqa: E501  # Ignore the overflowing URL.
-    data = urllib.request.urlopen(  # nosec: urllib
-        "http://api.github.com/repos/{0}/{1}/zipball/{2}"
-        .format(REPOSITORY_USER, REPOSITORY_NAME, REPOSITORY_BRANCH))
+    if not url:
+        url = "http://api.github.com/repos/{0}/{1}/zipball/{2}" \
+            .format(REPOSITORY_USER, REPOSITORY_NAME, REPOSITORY_BRANCH)
+
+    # Reading a ZIP file requires seeking to its central directory at the
+    # end, which the HTTP response does not allow, so the compressed archive
+    # is spooled to a temporary file, instead of being kept in memory. The
+    # members are decompressed as they are read.
+    with tempfile.TemporaryFile() as archive:
+        with urllib.request.urlopen(url) as response:  # nosec: urllib
+            shutil.copyfileobj(response, archive)
 
-    output = os.path.join(location, "release.zip")
-    with open(output, 'wb') as handle:
-        handle.write(data.read())
+        yield from extract_release(archive)
 
-    extracted = list()
-    with zipfile.ZipFile(output, 'r') as handle:
+
+def _open_member(archive, member):
+    """Opens the `member` of the `archive` as a text stream that is decoded
+    as it is read."""
+    return io.TextIOWrapper(archive.open(member, 'r'),
+                            encoding="utf-8", newline='')
+
+
+def extract_release(archive):
+    """Generates the sources in a downloaded knowledge-base release.
+
+    Parameters
+    ----------
+    archive : str or file-like object
+        The path to, or the seekable binary stream of, the release archive
+        (``.zip`` file).
+
+    Returns
+    -------
+    generator(.DescriptionSource)
+        The handlers of the knowledge source documents.
+        The sources read their data directly from the archive, which is only
+        open until the generator is exhausted, so each source must be parsed
+        (see :py:meth:`.DescriptionSource.parse`) before the next one is
+        requested.
+
+    Raises
+    ------
+    ValueError
+        Raised if the format of the release is not supported.
+    """
+    with zipfile.ZipFile(archive, 'r') as handle:
         min_ver = Version(MIN_SUPPORTED_FORMAT)
         max_ver = Version(MAX_SUPPORTED_FORMAT)
         try:
@@ -215,12 +301,5 @@ def download_latest_data(location):
             if not element.endswith(".csv"):
                 continue
 
-            output_path = os.path.join(location, os.path.basename(element))
-            with handle.open(element, 'r') as source, \
-                    open(output_path, 'w') as target:
-                target.write(source.read().decode("utf-8"))
-
-            if element.endswith(".csv"):
-                extracted.append(DescriptionSource(output_path))
-
-    return extracted
+            yield DescriptionSource(element,
+                                    partial(_open_member, handle, element))
@@ -0,0 +1,293 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Implements a compact, read-only binary index of the community descriptions,
+which is queried through a memory map without parsing the whole file.
+
+The index file starts with a header of a magic number, the format version and
+the number of records.
+This is followed by the table of the offsets of each record, and the records
+themselves, sorted by the UTF-8 encoded name of the variable.
+Names that are not valid UTF-8, as environment variable names might be, are
+encoded and looked up with the ``"surrogateescape"`` error handler, like
+:py:data:`os.environ` decodes them.
+A record is the length-prefixed name of the variable, followed by the
+length-prefixed type, description and source fields, in this order.
+A field with the length :py:data:`_NONE` is ``None``.
+"""
+from collections.abc import Mapping
+from contextlib import AbstractContextManager
+import mmap
+import os
+import stat
+import struct
+
+from envprobe.settings.variable_information import K_VARIABLES, \
+    K_VARIABLE_CONFIGURATION_SOURCE, K_VARIABLE_DESCRIPTION, K_VARIABLE_TYPE
+
+
+_MAGIC = b"EPDI"
+_VERSION = 1
+_HEADER = struct.Struct("<4sII")
+_OFFSET = struct.Struct("<I")
+_NAME_LENGTH = struct.Struct("<H")
+_FIELD_LENGTH = struct.Struct("<I")
+_NONE = 0xFFFFFFFF
+_FIELDS = [K_VARIABLE_TYPE, K_VARIABLE_DESCRIPTION,
+           K_VARIABLE_CONFIGURATION_SOURCE]
+
+
+def _encode_name(name):
+    """Encodes the name of a variable to the key it is sorted and looked up
+    by in the index."""
+    return name.encode("utf-8", "surrogateescape")
+
+
+def _decode_name(key):
+    """Decodes the name of a variable from its key in the index."""
+    return key.decode("utf-8", "surrogateescape")
+
+
+def _encode_record(name, record):
+    name = _encode_name(name)
+    chunks = [_NAME_LENGTH.pack(len(name)), name]
+    for field in _FIELDS:
+        value = record.get(field)
+        if value is None:
+            chunks.append(_FIELD_LENGTH.pack(_NONE))
+            continue
+        value = value.encode("utf-8")
+        chunks.append(_FIELD_LENGTH.pack(len(value)))
+        chunks.append(value)
+    return b''.join(chunks)
+
+
+def compile_index(records, path):
+    """Writes the index file for the given records.
+
+    The file is written next to `path` and moved in place once complete, so
+    readers either see the old or the new index, never a partial one.
+
+    Parameters
+    ----------
+    records : iterable(tuple(str, dict))
+        The name of each variable and the information record for it, in the
+        format used by
+        :py:class:`envprobe.settings.variable_information.VariableInformation`.
+    path : str
+        The path of the index file to create.
+
+    Returns
+    -------
+    int
+        The number of records in the index.
+    """
+    encoded = sorted((_encode_name(name), _encode_record(name, record))
+                     for name, record in records)
+
+    offsets = list()
+    position = _HEADER.size + _OFFSET.size * len(encoded)
+    for _, data in encoded:
+        offsets.append(position)
+        position += len(data)
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, stat.S_IRWXU)
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(temp_path, 'wb') as handle:
+            handle.write(_HEADER.pack(_MAGIC, _VERSION, len(encoded)))
+            handle.write(b''.join(_OFFSET.pack(o) for o in offsets))
+            for _, data in encoded:
+                handle.write(data)
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return len(encoded)
+
+
+class IndexTable(Mapping):
+    """A read-only mapping of variable names to their information records,
+    served from a memory-mapped index file.
+
+    Lookups are done with a binary search over the sorted records, and only
+    decode the record of the requested variable.
+    """
+
+    def __init__(self, buffer):
+        """
+        Parameters
+        ----------
+        buffer : mmap.mmap or bytes
+            The contents of the index file.
+
+        Raises
+        ------
+        ValueError
+            Raised if `buffer` is not an index of a supported format.
+        """
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Index file is truncated.")
+        magic, version, count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Unknown index file format.")
+
+        self._buffer = buffer
+        self._count = count
+
+    def _name_at(self, index):
+        """Returns the encoded name of the `index`th record, and the offset
+        where its fields start."""
+        offset = _OFFSET.unpack_from(self._buffer,
+                                     _HEADER.size + index * _OFFSET.size)[0]
+        length = _NAME_LENGTH.unpack_from(self._buffer, offset)[0]
+        offset += _NAME_LENGTH.size
+        return self._buffer[offset:offset + length], offset + length
+
+    def _find(self, variable_name):
+        """Returns the offset of the fields of `variable_name`'s record, or
+        ``None`` if the variable is not in the index."""
+        key = _encode_name(variable_name)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            name, offset = self._name_at(middle)
+            if name < key:
+                low = middle + 1
+            elif name > key:
+                high = middle
+            else:
+                return offset
+        return None
+
+    def __len__(self):
+        """Returns the number of variables in the index."""
+        return self._count
+
+    def __iter__(self):
+        """Returns an iterator over the names of the variables in the
+        index."""
+        return iter(self.keys())
+
+    def keys(self):
+        """Returns the names of the variables in the index, in order."""
+        return [_decode_name(self._name_at(i)[0])
+                for i in range(self._count)]
+
+    def __contains__(self, variable_name):
+        """Returns if there is a record for `variable_name`."""
+        return self._find(variable_name) is not None
+
+    def __getitem__(self, variable_name):
+        """Retrieves the information record for `variable_name`."""
+        offset = self._find(variable_name)
+        if offset is None:
+            raise KeyError(variable_name)
+
+        record = dict()
+        for field in _FIELDS:
+            length = _FIELD_LENGTH.unpack_from(self._buffer, offset)[0]
+            offset += _FIELD_LENGTH.size
+            if length == _NONE:
+                record[field] = None
+                continue
+            record[field] = self._buffer[offset:offset + length] \
+                .decode("utf-8")
+            offset += length
+        return record
+
+    def __setitem__(self, variable_name, record):
+        raise PermissionError("Read-only index file.")
+
+    def __delitem__(self, variable_name):
+        raise PermissionError("Read-only index file.")
+
+
+_mapped_indices = dict()
+"""The tables of the index files mapped into the memory of the current
+process, keyed by the path, with the signature of the file that was mapped."""
+
+
+def _open_table(path):
+    """Returns the :py:class:`IndexTable` over the memory map of the index
+    file at `path`, reusing the existing map if the file did not change.
+
+    Returns
+    -------
+    IndexTable
+        The table.
+    None
+        If the file does not exist, or is not a valid index.
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        _mapped_indices.pop(path, None)
+        return None
+    signature = (stat_result.st_dev, stat_result.st_ino,
+                 stat_result.st_mtime_ns, stat_result.st_size)
+
+    entry = _mapped_indices.get(path)
+    if entry and entry[0] == signature:
+        return entry[1]
+
+    try:
+        with open(path, 'rb') as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        table = IndexTable(buffer)
+    except (OSError, ValueError):
+        _mapped_indices.pop(path, None)
+        return None
+
+    _mapped_indices[path] = (signature, table)
+    return table
+
+
+class DescriptionIndex(AbstractContextManager):
+    """A read-only *context-capable dict* over an index file, which can be
+    used as the backend of a
+    :py:class:`envprobe.settings.variable_information.VariableInformation`.
+
+    The index file is memory-mapped once per process, and re-mapped only if
+    the file was replaced.
+    """
+
+    def __init__(self, file_path):
+        """
+        Parameters
+        ----------
+        file_path : str
+            The path of the index file.
+            If the file does not exist or is invalid, the index is considered
+            empty.
+        """
+        self._path = os.path.abspath(file_path)
+
+    def __enter__(self):
+        """Returns the mapping that holds the :py:class:`IndexTable` under the
+        ``K_VARIABLES`` key."""
+        table = _open_table(self._path)
+        return {K_VARIABLES: table if table is not None else dict()}
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
@@ -22,14 +22,37 @@ from copy import deepcopy
 import os
 
 from envprobe.compatibility import nullcontext
-from envprobe.settings import config_file, get_data_directory, \
-    variable_information
+from envprobe.settings import get_data_directory, variable_information
+
+# The storage backends (config_file, information_database, and index) are
+# imported only when a storage is accessed, so the paths of the local data can
+# be queried cheaply.
 
 
 def _local_data_root():
     return os.path.join(get_data_directory(), "descriptions")
 
 
+def _information_database_path():
+    return os.path.join(_local_data_root(),
+                        variable_information.get_information_database_name())
+
+
+def _index_path():
+    return os.path.join(_local_data_root(), get_index_file_name())
+
+
+def get_index_file_name():
+    """Returns the expected default name of the compiled binary index of the
+    local storage.
+
+    Warning
+    -------
+    This method only returns the **file name**, not its location or full path.
+    """
+    return "variables.idx"
+
+
 def get_description_config_file_name():
     """Returns the expected default name of the master configuration file of
     the local storage.
@@ -45,6 +68,7 @@ K_FORMAT = "format"
 K_COMMIT = "commit_sha"
 K_SOURCES = "sources"
 K_SOURCE_COMMENT = "comment"
+K_HASHES = "record_hashes"
 
 
 class MetaConfiguration:
@@ -53,7 +77,8 @@ class MetaConfiguration:
     """
 
     config_schema = {K_COMMIT: '0' * 41,
-                     K_SOURCES: dict()
+                     K_SOURCES: dict(),
+                     K_HASHES: dict()
                      }
 
     _sources_schema = {K_SOURCE_COMMENT: None
@@ -73,6 +98,15 @@ class MetaConfiguration:
         self._config = configuration if configuration is not None \
             else nullcontext(deepcopy(self.config_schema))
 
+    def transaction(self):
+        """Returns a context in which the configuration is loaded (and locked)
+        only once, and the changes are saved together at its end, see
+        :py:meth:`envprobe.settings.config_file.ConfigurationFile.transaction`.
+        """
+        from envprobe.settings.config_file import transaction
+
+        return transaction(self._config)
+
     @property
     def version(self):
         """Returns the commit identifier of the data in the storage."""
@@ -85,6 +119,27 @@ class MetaConfiguration:
         with self._config as conf:
             conf[K_COMMIT] = value
 
+    @property
+    def record_hashes(self):
+        """Returns the hashes of the variable records in the storage, as
+        calculated by
+        :py:meth:`envprobe.community_descriptions.downloader.DescriptionSource.record_hash`.
+
+        Returns
+        -------
+        dict(str, str)
+            The mapping of variable names to the hash of their record.
+            Empty if the storage was created before hashes were recorded.
+        """  # noqa: E501  # Ignore the overflowing reference.
+        with self._config as conf:
+            return dict(conf[K_HASHES])
+
+    @record_hashes.setter
+    def record_hashes(self, value):
+        """Sets the hashes of the variable records in the storage."""
+        with self._config as conf:
+            conf[K_HASHES] = dict(value)
+
     def _ensure_source(self, conf, source):
         """Ensure that the record for a source entry is present."""
         if source not in conf[K_SOURCES]:
@@ -112,16 +167,37 @@ class MetaConfiguration:
             conf[K_SOURCES][source][K_SOURCE_COMMENT] = comment
 
 
+def _storage_configuration_path():
+    return os.path.join(_local_data_root(),
+                        get_description_config_file_name())
+
+
+def get_storage_state_paths():
+    """Returns the paths of the files whose state (modification time and size)
+    changes whenever the contents of the local storage change.
+
+    These are the master configuration file, which is rewritten every time the
+    local storage is updated, and the indexed database and compiled index the
+    storage might have been migrated into.
+    """
+    return [_storage_configuration_path(),
+            _information_database_path(),
+            _index_path()
+            ]
+
+
 def get_storage_configuration(read_only=True):
     """Returns the configuration manager for the metainformation about the
     local storage.
     """
+    from envprobe.settings import config_file
+
     return MetaConfiguration(
         config_file.ConfigurationFile(
-            os.path.join(_local_data_root(),
-                         get_description_config_file_name()),
+            _storage_configuration_path(),
             MetaConfiguration.config_schema,
-            read_only=read_only)
+            read_only=read_only,
+            codec=config_file.compact_json_codec)
     )
 
 
@@ -130,7 +206,17 @@ def generate_variable_information_managers():
     data directory for variable information storage.
 
     These managers are **read-only**.
+    If the data was migrated to the indexed database, only the single manager
+    backed by the database is generated.
     """
+    from envprobe.settings import config_file, information_database
+
+    database = _information_database_path()
+    if os.path.isfile(database):
+        yield variable_information.VariableInformation(
+            information_database.InformationDatabase(database, read_only=True))
+        return
+
     basedir = os.path.join(_local_data_root(),
                            variable_information.get_variable_directory_name())
 
@@ -148,7 +234,8 @@ def generate_variable_information_managers():
             config_file.ConfigurationFile(
                 os.path.join(basedir, file),
                 variable_information.VariableInformation.config_schema,
-                read_only=True)
+                read_only=True,
+                codec=config_file.compact_json_codec)
         )
 
 
@@ -171,7 +258,28 @@ def get_variable_information_manager(variable_name, read_only=True):
         The configuration handler engine.
         Access to the underlying file is handled automatically through this
         instance.
+        If the data was migrated to the indexed database, the engine is backed
+        by an
+        :py:class:`envprobe.settings.information_database.InformationDatabase`.
+        If the engine is `read_only` and the compiled index is available, it
+        is backed by a
+        :py:class:`envprobe.community_descriptions.index.DescriptionIndex`.
     """
+    from envprobe.community_descriptions import index
+    from envprobe.settings import config_file, information_database
+
+    if read_only:
+        index_path = _index_path()
+        if os.path.isfile(index_path):
+            return variable_information.VariableInformation(
+                index.DescriptionIndex(index_path))
+
+    database = _information_database_path()
+    if os.path.isfile(database):
+        return variable_information.VariableInformation(
+            information_database.InformationDatabase(database,
+                                                     read_only=read_only))
+
     basedir = os.path.join(_local_data_root(),
                            variable_information.get_variable_directory_name())
 
@@ -181,5 +289,84 @@ def get_variable_information_manager(variable_name, read_only=True):
                          variable_information.get_information_file_name(
                              variable_name)),
             variable_information.VariableInformation.config_schema,
-            read_only=read_only)
+            read_only=read_only,
+            codec=config_file.compact_json_codec)
     )
+
+
+def migrate_variable_information():
+    """Moves the locally installed variable information from the per-letter
+    files into the indexed database.
+
+    Returns
+    -------
+    int
+        The number of variable records migrated.
+    """
+    from envprobe.settings import information_database
+
+    return information_database.migrate_information_files(
+        os.path.join(_local_data_root(),
+                     variable_information.get_variable_directory_name()),
+        _information_database_path())
+
+
+def group_variable_information_managers(variable_names, read_only=True):
+    """Groups the given variables by the storage their information is kept
+    in, so that each storage can be accessed once for all of its variables.
+
+    Parameters
+    ----------
+    variable_names : iterable(str)
+        The names of the variables.
+    read_only : bool
+        If ``True``, the associated files will be opened read-only and not
+        saved at exit.
+
+    Returns
+    -------
+    list(tuple(envprobe.settings.variable_information.VariableInformation, \
+list(str)))
+        The manager for each storage, as returned by
+        :py:func:`get_variable_information_manager`, and the names of the
+        variables which belong to it.
+    """
+    if os.path.isfile(_information_database_path()) or \
+            (read_only and is_index_compiled()):
+        def group_key(variable_name):
+            return None
+    else:
+        group_key = variable_information.get_information_file_name
+
+    groups = dict()
+    for variable in variable_names:
+        groups.setdefault(group_key(variable), list()).append(variable)
+
+    return [(get_variable_information_manager(variables[0], read_only),
+             variables)
+            for _, variables in sorted(groups.items(),
+                                       key=lambda e: e[0] or '')]
+
+
+def is_index_compiled():
+    """Returns whether the binary index of the local storage exists."""
+    return os.path.isfile(_index_path())
+
+
+def compile_index():
+    """Compiles the binary index from the variable information stored locally.
+    The index is used to answer read-only queries without parsing the stored
+    data.
+
+    Returns
+    -------
+    int
+        The number of variable records in the index.
+    """
+    from envprobe.community_descriptions import index
+
+    def _records():
+        for manager in generate_variable_information_managers():
+            yield from manager.items()
+
+    return index.compile_index(_records(), _index_path())
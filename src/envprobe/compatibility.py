@@ -15,6 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Implement some certain compatibility features between Python versions."""
+import sys
 
 try:
     # nullcontext() is only available starting Python 3.7.
@@ -37,6 +38,69 @@ except ImportError:
         return _ContextWrapper(enter_result)
 
 
+def lazy_package(package_name, namespace, submodules=(), attributes=None):
+    """Set up the public names of a package to be imported only when they are
+    first accessed.
+
+    Parameters
+    ----------
+    package_name : str
+        The fully qualified name of the package, usually ``__name__``.
+    namespace : dict
+        The global namespace of the package, usually ``globals()``.
+    submodules : list(str), optional
+        The names of the submodules that are exposed as attributes of the
+        package.
+    attributes : dict(str, str), optional
+        The names exposed by the package, mapped to the name of the submodule
+        which defines them.
+
+    Returns
+    -------
+    __getattr__ : function
+        The module-level attribute lookup hook, as per :pep:`562`, that should
+        be assigned in the package.
+    __dir__ : function
+        The module-level listing of the available names.
+
+    Note
+    ----
+        Module-level ``__getattr__`` is only available starting Python 3.7.
+        On earlier versions, the `attributes` are imported immediately, as
+        ``from package import name`` would not find them otherwise, but the
+        `submodules` are not.
+        They are imported by the import system when they are first imported
+        explicitly, e.g. ``from package import submodule``.
+    """
+    attributes = attributes if attributes else dict()
+
+    def _import(submodule):
+        # The builtin import (unlike importlib.import_module()) is accounted
+        # for by 'python -X importtime'.
+        module_name = "{}.{}".format(package_name, submodule)
+        __import__(module_name)
+        return sys.modules[module_name]
+
+    def __getattr__(name):
+        if name in submodules:
+            return _import(name)
+        if name in attributes:
+            value = getattr(_import(attributes[name]), name)
+            namespace[name] = value
+            return value
+        raise AttributeError("module '{}' has no attribute '{}'"
+                             .format(package_name, name))
+
+    def __dir__():
+        return sorted(set(namespace) | set(submodules) | set(attributes))
+
+    if sys.version_info < (3, 7):
+        for name in attributes:
+            __getattr__(name)
+
+    return __getattr__, __dir__
+
+
 class Version:
     """A basic class of program versions epxressed in the two-part `M.m`
     (major, minor) format.
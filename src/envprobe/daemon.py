@@ -0,0 +1,438 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Implements an optional, per-user background server that executes Envprobe
+commands on behalf of short-lived clients.
+
+The server keeps the imported library, the loaded commands, the type
+heuristics pipeline, and the module-level caches warm in memory, and
+communicates with the clients over a Unix domain socket in the user's runtime
+directory.
+The parsed contents of the read-only configuration files, such as the tracking
+settings and the variable information, are kept in the
+:py:data:`.settings.config_file.read_cache`, which re-reads a file only if it
+changed on disk.
+The :py:class:`.environment.Environment` and the
+:py:class:`.settings.variable_tracking.VariableTracking` are **not** kept
+between requests. They are created for every request from the environment of
+the requesting client, and the environment of the shell changes between two
+commands. The saved state of the shell is read from its file every time.
+If the server is not running, the clients fall back to executing the command
+in their own process.
+
+Clients only use the server if the shell was hooked with the server enabled,
+which is marked by the :py:data:`OPT_IN_VARIABLE` in the environment.
+"""
+from contextlib import AbstractContextManager, redirect_stderr, \
+    redirect_stdout
+import fcntl
+import io
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+
+from envprobe.settings import get_runtime_directory
+
+
+IDLE_TIMEOUT = 3600
+"""The number of seconds after which a server that received no requests
+shuts down."""
+
+OPT_IN_VARIABLE = "ENVPROBE_DAEMON"
+"""The environment variable which is set by the shell hook if the user asked
+the commands to be executed through the server."""
+
+INTERACTIVE_FLAGS = ["-p", "--patch"]
+"""The command-line flags which make a command read the user's input, and thus
+must not be executed through the server."""
+
+
+def get_socket_path():
+    """Returns the path of the Unix domain socket the current user's server
+    listens on.
+    """
+    return os.path.join(get_runtime_directory(os.getuid()), "daemon.sock")
+
+
+def _lock_path(socket_path):
+    return socket_path + ".lock"
+
+
+def _is_private(path):
+    """Returns whether the file at `path` is owned by the current user and
+    can not be written by anyone else.
+    Symbolic links are not followed.
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return st.st_uid == os.getuid() and \
+        not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _peer_uid(connection):
+    """Returns the user ID of the process on the other end of the Unix domain
+    socket `connection`, or `None` if it can not be queried.
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+
+    creds = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                  struct.calcsize("3i"))
+    _, uid, _ = struct.unpack("3i", creds)
+    return uid
+
+
+def _receive_all(sock):
+    """Read from `sock` until the other end shuts down writing."""
+    chunks = list()
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+class Server(AbstractContextManager):
+    """The server which accepts requests over a Unix domain socket and executes
+    them in the current interpreter.
+
+    Requests are handled one after the other, as executing a command involves
+    temporarily switching the process-wide state (environment, working
+    directory, standard streams) to that of the requesting client.
+    Every request is executed by :py:func:`.main.handle_mode`, which creates
+    the state of the command anew, but reuses the imports and caches of the
+    earlier requests.
+    """
+
+    def __init__(self, socket_path, idle_timeout=IDLE_TIMEOUT):
+        """
+        Parameters
+        ----------
+        socket_path : str
+            The path of the socket to listen on.
+        idle_timeout : int, optional
+            The number of seconds after which the server stops if no request
+            was received.
+        """
+        self._idle_timeout = idle_timeout
+        self._lockfd = None
+        self._path = socket_path
+        self._socket = None
+
+    def __enter__(self):
+        """Acquires the server's lock and starts listening on the socket.
+
+        Raises
+        ------
+        OSError
+            Raised if another server is already running for the same socket.
+        """
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, stat.S_IRWXU, exist_ok=True)
+
+        self._lockfd = open(_lock_path(self._path), 'w')
+        try:
+            fcntl.flock(self._lockfd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lockfd.close()
+            self._lockfd = None
+            raise
+
+        try:
+            # A socket file left behind by a crashed server is stale, as the
+            # lock is not held by anyone else.
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self._path)
+        os.chmod(self._path, stat.S_IRUSR | stat.S_IWUSR)
+        self._socket.listen()
+        self._socket.settimeout(self._idle_timeout)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Stops listening and releases the server's lock."""
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+            try:
+                os.remove(self._path)
+            except FileNotFoundError:
+                pass
+
+        if self._lockfd:
+            fcntl.flock(self._lockfd, fcntl.LOCK_UN)
+            self._lockfd.close()
+            self._lockfd = None
+
+    def serve(self):
+        """Accept and handle requests until the server becomes idle."""
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except socket.timeout:
+                return
+
+            with connection:
+                connection.settimeout(None)
+                if not self._is_same_user(connection):
+                    continue
+                try:
+                    request = json.loads(_receive_all(connection)
+                                         .decode("utf-8"))
+                    response = self.handle_request(**request)
+                except Exception as e:
+                    # The client does not execute the command itself once
+                    # the request was sent, so it must always be answered.
+                    response = {"error": "{0}: {1}".format(type(e).__name__,
+                                                           str(e))}
+                try:
+                    connection.sendall(json.dumps(response).encode("utf-8"))
+                except OSError:
+                    # The client went away, nothing to answer.
+                    continue
+
+    @staticmethod
+    def _is_same_user(connection):
+        """Returns whether the peer of `connection` runs as the same user as
+        the server.
+        """
+        uid = _peer_uid(connection)
+        # Without peer credentials, the socket's permissions only allow the
+        # owner to connect.
+        return uid is None or uid == os.getuid()
+
+    @staticmethod
+    def handle_request(argv, environment, cwd, envprobe_root):
+        """Execute an Envprobe invocation as if it was run by the client.
+
+        Parameters
+        ----------
+        argv : list(str)
+            The command-line of the client's invocation.
+        environment : dict(str, str)
+            The environment variables of the client.
+        cwd : str
+            The working directory of the client.
+        envprobe_root : str
+            The location of the Envprobe install the client runs.
+
+        Returns
+        -------
+        dict
+            The ``returncode``, and the ``stdout`` and ``stderr`` output of the
+            execution.
+        """
+        from envprobe.main import handle_mode
+
+        original_argv = sys.argv
+        original_cwd = os.getcwd()
+        original_environment = dict(os.environ)
+        original_stdin = sys.stdin
+        stdout, stderr = io.StringIO(), io.StringIO()
+
+        try:
+            os.environ.clear()
+            os.environ.update(environment)
+            os.chdir(cwd)
+            sys.argv = list(argv)
+            sys.stdin = io.StringIO()
+
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    returncode = handle_mode(envprobe_root, use_daemon=False)
+                except SystemExit as e:
+                    returncode = e.code
+                    if isinstance(returncode, str):
+                        print(returncode, file=sys.stderr)
+                        returncode = 1
+        finally:
+            sys.argv = original_argv
+            sys.stdin = original_stdin
+            os.chdir(original_cwd)
+            os.environ.clear()
+            os.environ.update(original_environment)
+
+        return {"returncode": returncode if returncode else 0,
+                "stdout": stdout.getvalue(),
+                "stderr": stderr.getvalue()
+                }
+
+
+def serve(socket_path=None, idle_timeout=IDLE_TIMEOUT):
+    """Run the server in the current process until it becomes idle.
+
+    Returns
+    -------
+    int
+        ``0`` if the server ran, ``1`` if another server is already running.
+    """
+    import signal
+
+    if not socket_path:
+        socket_path = get_socket_path()
+
+    # Make sure the socket is cleaned up if the server is terminated.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        with Server(socket_path, idle_timeout) as server:
+            server.serve()
+    except BlockingIOError:
+        return 1
+    return 0
+
+
+def is_running(socket_path=None):
+    """Returns whether a server is accepting connections at `socket_path`."""
+    if not socket_path:
+        socket_path = get_socket_path()
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            return True
+    except OSError:
+        return False
+
+
+def start(socket_path=None):
+    """Start the server in the background, if it is not running already.
+
+    Returns
+    -------
+    bool
+        ``True`` if a new server process was started.
+    """
+    if not socket_path:
+        socket_path = get_socket_path()
+    if is_running(socket_path):
+        return False
+
+    # Only the clients which start the server need the process management.
+    import subprocess  # nosec: The daemon is started from our own interpreter.
+
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [package_root, environment.get("PYTHONPATH")]))
+
+    subprocess.Popen([sys.executable, "-m", "envprobe.daemon",  # nosec
+                      socket_path],
+                     cwd='/',
+                     env=environment,
+                     stdin=subprocess.DEVNULL,
+                     stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    return True
+
+
+def execute(argv, envprobe_root, environment, cwd, socket_path=None):
+    """Send the invocation to the server and wait for it to be executed.
+
+    Returns
+    -------
+    returncode : int
+        The result of the command.
+    stdout : str
+        The standard output emitted by the command.
+    stderr : str
+        The standard error emitted by the command.
+        If the request was sent, but the server failed to answer it, the
+        result is an error, as the command might have been executed already.
+    None
+        Returned if the invocation can not be served by the server, either
+        because the server is not running, the command is interactive, or the
+        server's socket is not private to the current user.
+    """
+    if not socket_path:
+        socket_path = get_socket_path()
+    if any(flag in argv for flag in INTERACTIVE_FLAGS) or \
+            not _is_private(socket_path) or \
+            not _is_private(os.path.dirname(os.path.abspath(socket_path))):
+        return None
+
+    request = json.dumps({"argv": argv,
+                          "environment": dict(environment),
+                          "cwd": cwd,
+                          "envprobe_root": envprobe_root
+                          }).encode("utf-8")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+            uid = _peer_uid(sock)
+            if uid is not None and uid != os.getuid():
+                return None
+            sock.sendall(request)
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            return None
+
+        try:
+            response = json.loads(_receive_all(sock).decode("utf-8"))
+            if "error" in response:
+                raise ValueError(response["error"])
+            return response["returncode"], response["stdout"], \
+                response["stderr"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            return 1, "", "[ERROR] The Envprobe daemon failed to execute " \
+                "the command: {0}\n".format(str(e))
+
+
+def dispatch(argv, envprobe_root):
+    """Execute the current process's invocation through the server, and emit
+    the results as if the command ran locally.
+
+    Returns
+    -------
+    int
+        The return code of the executed command.
+    None
+        Returned if the server did not execute the command, and it should be
+        run in the current process instead.
+        This is always the case if the user did not enable the server in the
+        shell hook.
+    """
+    if not os.environ.get(OPT_IN_VARIABLE):
+        return None
+
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        return None
+
+    result = execute(argv, envprobe_root, os.environ, cwd)
+    if result is None:
+        return None
+
+    returncode, stdout, stderr = result
+    sys.stdout.write(stdout)
+    sys.stderr.write(stderr)
+    return returncode
+
+
+if __name__ == '__main__':
+    sys.exit(serve(sys.argv[1] if len(sys.argv) >= 2 else None))
@@ -17,7 +17,7 @@
 """Implements the logic for interfacing with the environment's contents,
 mapping variable primitives to internal data structure, keeping state, etc.
 """
-from copy import deepcopy
+from collections.abc import MutableMapping
 from enum import Enum
 import os
 import pickle  # nosec: pickle has some issues, we will get back to it later.
@@ -29,6 +29,24 @@ class EnvVarTypeHeuristic:
     """A heuristic maps a variable's name and it's potential value in the
     environment to an :py:mod:`envprobe.vartypes` type.
     """
+
+    cacheable = False
+    """Whether the result of the heuristic only depends on the variable's
+    name (and the configuration of the user), but not on the variable's value,
+    and thus can be stored in the :py:attr:`HeuristicStack.cache`.
+    """
+
+    @property
+    def cache_key(self):
+        """A JSON-serialisable value that identifies the heuristic's behaviour
+        in the :py:attr:`HeuristicStack.cache`.
+
+        The default implementation returns the qualified name of the class.
+        Heuristics whose results depend on how they were instantiated should
+        extend the key with their parameters.
+        """
+        return "{0}.{1}".format(type(self).__module__, type(self).__qualname__)
+
     def __call__(self, name, env=None):
         """Resolve the variable of `name` (in the `env` environment) to an
         :py:mod:`envprobe.vartype` type identifier (as registered by
@@ -61,6 +79,31 @@ class EnvVarTypeHeuristic:
         """
         return 'string'
 
+    def resolve_many(self, names, env=None):
+        """Resolve the variables of `names` (in the `env` environment) at
+        once, as if :py:meth:`__call__` was called for each name.
+
+        The default implementation calls the heuristic for every name.
+        Heuristics that can share work between the variables, e.g. reading
+        the same configuration file, should override this method.
+
+        Parameters
+        ----------
+        names : list(str)
+            The names of the environment variables.
+        env : dict, optional
+            The raw mapping of environment variables to their values, as in
+            :py:data:`os.environ`.
+
+        Returns
+        -------
+        dict(str, str or None or False)
+            The result of the resolution for each name.
+            Names missing from the result are considered resolved to
+            ``None``.
+        """
+        return {name: self(name, env) for name in names}
+
 
 class HeuristicStack:
     """A stack of :py:class:`EnvVarTypeHeuristic` objects which resolve a
@@ -84,8 +127,17 @@ class HeuristicStack:
         pipeline("OTHER_VAR", env)
         >>> 'string'
     """
-    def __init__(self):
+    def __init__(self, cache=None):
+        """
+        Parameters
+        ----------
+        cache : .settings.vartype_cache.VartypeCache, optional
+            The cache to store the results of the :py:attr:`cacheable
+            <EnvVarTypeHeuristic.cacheable>` heuristics at the top of the stack
+            in.
+        """
         self._elements = list()
+        self.cache = cache
 
     def __add__(self, heuristic):
         """Add the `heuristic` to the top of the stack.
@@ -129,14 +181,86 @@ class HeuristicStack:
         False : bool
             ``False`` is returned if a heuristic resolved the variable
             **not to be managed** by Envprobe.
+
+        Note
+        ----
+        If the stack has a :py:attr:`cache`, the results of the consecutive
+        :py:attr:`cacheable <EnvVarTypeHeuristic.cacheable>` heuristics at
+        the top of the stack are looked up from and stored in the cache.
+        The heuristics below them are executed for every call.
         """
-        for h in reversed(self._elements):
-            result = h(name, env)
-            if result:
-                return result
-            if result is False:
+        return self.resolve_many([name], env)[name]
+
+    def resolve_many(self, names, env=None):
+        """Resolve the variables of `names` (in the `env` environment) to
+        :py:mod:`envprobe.vartype` type identifiers, as if :py:meth:`__call__`
+        was called for each name.
+
+        Every heuristic of the stack is executed only once, through
+        :py:meth:`EnvVarTypeHeuristic.resolve_many`, with the names that were
+        not resolved by the heuristics above it.
+
+        Returns
+        -------
+        dict(str, str or None)
+            The name of the :py:mod:`envprobe.vartypes` implementation for
+            each name, or ``None`` if the variable could not be resolved or
+            is not to be managed.
+        """
+        heuristics = self._elements[::-1]
+        results = dict()
+        pending = list(dict.fromkeys(names))
+
+        if self.cache is not None:
+            count = 0
+            while count < len(heuristics) and heuristics[count].cacheable:
+                count += 1
+
+            if count:
+                if not self.cache.loaded:
+                    self.cache.load([h.cache_key for h in heuristics[:count]])
+
+                misses = list()
+                for name in pending:
+                    try:
+                        results[name] = self.cache[name]
+                    except KeyError:
+                        misses.append(name)
+
+                resolved = self._resolve_many(heuristics[:count], misses, env)
+                for name, result in resolved.items():
+                    self.cache[name] = result
+                results.update(resolved)
+
+                pending = [name for name in pending if results[name] is None]
+                heuristics = heuristics[count:]
+
+        results.update(self._resolve_many(heuristics, pending, env))
+        return {name: result if result else None
+                for name, result in results.items()}
+
+    @staticmethod
+    def _resolve_many(heuristics, names, env):
+        """Executes the `heuristics` in order, each for the variables that
+        were not resolved by the previous ones.
+
+        Returns
+        -------
+        dict(str, str or False or None)
+            The result of the first heuristic that returned non-None for each
+            name, or ``None`` if none of them did.
+        """
+        results = dict.fromkeys(names)
+        pending = names
+        for h in heuristics:
+            if not pending:
                 break
-        return None
+
+            for name, result in h.resolve_many(pending, env).items():
+                if result or result is False:
+                    results[name] = result
+            pending = [name for name in pending if results[name] is None]
+        return results
 
 
 # Create the default type heuristic pipeline that only uses the default
@@ -192,6 +316,46 @@ def create_environment_variable(name, env, pipeline=None):
     return clazz(name, env.get(name, ""))
 
 
+def create_environment_variables(names, env, pipeline=None):
+    """Create :py:class:`.vartypes.EnvVar` instances for multiple variables,
+    resolving their types in one pass of the pipeline.
+
+    Parameters
+    ----------
+    names: list(str)
+        The names of the environment variables to create.
+    env : dict
+        The raw mapping of environment variables to their values, as in
+        :py:data:`os.environ`.
+    pipeline : HeuristicStack, optional
+        The heuristics pipeline to use to decide on the variables' types.
+        If not specified, :py:data:`default_heuristic` is used.
+        If the pipeline does not implement
+        :py:meth:`~HeuristicStack.resolve_many`, it is called for every name.
+
+    Returns
+    -------
+    dict(str, .vartypes.EnvVar)
+        The instantiated environment variables, as if created by
+        :py:func:`create_environment_variable`.
+        The variables that were not resolved to a valid type by the `pipeline`
+        are not contained in the result.
+    """
+    if not pipeline:
+        pipeline = default_heuristic
+
+    if hasattr(pipeline, "resolve_many"):
+        kinds = pipeline.resolve_many(names, env)
+    else:
+        kinds = {name: pipeline(name, env) for name in names}
+
+    variables = dict()
+    for name, kind in kinds.items():
+        if kind:
+            variables[name] = vartypes.load(kind)(name, env.get(name, ""))
+    return variables
+
+
 class VariableDifferenceKind(Enum):
     """Named enumeration to indicate the "direction" of the
     :py:class:`VariableDifference`.
@@ -278,6 +442,90 @@ class VariableDifference:
             self.kind == VariableDifferenceKind.REMOVED
 
 
+class OverlayMapping(MutableMapping):
+    """A mapping that reads through to a *base* mapping, and records only the
+    modifications and deletions made to it.
+
+    Copying an environment only copies the recorded changes, and does not
+    read, or copy, the values of every variable in the base mapping.
+
+    Note
+    ----
+    The base mapping must not be changed while the overlay is used, as such
+    changes would show through the overlay.
+    """
+
+    def __init__(self, base, changes=None, deleted=None):
+        """
+        Parameters
+        ----------
+        base : dict
+            The mapping which values are read if they were not changed in the
+            overlay.
+            If `base` is an :py:class:`OverlayMapping` itself, the new overlay
+            will read its changes, and its base.
+        changes : dict, optional
+            The values already changed (or added) in the overlay.
+        deleted : set, optional
+            The keys of `base` that are already deleted in the overlay.
+        """
+        changes = dict(changes) if changes else dict()
+        deleted = set(deleted) if deleted else set()
+        if isinstance(base, OverlayMapping):
+            changes = {**base._changes, **changes}
+            deleted = (base._deleted - changes.keys()) | deleted
+            base = base._base
+
+        self._base = base
+        self._changes = changes
+        self._deleted = deleted
+
+    def __getitem__(self, key):
+        try:
+            return self._changes[key]
+        except KeyError:
+            if key in self._deleted:
+                raise
+            return self._base[key]
+
+    def __setitem__(self, key, value):
+        self._changes[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._changes.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key):
+        if key in self._changes:
+            return True
+        return key not in self._deleted and key in self._base
+
+    def __iter__(self):
+        for key in self._base:
+            if key not in self._deleted:
+                yield key
+        for key in self._changes:
+            if key not in self._base:
+                yield key
+
+    def __len__(self):
+        return len(self._base) - len(self._deleted) + \
+            sum(1 for key in self._changes if key not in self._base)
+
+    def __repr__(self):
+        return "{0}({1!r})".format(type(self).__name__, dict(self))
+
+    def copy(self):
+        """Returns a shallow copy of the overlay, which shares the base
+        mapping, but records its changes separately.
+        """
+        return OverlayMapping(self)
+
+
 class Environment:
     """Owns and manages the understanding of environment variables' state
     attached to a shell.
@@ -301,13 +549,16 @@ class Environment:
         env : dict, optional
             The raw mapping of environment variables to their values, as in
             :py:data:`os.environ`.
+            The mapping is not copied, but read through an
+            :py:class:`OverlayMapping`, and thus must not change while the
+            manager is used.
         variable_type_heuristic : HeuristicStack, optional
             The variable-to-:py:class:`.vartypes.EnvVar` type mapping
             heuristics.
             If not specified, :py:data:`default_heuristic` is used.
         """
         self._shell = shell
-        self._current_environment = dict(deepcopy(env))
+        self._current_environment = OverlayMapping(env if env else dict())
         self._stamped_environment = None
         self.type_heuristics = variable_type_heuristic
 
@@ -336,7 +587,7 @@ class Environment:
         """Stamp the :py:attr:`current_environment`, making it become the
         :py:attr:`stamped_environment`.
         """
-        self._stamped_environment = deepcopy(self._current_environment)
+        self._stamped_environment = self._current_environment.copy()
 
     def save(self):
         """Save the :py:attr:`stamped_environment` to the persistent storage.
@@ -350,8 +601,13 @@ class Environment:
                 self._shell.manages_environment_variables):
             return
 
+        stamped = self._stamped_environment
+        if isinstance(stamped, OverlayMapping):
+            # The state file should not depend on the overlay's structure.
+            stamped = dict(stamped)
+
         with open(self._shell.state_file, 'wb') as f:
-            pickle.dump(self._stamped_environment, f)
+            pickle.dump(stamped, f)
         os.chmod(self._shell.state_file, 0o0600)
 
     @property
@@ -412,6 +668,35 @@ class Environment:
                                            self.type_heuristics), \
             variable_name in self.current_environment
 
+    def variables(self, variable_names, stamped=False):
+        """Retrieve multiple :py:class:`.vartypes.EnvVar` environment variables
+        at once, resolving their types in one pass of the
+        :py:attr:`type_heuristics`.
+
+        Parameters
+        ----------
+        variable_names : list(str)
+            The names of the variables to retrieve.
+        stamped : bool, optional
+            If ``True``, the variables are retrieved from the
+            :py:attr:`stamped_environment`, otherwise from the
+            :py:attr:`current_environment`.
+
+        Returns
+        -------
+        dict(str, tuple(.vartypes.EnvVar, bool))
+            The typed environment variable object, and whether it was
+            actually **defined**, for each name, as returned by
+            :py:meth:`__getitem__` or :py:meth:`get_stamped_variable`.
+            The variables that are not managed by Envprobe are not contained
+            in the result.
+        """
+        env = self.stamped_environment if stamped \
+            else self.current_environment
+        return {name: (variable, name in env)
+                for name, variable in create_environment_variables(
+                    variable_names, env, self.type_heuristics).items()}
+
     def set_variable(self, variable, remove=False):
         """Sets the value of `variable` in the :py:attr:`current_environment`
         to the parameter, i.e. storing the change to the dirty state.
@@ -503,18 +788,12 @@ class Environment:
         differ substantially.
         """
         diff = dict()
+        old_variables, new_variables = dict(), dict()
 
         def __create_difference(kind, var_name):
             try:
-                old_exists = var_name in self._stamped_environment
-                old = create_environment_variable(var_name,
-                                                  self.stamped_environment,
-                                                  self.type_heuristics)
-
-                new_exists = var_name in self._current_environment
-                new = create_environment_variable(var_name,
-                                                  self.current_environment,
-                                                  self.type_heuristics)
+                old, old_exists = old_variables[var_name]
+                new, new_exists = new_variables[var_name]
             except KeyError:
                 # Creating the environment variable instance failed because it
                 # was deemed not to be managed. Ignore.
@@ -537,17 +816,24 @@ class Environment:
             for e in iter(iterable):
                 __create_difference(kind, e)
 
-        __handle_elements(
-                VariableDifferenceKind.ADDED,
-                set(self.current_environment.keys()) -
-                set(self.stamped_environment.keys()))
-        __handle_elements(
-                VariableDifferenceKind.REMOVED,
-                set(self.stamped_environment.keys()) -
-                set(self.current_environment.keys()))
-        __handle_elements(
-                VariableDifferenceKind.CHANGED,
-                set(self.current_environment.keys()) &
-                set(self.stamped_environment.keys()))
+        added = set(self.current_environment.keys()) - \
+            set(self.stamped_environment.keys())
+        removed = set(self.stamped_environment.keys()) - \
+            set(self.current_environment.keys())
+        # Variables that have the same raw value in both environments are
+        # unchanged, and there is no need to resolve their types.
+        changed = [name for name in (set(self.current_environment.keys()) &
+                                     set(self.stamped_environment.keys()))
+                   if self.current_environment[name] !=
+                   self.stamped_environment[name]]
+
+        # The types of every variable involved are resolved in one pass.
+        names = list(added) + list(removed) + changed
+        old_variables.update(self.variables(names, stamped=True))
+        new_variables.update(self.variables(names))
+
+        __handle_elements(VariableDifferenceKind.ADDED, added)
+        __handle_elements(VariableDifferenceKind.REMOVED, removed)
+        __handle_elements(VariableDifferenceKind.CHANGED, changed)
 
         return diff
@@ -16,10 +16,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import os
 
+from envprobe.community_descriptions import local_data
 from envprobe.environment import Environment, default_heuristic
 from envprobe.settings import core as settings
-from envprobe.settings import config_file, snapshot, variable_information, \
-    variable_tracking
+from envprobe.settings import config_file, information_database, snapshot, \
+    variable_information, variable_tracking, vartype_cache
 from envprobe.shell import get_current_shell, FakeShell
 
 
@@ -110,7 +111,18 @@ def get_variable_information_manager(variable_name, read_only=True):
         The configuration handler engine.
         Access to the underlying file is handled automatically through this
         instance.
+        If the configuration was migrated to the indexed database, the
+        engine is backed by an
+        :py:class:`.settings.information_database.InformationDatabase`.
     """
+    database = os.path.join(
+        settings.get_configuration_directory(),
+        variable_information.get_information_database_name())
+    if os.path.isfile(database):
+        return variable_information.VariableInformation(
+            information_database.InformationDatabase(database,
+                                                     read_only=read_only))
+
     basedir = os.path.join(settings.get_configuration_directory(),
                            variable_information.get_variable_directory_name())
 
@@ -124,6 +136,46 @@ def get_variable_information_manager(variable_name, read_only=True):
     )
 
 
+def group_variable_information_managers(variable_names, read_only=True):
+    """Groups the given variables by the storage their information is kept
+    in, so that each storage can be accessed once for all of its variables.
+
+    Parameters
+    ----------
+    variable_names : iterable(str)
+        The names of the variables.
+    read_only : bool
+        If ``True``, the associated files will be opened read-only and not
+        saved at exit.
+
+    Returns
+    -------
+    list(tuple(.settings.variable_information.VariableInformation, list(str)))
+        The manager for each storage, as returned by
+        :py:func:`get_variable_information_manager`, and the names of the
+        variables which belong to it.
+        If the configuration was migrated to the indexed database, every
+        variable belongs to the single manager of the database.
+    """
+    database = os.path.join(
+        settings.get_configuration_directory(),
+        variable_information.get_information_database_name())
+    if os.path.isfile(database):
+        def group_key(variable_name):
+            return None
+    else:
+        group_key = variable_information.get_information_file_name
+
+    groups = dict()
+    for variable in variable_names:
+        groups.setdefault(group_key(variable), list()).append(variable)
+
+    return [(get_variable_information_manager(variables[0], read_only),
+             variables)
+            for _, variables in sorted(groups.items(),
+                                       key=lambda e: e[0] or '')]
+
+
 def get_variable_tracking(shell=None):
     """Creates a **read-only** tracking manager for the standard global and
     local configuration files.
@@ -157,3 +209,38 @@ def get_variable_tracking(shell=None):
 
     return variable_tracking.VariableTracking(global_config_file,
                                               local_config_file)
+
+
+def get_vartype_cache(shell=None):
+    """Creates the cache of the types the variables were resolved to by the
+    type heuristics.
+
+    Parameters
+    ----------
+    shell : .shell.Shell, optional
+        The shell which is used in the current environment.
+        If the shell is capable, the table of the shell (created when the
+        shell was hooked) is used, which is stored in its configuration
+        directory.
+        Otherwise, the cache of the user is used.
+
+    Returns
+    -------
+    .settings.vartype_cache.VartypeCache
+        The cache, which is invalidated if the configuration of the user or
+        the local storage of the community descriptions change.
+    """
+    if shell and shell.is_envprobe_capable:
+        basedir = shell.configuration_directory
+    else:
+        basedir = settings.get_data_directory()
+
+    config_dir = settings.get_configuration_directory()
+    return vartype_cache.VartypeCache(
+        os.path.join(basedir, vartype_cache.get_vartype_cache_file_name()),
+        sources=[
+            os.path.join(config_dir,
+                         variable_information.get_variable_directory_name()),
+            os.path.join(config_dir,
+                         variable_information.get_information_database_name())
+            ] + local_data.get_storage_state_paths())
@@ -19,76 +19,195 @@
 This script is responsible for setting up the interaction with the user, and
 handling the invocation.
 """
-import argparse
 import os
 import sys
+from types import SimpleNamespace
 
-from envprobe.commands import load as load_command
+from envprobe.commands.core import load as load_command
 from envprobe.commands.shortcuts import transform_subcommand_shortcut
-from envprobe.community_descriptions.local_data \
-    import get_variable_information_manager as \
-    get_community_variable_information_manager
-from envprobe.library import get_shell_and_env_always, \
-    get_variable_information_manager, get_variable_tracking
-from envprobe.vartype_heuristics import \
-    assemble_standard_type_heuristics_pipeline
+from envprobe.shell import get_current_shell, FakeShell
 
 
-def __create_global_shell_and_env():
-    """Creates a valid :py:class:`.shell.Shell` and
-    :py:class:`.environment.Environment` instance for the current running
-    system, shell, and configuration, to be used as the basis of injected state
-    by the subcommands.
+__type_heuristics = None
 
-    Returns
-    -------
-    shell : .shell.Shell
-        The current Shell backend implementation.
-    environment : .environment.Environment
-        The handler for environment variable access.
+
+def __get_type_heuristics():
+    """Returns the standard type heuristics pipeline, which is only assembled
+    once per interpreter, so a long-running :py:mod:`.daemon` can reuse it.
     """
-    return get_shell_and_env_always(
-        os.environ,
-        assemble_standard_type_heuristics_pipeline(
+    global __type_heuristics
+    if not __type_heuristics:
+        from envprobe.library import get_variable_information_manager, \
+            group_variable_information_managers
+        from envprobe.vartype_heuristics import \
+            assemble_standard_type_heuristics_pipeline
+
+        def _community_loader(varname):
+            # The community descriptions are only loaded if a variable's
+            # type is not configured by the user.
+            from envprobe.community_descriptions.local_data import \
+                get_variable_information_manager as get_community_manager
+            return get_community_manager(varname, read_only=True)
+
+        def _community_group_loader(varnames):
+            from envprobe.community_descriptions.local_data import \
+                group_variable_information_managers as group_community
+            return group_community(varnames, read_only=True)
+
+        # The grouping of the variables depends on whether the information
+        # is stored in per-letter files, or in the database or index, which
+        # is checked every time as the storage might be migrated while a
+        # daemon is running.
+        __type_heuristics = assemble_standard_type_heuristics_pipeline(
             varcfg_user_loader=lambda varname:
                 get_variable_information_manager(varname, read_only=True),
-            varcfg_description_loader=lambda varname:
-                get_community_variable_information_manager(varname,
-                                                           read_only=True)
+            varcfg_description_loader=_community_loader,
+            varcfg_user_group_loader=lambda varnames:
+                group_variable_information_managers(varnames, read_only=True),
+            varcfg_description_group_loader=_community_group_loader
             )
-    )
+    return __type_heuristics
+
+
+def __create_global_shell():
+    """Creates a valid :py:class:`.shell.Shell` for the current running
+    system, as :py:func:`.library.get_shell_and_env_always` would, to be used
+    as the basis of injected state by the subcommands.
+
+    Returns
+    -------
+    .shell.Shell
+        The current Shell backend implementation.
+    """
+    try:
+        return get_current_shell(os.environ)
+    except KeyError:
+        return FakeShell()
+
+
+def __create_global_environment(shell):
+    """Creates the :py:class:`.environment.Environment` for the current
+    `shell`, and configuration, to be used as the basis of injected state by
+    the subcommands.
+    """
+    from envprobe.environment import Environment
+    from envprobe.library import get_vartype_cache
+
+    # The cache is created for every command, as the configuration of the
+    # user and the shell might have changed since the pipeline was assembled.
+    heuristics = __get_type_heuristics()
+    heuristics.cache = get_vartype_cache(shell)
+    return Environment(shell, os.environ, heuristics)
+
 
+def __save_type_cache():
+    """Saves the types resolved during the execution of a command to the
+    cache, and detaches it from the pipeline.
+    """
+    if __type_heuristics and __type_heuristics.cache:
+        __type_heuristics.cache.save()
+        __type_heuristics.cache = None
+
+
+def __create_global_tracking(shell):
+    """Creates the :py:class:`.settings.variable_tracking.VariableTracking`
+    for the current `shell`.
+    """
+    from envprobe.library import get_variable_tracking
+    return get_variable_tracking(shell)
+
+
+class _LazyNamespace(SimpleNamespace):
+    """The parsed command-line arguments, extended with attributes that are
+    only created when they are first accessed.
+
+    Creating the state of Envprobe (such as copying the environment, or
+    assembling the type heuristics) is expensive, and most commands only need
+    some of it.
+    """
+
+    def __init__(self, factories, **kwargs):
+        """
+        Parameters
+        ----------
+        factories : dict(str, callable)
+            The functions that create the value of the lazy attribute of the
+            given name.
+        """
+        super().__init__(**kwargs)
+        self.__dict__["_factories"] = factories
+
+    def __getattr__(self, name):
+        """Creates the value of a lazy attribute on its first access."""
+        try:
+            factory = self.__dict__["_factories"].pop(name)
+        except KeyError:
+            raise AttributeError(name)
+
+        value = factory()
+        setattr(self, name, value)
+        return value
 
-def __inject_state_to_args(args, shell, environment, argvZero):
-    """Injects the common Envprobe library objects to the
-    :py:class:`argparse.Namespace` object.
+    def __contains__(self, name):
+        return name in self.__dict__ or name in self._factories
+
+
+def __inject_state_to_args(args, shell, argvZero):
+    """Injects the common Envprobe library objects to the parsed command-line
+    arguments.
+
+    The `environment` and `tracking` objects are only created when the
+    command first accesses them.
 
     Parameters
     ----------
-    args: argparse.Namespace
+    args: argparse.Namespace or types.SimpleNamespace
         The parsed command-line arguments.
     shell : .shell.Shell
         The current Shell backend implementation.
-    environment : .environment.Environment
-        The handler for environment variable access.
     argvZero : str
         The first element of the command-line invocation list, containing the
         executed program's name.
 
     Returns
     -------
-    argparse.Namespace
+    types.SimpleNamespace
         The parsed command-line arguments, extended with the Envprobe library
         globals.
     """
-    args.environment = environment
+    args = _LazyNamespace(
+        {"environment": lambda: __create_global_environment(shell),
+         "tracking": lambda: __create_global_tracking(shell)
+         },
+        **vars(args))
     args.envprobe_root = argvZero.replace("/__envprobe", "")
     args.shell = shell
-    args.tracking = get_variable_tracking(shell)
 
     return args
 
 
+def __execute(args):
+    """Executes the command selected in the parsed command-line arguments, and
+    reports the errors raised by it to the user.
+
+    Returns
+    -------
+    int
+        The return code of the command.
+    """
+    try:
+        return args.func(args)
+    except Exception as e:
+        print("[ERROR] Failed to execute the desired action.",
+              file=sys.stderr)
+        print(str(e), file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        __save_type_cache()
+
+
 # -------------------------------- Main mode ---------------------------------
 
 mode_description = \
@@ -113,10 +232,22 @@ main_subcommands_description = \
     and is based on your current shell and environment setup."""
 
 
+main_commands = ["get", "set", "undefine", "add", "remove",
+                 "list",
+                 "diff", "load", "save",
+                 "delete"
+                 ]
+"""The commands of the main mode. The order of the commands here also
+specifies the order they are shown in the user's output!"""
+
+
 def __main_mode(argv):
     """Implementation of Envprobe's main entry point."""
-    # Instantiate the "globals" of Envprobe that interface with the env vars.
-    shell, env = __create_global_shell_and_env()
+    import argparse
+
+    # Instantiate the shell, the other "globals" of Envprobe are only created
+    # once a command accesses them.
+    shell = __create_global_shell()
 
     # Create the command-line user interface.
     parser = argparse.ArgumentParser(
@@ -128,16 +259,10 @@ def __main_mode(argv):
             title="available commands",
             description=main_subcommands_description)
 
-    # The order of the commands here also specifies the order they are shown
-    # in the user's output!
-    commands = ["get", "set", "undefine", "add", "remove",
-                "list",
-                "diff", "load", "save",
-                "delete"
-                ]
+    commands = main_commands
     argv = transform_subcommand_shortcut(argv, commands)
 
-    if len(argv) > 2 and argv[1] in commands:
+    if len(argv) >= 2 and argv[1] in commands:
         # If the user directly specified a subcommand to load, load **only**
         # that.
         commands = [argv[1]]
@@ -147,19 +272,11 @@ def __main_mode(argv):
         getattr(com_impl, 'register')(subparsers, shell)
 
     args = parser.parse_args(argv[1:])
-    args = __inject_state_to_args(args, shell, env, argv[0])
+    args = __inject_state_to_args(args, shell, argv[0])
 
     # Execute the desired action.
     if 'func' in args:
-        try:
-            return args.func(args)
-        except Exception as e:
-            print("[ERROR] Failed to execute the desired action.",
-                  file=sys.stderr)
-            print(str(e), file=sys.stderr)
-            import traceback
-            traceback.print_exc()
-            return 1
+        return __execute(args)
     else:
         argv.append("--help")
         args = parser.parse_args(argv[1:])
@@ -181,10 +298,24 @@ config_subcommands_description = \
     and is based on your current shell and environment setup."""
 
 
+config_commands = ["hook",
+                   "consume",
+                   "set_variable",  # The Python module name must be used here.
+                   "track",
+                   "descriptions",
+                   "migrate"
+                   ]
+"""The commands of the config mode. The order of the commands here also
+specifies the order they are shown in the user's output!"""
+
+
 def __config_mode(argv):
     """Implementation of Envprobe's configuration entry point."""
-    # Instantiate the "globals" of Envprobe that interface with the env vars.
-    shell, env = __create_global_shell_and_env()
+    import argparse
+
+    # Instantiate the shell, the other "globals" of Envprobe are only created
+    # once a command accesses them.
+    shell = __create_global_shell()
 
     # Create the command-line user interface.
     parser = argparse.ArgumentParser(
@@ -196,16 +327,9 @@ def __config_mode(argv):
             title="available commands",
             description=config_subcommands_description)
 
-    # The order of the commands here also specifies the order they are shown
-    # in the user's output!
-    commands = ["hook",
-                "consume",
-                "set_variable",  # The Python module name must be used here.
-                "track",
-                "descriptions"
-                ]
+    commands = config_commands
 
-    if len(argv) > 2 and argv[1] in commands:
+    if len(argv) >= 2 and argv[1] in commands:
         # If the user directly specified a subcommand to load, load **only**
         # that.
         commands = [argv[1]]
@@ -215,19 +339,11 @@ def __config_mode(argv):
         getattr(com_impl, 'register')(subparsers, shell)
 
     args = parser.parse_args(argv[1:])
-    args = __inject_state_to_args(args, shell, env, argv[0])
+    args = __inject_state_to_args(args, shell, argv[0])
 
     # Execute the desired action.
     if 'func' in args:
-        try:
-            return args.func(args)
-        except Exception as e:
-            print("[ERROR] Failed to execute the desired action.",
-                  file=sys.stderr)
-            print(str(e), file=sys.stderr)
-            import traceback
-            traceback.print_exc()
-            return 1
+        return __execute(args)
     else:
         argv.append("--help")
         args = parser.parse_args(argv[1:])
@@ -250,10 +366,77 @@ def __dispatch_factory(to_fn):
     return __bound_dispatcher
 
 
-def handle_mode(envprobe_root):
+# ------------------------------- Fast dispatch -------------------------------
+
+fast_commands = {"main": ["get", "add"],
+                 "config": ["consume"]
+                 }
+"""The commands of each mode which are executed so frequently (usually by the
+shell's prompt hook, or by the user) that they are dispatched without building
+the full command-line user interface.
+
+The implementation module of these commands must have a ``parse_fast``
+function, which takes the arguments after the command's name and the current
+shell, and returns the parsed arguments, or ``None`` if the invocation must be
+parsed by :py:mod:`argparse` instead."""
+
+
+def __fast_dispatch(argv):
+    """Executes the invocation in `argv` (including the mode) if it is a
+    common invocation of one of the :py:data:`fast_commands`.
+
+    Returns
+    -------
+    int
+        The return code of the executed command.
+    None
+        Returned if the invocation is not handled by the fast dispatch, and
+        should be executed through the appropriate mode handler instead.
+    """
+    if len(argv) < 3 or argv[1] not in fast_commands:
+        return None
+
+    mode = argv[1]
+    argv = [argv[0]] + argv[2:]
+    if mode == "main":
+        argv = transform_subcommand_shortcut(argv, main_commands)
+    if len(argv) < 2 or argv[1] not in fast_commands[mode]:
+        return None
+
+    shell = __create_global_shell()
+    args = load_command(argv[1]).parse_fast(argv[2:], shell)
+    if args is None:
+        return None
+
+    args = __inject_state_to_args(args, shell, argv[0])
+    returncode = __execute(args)
+    return returncode if returncode is not None else 0
+
+
+def handle_mode(envprobe_root, use_daemon=True):
     """Parse the first argument to an Envprobe commnad-line invocation and
     dispatch to the appropriate mode handler.
+
+    If `use_daemon` is ``True`` and the user's :py:mod:`.daemon` is running,
+    the invocation is executed by the daemon instead of the current process.
     """
+    if use_daemon:
+        from envprobe.daemon import dispatch
+        returncode = dispatch(sys.argv, envprobe_root)
+        if returncode is not None:
+            return returncode
+
+    # Normalise the entry point and pass the path to the package on.
+    sys.argv[0] = os.path.join(envprobe_root, "__envprobe")
+
+    returncode = __fast_dispatch(sys.argv)
+    if returncode is not None:
+        return returncode
+
+    # Building the command-line user interface is only needed for invocations
+    # which could not be dispatched quickly.
+    import argparse
+
     mode_parser = argparse.ArgumentParser(
             prog="envprobe",
             description=mode_description
@@ -277,7 +460,5 @@ def handle_mode(envprobe_root):
     selected_facade = [sys.argv[1]] if len(sys.argv) >= 2 else [""]
     args = mode_parser.parse_args(selected_facade)
 
-    # Normalise the entry point and pass the path to the package on.
-    sys.argv[0] = os.path.join(envprobe_root, "__envprobe")
     if 'func' in args:
         return args.func(sys.argv)
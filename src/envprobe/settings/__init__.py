@@ -14,16 +14,30 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from . import config_file, snapshot, variable_information, variable_tracking
-from .core import get_configuration_directory, get_data_directory, \
-    get_runtime_directory
+from envprobe.compatibility import lazy_package
 
 __all__ = [
     'get_configuration_directory',
     'get_data_directory',
     'get_runtime_directory',
     'config_file',
+    'information_database',
     'snapshot',
     'variable_information',
-    'variable_tracking'
+    'variable_tracking',
+    'vartype_cache'
     ]
+
+__getattr__, __dir__ = lazy_package(
+    __name__, globals(),
+    submodules=['config_file',
+                'information_database',
+                'snapshot',
+                'variable_information',
+                'variable_tracking',
+                'vartype_cache'
+                ],
+    attributes={'get_configuration_directory': 'core',
+                'get_data_directory': 'core',
+                'get_runtime_directory': 'core'
+                })
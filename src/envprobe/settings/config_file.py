@@ -14,8 +14,9 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from contextlib import AbstractContextManager
+from contextlib import AbstractContextManager, ExitStack, contextmanager
 from copy import deepcopy
+from enum import Enum
 import fcntl
 from io import UnsupportedOperation
 import json
@@ -25,12 +26,28 @@ import stat
 import string
 
 
+class LockMode(Enum):
+    """Named enumeration of the strategies :py:class:`LockedFileHandle` uses
+    to lock the file.
+    """
+
+    SIDECAR = 1
+    """The lock is taken on a separate ``.lock`` file next to the locked file,
+    which is created if it does not exist.
+    """
+    DIRECT = 2
+    """The lock is taken on the locked file itself.
+    No additional files are created or written.
+    """
+
+
 class LockedFileHandle(AbstractContextManager):
     """A file handle wrapper over :py:func:`open` that locks the underlying
     file before operation.
     """
 
-    def __init__(self, path, mode='r', blocking=True, force_exclusive=False):
+    def __init__(self, path, mode='r', blocking=True, force_exclusive=False,
+                 lock_mode=LockMode.SIDECAR, lockline=False):
         """Creates a new locked handle and opens the file.
 
         Parameters
@@ -52,12 +69,31 @@ class LockedFileHandle(AbstractContextManager):
         force_exclusive : bool, optional
             If `True`, the file will be opened and locked exclusively, no
             matter what.
+        lock_mode : LockMode, optional
+            The strategy used to lock the file.
+            Every handle of the same file must use the same strategy, as the
+            locks of different strategies do not exclude each other.
+        lockline : bool, optional
+            If `True`, a line identifying the holder and the kind of the lock
+            is written to the ``.lock`` file while the lock is held, for
+            debugging purposes.
+            Only supported with :py:attr:`LockMode.SIDECAR`.
+
+        Raises
+        ------
+        ValueError
+            If `lockline` is requested with :py:attr:`LockMode.DIRECT`.
         """
+        if lockline and lock_mode != LockMode.SIDECAR:
+            raise ValueError("Locklines are only written for sidecar locks.")
+
         self._cookie = ''.join([random.choice(string.ascii_lowercase)  # nosec
                                 for _ in range(8)]) + '/' + str(os.getpid())
         self._handle = None
         self._lockfd = None
+        self._lock_mode = lock_mode
         self._lock_path = path + ".lock"
+        self._lockline = lockline
         self._mode = mode
         self._path = path
 
@@ -118,8 +154,10 @@ class LockedFileHandle(AbstractContextManager):
             if a *non-blocking* lock was requested and the lock cannot be
             acquired.
         """
-        if self._lockfd:
+        if self._handle:
             return self._handle
+        if self._lock_mode == LockMode.DIRECT:
+            return self._acquire_direct()
 
         try:
             self._lockfd = open(self._lock_path, 'r+')
@@ -136,22 +174,65 @@ class LockedFileHandle(AbstractContextManager):
 
         try:
             self._handle = open(self._path, self._mode)
-            self._update_lockline(unlock=False)
+            if self._lockline:
+                self._update_lockline(unlock=False)
             return self._handle
         except Exception:
             self.release()
             raise
 
+    def _acquire_direct(self):
+        """Acquires the lock on the file itself."""
+        truncate = 'w' in self._mode
+        while True:
+            if truncate:
+                # Opening the file with 'w' would truncate it before the lock
+                # is acquired, so the truncation is done after locking.
+                handle = os.fdopen(
+                    os.open(self._path, os.O_RDWR | os.O_CREAT, 0o666),
+                    self._mode.replace('w', 'r').replace('+', '') + '+')
+            else:
+                handle = open(self._path, self._mode)
+
+            try:
+                fcntl.flock(handle, self._lock_type)
+                if self._is_replaced(handle):
+                    # The file was atomically replaced while waiting for the
+                    # lock, which is now held on the stale file.
+                    handle.close()
+                    continue
+                if truncate:
+                    handle.truncate(0)
+            except Exception:
+                handle.close()
+                raise
+
+            self._handle = handle
+            return self._handle
+
+    def _is_replaced(self, handle):
+        """Returns whether the path of the file no longer refers to the file
+        opened in `handle`."""
+        try:
+            current = os.stat(self._path)
+        except OSError:
+            return True
+        opened = os.fstat(handle.fileno())
+        return (current.st_dev, current.st_ino) != \
+            (opened.st_dev, opened.st_ino)
+
     def release(self):
         """Releases the lock and closes the file."""
-        if not self._lockfd:
-            return
-
         if self._handle:
-            self._update_lockline(unlock=True)
+            if self._lockline:
+                self._update_lockline(unlock=True)
+            # Closing the file flushes it and releases a direct lock.
             self._handle.close()
             self._handle = None
 
+        if not self._lockfd:
+            return
+
         fcntl.flock(self._lockfd, fcntl.LOCK_UN)
 
         self._lockfd.close()
@@ -164,58 +245,518 @@ class LockedFileHandle(AbstractContextManager):
         self.release()
 
 
-def json_extended_encoder(obj):
-    """Allows encoding additional Python types normally not supported or using
-    a different representation.
+_CONTAINERS = (dict, list, tuple)
+
+
+def _tag_tuples(obj):
+    """Returns `obj` with every :py:class:`tuple` in it replaced by its tagged
+    representation.
+    Containers which do not contain a tuple are returned as-is, not copied.
     """
-    if isinstance(obj, list):
-        return [json_extended_encoder(e) for e in obj]
-    if isinstance(obj, dict):
-        return {k: json_extended_encoder(v) for k, v in obj.items()}
-    if isinstance(obj, set):
-        return {"__TYPE__": 'S',
-                '_': list(map(json_extended_encoder, obj))
-                }
     if isinstance(obj, tuple):
+        return {"__TYPE__": 'T',
+                '_': [_tag_tuples(e) for e in obj]
+                }
+
+    tagged = None
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if isinstance(value, _CONTAINERS):
+                tagged_value = _tag_tuples(value)
+                if tagged_value is not value:
+                    if tagged is None:
+                        tagged = dict(obj)
+                    tagged[key] = tagged_value
+    elif isinstance(obj, list):
+        for index, value in enumerate(obj):
+            if isinstance(value, _CONTAINERS):
+                tagged_value = _tag_tuples(value)
+                if tagged_value is not value:
+                    if tagged is None:
+                        tagged = list(obj)
+                    tagged[index] = tagged_value
+
+    return obj if tagged is None else tagged
+
+
+class _ExtendedJSONEncoder(json.JSONEncoder):
+    """Encodes the additional Python types normally not supported by JSON, or
+    encoded with a different representation, in a tagged form.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, set):
+            return {"__TYPE__": 'S',
+                    '_': [_tag_tuples(e) for e in obj]
+                    }
+        return super().default(obj)
+
+    def iterencode(self, obj, _one_shot=False):
         # Sadly, json.JSONEncoder subclassing default() has a "bug", and
         # doesn't call default() in a subclass for types it can already encode.
         # (See http://bugs.python.org/issue30343.)
-        return {"__TYPE__": 'T',
-                '_': list(map(json_extended_encoder, obj))
-                }
+        return super().iterencode(_tag_tuples(obj), _one_shot)
 
+
+def _decode_object(obj):
+    """Decodes the tagged representation of the types encoded by
+    :py:class:`_ExtendedJSONEncoder`.
+    """
+    type_id = obj.get("__TYPE__", None)
+    if type_id == 'S':
+        return set(obj['_'])
+    if type_id == 'T':
+        return tuple(obj['_'])
     return obj
 
 
-def json_extended_decoder(obj):
-    """Allows decoding additional Python types normally not supported or using
-    a different representation.
+class Codec:
+    """The format in which the contents of a :py:class:`ConfigurationFile` are
+    serialised to the backing file.
+
+    The contents are made up of :py:class:`dict`, :py:class:`list`,
+    :py:class:`set` and :py:class:`tuple` containers, and :py:class:`str`,
+    :py:class:`int`, :py:class:`float`, :py:class:`bool` and `None` values,
+    and every codec must reproduce these types exactly.
     """
-    if isinstance(obj, list):
-        return [json_extended_decoder(e) for e in obj]
-    if isinstance(obj, dict):
-        type_id = obj.get("__TYPE__", None)
-        if type_id == 'S':
-            return set(obj['_'])
-        if type_id == 'T':
-            return tuple(obj['_'])
 
-        return {k: json_extended_decoder(v) for k, v in obj.items()}
+    def encode(self, data):
+        """Serialises `data`.
 
-    return obj
+        Returns
+        -------
+        bytes
+            The serialised form of `data`.
+        """
+        raise NotImplementedError("encode() should be overridden in subclass.")
+
+    def decode(self, raw):
+        """Deserialises `raw`, the result of a previous :py:meth:`encode`.
+
+        Raises
+        ------
+        ValueError
+            Raised if `raw` is not in a valid format.
+        """
+        raise NotImplementedError("decode() should be overridden in subclass.")
+
+
+class JSONCodec(Codec):
+    """Serialises the contents to `JSON <http://json.org>`_.
+
+    The types not supported by JSON are encoded as tagged objects while the
+    document is generated, and decoded while it is parsed, without building an
+    intermediate copy of the data.
+    """
+
+    def __init__(self, compact=False):
+        """
+        Parameters
+        ----------
+        compact : bool, optional
+            If `False`, the document is indented and its keys are sorted, so
+            it is easy to read and edit by humans.
+            If `True`, the document is written without whitespace, in the
+            order of the keys in memory, which is considerably faster, but
+            is only suitable for files that are not meant to be read by a
+            human.
+        """
+        if compact:
+            self._encoder = _ExtendedJSONEncoder(separators=(',', ':'))
+        else:
+            self._encoder = _ExtendedJSONEncoder(indent=2, sort_keys=True)
+
+    def encode(self, data):
+        return self._encoder.encode(data).encode("utf-8")
+
+    def decode(self, raw):
+        return json.loads(raw, object_hook=_decode_object)
+
+
+json_codec = JSONCodec()
+"""The default :py:class:`Codec` of configuration files, which writes
+human-readable JSON."""
+
+compact_json_codec = JSONCodec(compact=True)
+"""The :py:class:`Codec` for the configuration files only ever read and written
+by Envprobe itself."""
+
+
+class _ChangeFlag:
+    """The flag shared by the containers of a :py:class:`ConfigurationFile`
+    which is raised when any of them is modified."""
+
+    __slots__ = ("dirty",)
+
+    def __init__(self):
+        self.dirty = False
+
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _track(value, flag):
+    """Returns a copy of `value` in which every mutable container is replaced
+    by its tracked counterpart that raises `flag` when modified.
+    """
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, dict):
+        return _TrackedDict(value, flag)
+    if isinstance(value, list):
+        return _TrackedList(value, flag)
+    if isinstance(value, set):
+        return _TrackedSet(value, flag)
+    if isinstance(value, tuple):
+        return tuple(_track(e, flag) for e in value)
+    return value
+
+
+def _untrack(value, memo):
+    """Returns a deep copy of `value` in which every tracked container is
+    replaced by the builtin it extends."""
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, dict):
+        return {k: _untrack(v, memo) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_untrack(e, memo) for e in value]
+    if isinstance(value, set):
+        return set(value)
+    if isinstance(value, tuple):
+        return tuple(_untrack(e, memo) for e in value)
+    return deepcopy(value, memo)
+
+
+class _Tracked:
+    """Makes the copies and the pickled form of the tracked containers the
+    builtins they extend, without a change flag, as the copies are no longer
+    part of the :py:class:`ConfigurationFile`."""
+
+    __slots__ = ()
+
+    def __copy__(self):
+        return self._builtin(self)
+
+    def __deepcopy__(self, memo):
+        return _untrack(self, memo)
+
+    def __reduce_ex__(self, protocol):
+        return self._builtin, (self._builtin(self),)
+
+
+class _TrackedDict(_Tracked, dict):
+    """A :py:class:`dict` that raises its change flag when modified."""
+
+    __slots__ = ("_flag",)
+    _builtin = dict
+
+    def __init__(self, data, flag):
+        super().__init__({k: _track(v, flag) for k, v in data.items()})
+        self._flag = flag
+
+    def __setitem__(self, key, value):
+        if key not in self or dict.__getitem__(self, key) != value:
+            self._flag.dirty = True
+        super().__setitem__(key, _track(value, self._flag))
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._flag.dirty = True
+
+    def pop(self, key, *default):
+        if key in self:
+            self._flag.dirty = True
+        return super().pop(key, *default)
+
+    def popitem(self):
+        item = super().popitem()
+        self._flag.dirty = True
+        return item
+
+    def clear(self):
+        if self:
+            self._flag.dirty = True
+        super().clear()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+
+class _TrackedList(_Tracked, list):
+    """A :py:class:`list` that raises its change flag when modified."""
+
+    __slots__ = ("_flag",)
+    _builtin = list
+
+    def __init__(self, data, flag):
+        super().__init__([_track(e, flag) for e in data])
+        self._flag = flag
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = [_track(e, self._flag) for e in value]
+        else:
+            value = _track(value, self._flag)
+        if list.__getitem__(self, index) != value:
+            self._flag.dirty = True
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._flag.dirty = True
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, count):
+        if self and count != 1:
+            self._flag.dirty = True
+        return super().__imul__(count)
+
+    def append(self, value):
+        super().append(_track(value, self._flag))
+        self._flag.dirty = True
+
+    def extend(self, values):
+        length = len(self)
+        super().extend(_track(e, self._flag) for e in values)
+        if len(self) != length:
+            self._flag.dirty = True
+
+    def insert(self, index, value):
+        super().insert(index, _track(value, self._flag))
+        self._flag.dirty = True
+
+    def pop(self, *index):
+        value = super().pop(*index)
+        self._flag.dirty = True
+        return value
+
+    def remove(self, value):
+        super().remove(value)
+        self._flag.dirty = True
+
+    def clear(self):
+        if self:
+            self._flag.dirty = True
+        super().clear()
+
+    def reverse(self):
+        if len(self) > 1:
+            self._flag.dirty = True
+        super().reverse()
+
+    def sort(self, *args, **kwargs):
+        if len(self) > 1:
+            self._flag.dirty = True
+        super().sort(*args, **kwargs)
+
+
+class _TrackedSet(_Tracked, set):
+    """A :py:class:`set` that raises its change flag when modified."""
+
+    __slots__ = ("_flag",)
+    _builtin = set
+
+    def __init__(self, data, flag):
+        super().__init__(_track(e, flag) for e in data)
+        self._flag = flag
+
+    def _changing(self, method, *args):
+        """Calls `method` and raises the flag if the size of the set
+        changed."""
+        length = len(self)
+        result = method(self, *args)
+        if len(self) != length:
+            self._flag.dirty = True
+        return result
+
+    def add(self, element):
+        self._changing(set.add, element)
+
+    def discard(self, element):
+        self._changing(set.discard, element)
+
+    def remove(self, element):
+        self._changing(set.remove, element)
+
+    def pop(self):
+        return self._changing(set.pop)
+
+    def clear(self):
+        self._changing(set.clear)
+
+    def update(self, *others):
+        self._changing(set.update, *others)
+
+    def difference_update(self, *others):
+        self._changing(set.difference_update, *others)
+
+    def intersection_update(self, *others):
+        self._changing(set.intersection_update, *others)
+
+    def symmetric_difference_update(self, other):
+        other = set(other)
+        if other:
+            self._flag.dirty = True
+        super().symmetric_difference_update(other)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+
+_MISSING = object()
+"""Marks a key that was not present in a :py:class:`ConfigurationFile` before
+it was first modified."""
+
+
+class ReadCache:
+    """An in-memory cache of the parsed contents of configuration files,
+    keyed by the files' paths.
+
+    Every entry is stamped with the *stat signature* (device, inode,
+    modification time and size) of the file at the time it was read.
+    An entry is only served if the file's current signature matches, so
+    changes made to the file, even by other processes, invalidate the cache
+    automatically.
+    """
+
+    def __init__(self):
+        self._entries = dict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def signature(stat_result):
+        """Returns the signature to compare from the result of an
+        :py:func:`os.stat` call.
+        """
+        return (stat_result.st_dev, stat_result.st_ino,
+                stat_result.st_mtime_ns, stat_result.st_size)
+
+    def get(self, path):
+        """Returns the cached contents of the file at `path`, if the file has
+        not changed since the contents were cached.
+
+        Returns
+        -------
+        data : dict
+            The cached, decoded contents of the file.
+            This object **must not** be modified by the client code.
+        None
+            If the file is not cached, or it has changed since.
+        """
+        entry = self._entries.get(path, None)
+        if entry is not None:
+            try:
+                if entry[0] == self.signature(os.stat(path)):
+                    self.hits += 1
+                    return entry[1]
+            except OSError:
+                pass
+            del self._entries[path]
+
+        self.misses += 1
+        return None
+
+    def put(self, path, signature, data):
+        """Caches `data` as the contents of `path` with the given
+        `signature`.
+        """
+        self._entries[path] = (signature, data)
+
+    def invalidate(self, path):
+        """Removes the cached contents of `path`, if any."""
+        self._entries.pop(path, None)
+
+    def clear(self):
+        """Empties the cache and resets the statistics."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """The ratio of cache hits to all lookups, or ``0.0`` if no lookups
+        were made.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+read_cache = ReadCache()
+"""The :py:class:`ReadCache` used by every **read-only**
+:py:class:`ConfigurationFile` in the interpreter.
+"""
+
+
+@contextmanager
+def transaction(*configurations):
+    """Returns a context in which every one of the *context-capable dicts* in
+    `configurations` is entered once, as a transaction if it is supported, see
+    :py:meth:`ConfigurationFile.transaction`.
+    `None` elements are ignored.
+    """
+    with ExitStack() as stack:
+        for configuration in configurations:
+            if configuration is None:
+                continue
+            begin = getattr(configuration, "transaction", None)
+            stack.enter_context(begin() if begin else configuration)
+        yield
 
 
 class ConfigurationFile(AbstractContextManager):
-    """A glorified :py:class:`dict` that is backed into a JSON file and locked
-    on access.
+    """A glorified :py:class:`dict` that is backed into a file (by default, in
+    JSON format) and locked on access.
 
     This class embeds file locking logic to ensure atomic access to the backing
     file is given.
+    The contents are saved to a temporary file which then atomically replaces
+    the backing file, so reading the file never sees a partially written
+    state, and thus reading does not need to lock the file.
+    Read-only instances are served from the :py:data:`read_cache` if the
+    backing file did not change since it was last read, in which case the
+    file is not even opened.
+
+    Modifications are tracked as they are made, both to the top-level keys
+    and inside the nested containers, so :py:attr:`changed` does not need to
+    compare the contents against a copy of the data as it was loaded.
+    Because of this, values are stored as (tracked) copies: modifying an
+    object *after* it was assigned into the configuration is not reflected,
+    the stored value must be retrieved and modified instead.
     """
 
     def __init__(self, file_path, default_content=None, read_only=False,
                  file_mode=stat.S_IRUSR | stat.S_IWUSR,
-                 directory_mode=stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR):
+                 directory_mode=stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR,
+                 lock_mode=LockMode.SIDECAR, lockline=False, fsync=False,
+                 codec=json_codec):
         """Initialise a configuration file.
 
         Parameters
@@ -240,22 +781,59 @@ class ConfigurationFile(AbstractContextManager):
             exist, it will be created with the mode flags given.
             Defaults to *owner read, write, list*, no permission for group
             and world.
+        lock_mode : LockMode, optional
+            The strategy used to lock the backing file, see
+            :py:class:`LockedFileHandle`.
+            :py:attr:`LockMode.DIRECT` is faster, as it does not need a
+            separate lock file, but every process accessing the same file must
+            use the same strategy.
+        lockline : bool, optional
+            Whether to write the debugging information of the lock holders to
+            the lock file, see :py:class:`LockedFileHandle`.
+        fsync : bool, optional
+            Whether to flush the saved contents to the storage device before
+            the backing file is replaced, ensuring that the file is intact
+            even after a system crash.
+        codec : Codec, optional
+            The format of the backing file.
+            Defaults to human-readable JSON, use
+            :py:data:`compact_json_codec` for files that are never meant to
+            be read or edited by humans.
         """
-        self._data = deepcopy(default_content if default_content else dict())
+        self._codec = codec
+        self._defaults = default_content or dict()
+        self._depth = 0
         self._dmode = directory_mode
+        self._flag = _ChangeFlag()
         self._fmode = file_mode
+        self._fsync = fsync
         self._in_context = False
-        self._last_loaded_data = deepcopy(self._data)
+        self._lock_mode = lock_mode
+        self._lockline = lockline
         self._read_only = read_only
         self._path = file_path
 
+        self._reset_data()
+
+    def _reset_data(self):
+        """Sets the data in memory to the default contents."""
+        self._data = {k: _track(v, self._flag)
+                      for k, v in self._defaults.items()}
+        self._reset_changes()
+
+    def _reset_changes(self):
+        """Marks the data in memory as unchanged."""
+        self._flag.dirty = False
+        # The original values of the top-level keys modified since.
+        self._modified = dict()
+
     def load(self):
         """Load the contents of the backing file into memory.
 
         Warning
         -------
-        After the file's contents are loaded into memory, the lock is
-        **released**, meaning that subsequent changes in the file might be
+        The file is not locked while and after its contents are loaded into
+        memory, meaning that subsequent changes in the file might be
         overwritten if :py:func:`save` is called with the current contents!
 
         If you intend to *change* the configuration and save it, use
@@ -265,25 +843,69 @@ class ConfigurationFile(AbstractContextManager):
             raise EnvironmentError("Do not call load() if a context (with) is "
                                    "already acquired!")
 
+        self._load_unlocked()
+
+    def _load_unlocked(self):
+        """Load the contents of the backing file, or the :py:data:`read_cache`,
+        without locking the file.
+        """
+        if self._load_cached_data():
+            return
+
         try:
-            with LockedFileHandle(self._path, 'r') as f:
-                try:
-                    self._load_data(f)
-                except Exception:
-                    self._data = deepcopy(self._last_loaded_data)
-                    raise
+            # The file is always replaced atomically, reading needs no lock.
+            with open(self._path, 'rb') as f:
+                self._load_data(f)
         except OSError:
             # Ignore, the class has been constructed with default data anyways.
             pass
 
+    def _lock(self, mode):
+        """Creates the :py:class:`LockedFileHandle` of the backing file with
+        the configured locking strategy."""
+        return LockedFileHandle(self._path, mode,
+                                lock_mode=self._lock_mode,
+                                lockline=self._lockline)
+
+    def _load_cached_data(self):
+        """Load the data from the :py:data:`read_cache`, if the configuration
+        is read-only and the cached contents are still valid.
+
+        Returns
+        -------
+        bool
+            Whether the data was loaded from the cache.
+        """
+        if not self._read_only:
+            return False
+
+        data = read_cache.get(os.path.abspath(self._path))
+        if data is None:
+            return False
+
+        self._merge_data(data)
+        return True
+
     def _load_data(self, fd):
         """Actually load the data from the `fd` file."""
         fd.seek(0)
-        data = json.load(fd)
-        data = json_extended_decoder(data)
-        self._data.update(data)  # Merge the changes with the defaults.
+        data = self._codec.decode(fd.read())
 
-        self._last_loaded_data = deepcopy(self._data)
+        if self._read_only:
+            read_cache.put(os.path.abspath(self._path),
+                           ReadCache.signature(os.fstat(fd.fileno())),
+                           data)
+
+        self._merge_data(data)
+
+    def _merge_data(self, data):
+        """Merge the loaded `data` with the defaults, as the unchanged contents
+        of the configuration.
+        """
+        # Tracking copies the data, so the cached object is never modified.
+        for key, value in data.items():
+            self._data[key] = _track(value, self._flag)
+        self._reset_changes()
 
     def save(self):
         """Save the contents of memory to the backing file.
@@ -295,7 +917,7 @@ class ConfigurationFile(AbstractContextManager):
 
         Warning
         -------
-        The file's contents are **overwritten** by this method after acquiring
+        The file's contents are **replaced** by this method after acquiring
         the lock, destroying potential changes that might have been written
         before.
         The lock is released afterwards immediately.
@@ -314,14 +936,8 @@ class ConfigurationFile(AbstractContextManager):
             return
 
         self._try_create_file()
-        try:
-            with LockedFileHandle(self._path, 'w') as f:
-                try:
-                    self._save_data(f)
-                except Exception:
-                    raise
-        except OSError:
-            raise
+        with self._lock('rb+'):
+            self._save_data()
 
     def _try_create_file(self):
         """Tries to create the location where the backing file is.
@@ -332,32 +948,78 @@ class ConfigurationFile(AbstractContextManager):
             Whether the file originally existed, in which case this method did
             nothing.
         """
-        file_exists = os.path.isfile(self._path)
-        if not file_exists:
-            dir_path = os.path.dirname(self._path)
-            if dir_path and not os.path.isdir(dir_path):
-                os.makedirs(dir_path, self._dmode)
-            with open(self._path, 'w') as f:
-                json.dump(dict(), f)
-            os.chmod(self._path, self._fmode)
-        return file_exists
-
-    def _save_data(self, fd):
-        """Actually save the data to the `fd` file."""
-        fd.seek(0)
-        fd.truncate(0)
+        if os.path.isfile(self._path):
+            return True
+
+        dir_path = os.path.dirname(self._path)
+        if dir_path and not os.path.isdir(dir_path):
+            os.makedirs(dir_path, self._dmode, exist_ok=True)
+
+        # The empty file is created under a temporary name and linked into
+        # place, so a reader never sees it without its contents, and a file
+        # created by someone else in the meantime is not overwritten.
+        temp_path = self._write_temporary(dict(), self._fmode)
+        try:
+            os.link(temp_path, self._path)
+        except FileExistsError:
+            return True
+        finally:
+            os.remove(temp_path)
+        return False
+
+    def _write_temporary(self, data, mode):
+        """Writes `data` to a new temporary file next to the backing file.
+
+        Returns
+        -------
+        str
+            The path of the temporary file.
+        """
+        import tempfile
+
+        fd, temp_path = tempfile.mkstemp(
+            prefix=os.path.basename(self._path) + '.', suffix=".tmp",
+            dir=os.path.dirname(os.path.realpath(self._path)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._codec.encode(data))
+                if self._fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.chmod(temp_path, mode)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return temp_path
+
+    def _save_data(self):
+        """Actually save the data by replacing the backing file."""
+        read_cache.invalidate(os.path.abspath(self._path))
 
+        # If the backing file is a symbolic link, the file it points to is
+        # replaced, and not the link itself.
+        path = os.path.realpath(self._path)
         try:
-            data_to_dump = json_extended_encoder(self._data)
-            json.dump(data_to_dump, fd, indent=2, sort_keys=True)
-            self._last_loaded_data = deepcopy(self._data)
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            mode = self._fmode
+
+        temp_path = self._write_temporary(self._data, mode)
+        try:
+            os.replace(temp_path, path)
         except Exception:
-            # Restore the last good state in the file.
-            fd.seek(0)
-            fd.truncate(0)
-            json.dump(self._last_loaded_data, fd, indent=2, sort_keys=True)
+            os.remove(temp_path)
             raise
 
+        if self._fsync:
+            dir_fd = os.open(os.path.dirname(path), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+        self._reset_changes()
+
     def __enter__(self):
         """Acquires the backing file, read its contents, and return a context
         where the `ConfigurationFile` can be used.
@@ -372,48 +1034,96 @@ class ConfigurationFile(AbstractContextManager):
         This method should be used instead of :py:func:`load` and
         :py:func:`save` if a changing access to the contents is expected,
         as the context keeps the lock on the file active throughout.
+
+        The contexts are reentrant: entering the context again while it is
+        active neither loads the file nor locks it again, and the changes are
+        only saved when the outermost context exits.
         """
-        self._try_create_file()
+        if self._depth:
+            self._depth += 1
+            return self
+
+        if self._read_only:
+            # Reading needs no lock, as the file is replaced atomically.
+            self._load_unlocked()
+            self._in_context = True
+            self._depth = 1
+            return self
 
-        # TODO: Allow multiple enter calls, and make sure the lock is only
-        # open once.
+        self._try_create_file()
 
-        self._in_context = LockedFileHandle(self._path,
-                                            'r' if self._read_only else 'r+')
-        handle = self._in_context.acquire()
+        lock = self._lock('rb+')
+        handle = lock.acquire()
         try:
             self._load_data(handle)
         except Exception:
-            self._in_context.release()
+            lock.release()
             raise
+        self._in_context = lock
+        self._depth = 1
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
         """Saves the changes to the current file (if not read-only) and
-        releases the lock.
+        releases the lock, if the outermost context is exited.
         """
+        self._depth -= 1
+        if self._depth:
+            return
+
         if not self._read_only and self._data and self.changed:
-            handle = self._in_context.acquire()
             try:
-                self._save_data(handle)
+                self._save_data()
             except Exception:
                 self._in_context.release()
                 self._in_context = False
                 raise
-        elif self._read_only and not self._data and not self.changed:
-            # The saving would've happened to an empty file which got created
-            # by __enter__(), so delete it instead.
-            os.remove(self._path)
 
-        self._in_context.release()
+        if isinstance(self._in_context, LockedFileHandle):
+            self._in_context.release()
         self._in_context = False
 
+    @contextmanager
+    def transaction(self):
+        """Returns a context in which a batch of reads and writes is executed
+        with the file loaded and locked only once.
+
+        The changes are saved when the outermost context exits, but only if
+        the transaction did not raise an exception.
+        Otherwise, the changes are discarded, and the data in memory is
+        reloaded from the backing file.
+
+        Note
+        ----
+        Discarding the changes of a transaction also discards the unsaved
+        changes made in the enclosing contexts, if the transaction is nested.
+        """
+        with self:
+            try:
+                yield self
+            except BaseException:
+                self._reset_data()
+                if isinstance(self._in_context, LockedFileHandle):
+                    self._load_data(self._in_context.acquire())
+                else:
+                    self._load_unlocked()
+                raise
+
     @property
     def changed(self):
         """Returns whether the data in memory changed since the last save
         or load.
+
+        Note
+        ----
+        A top-level key that is changed and then set back to its original
+        value is not considered a change, but modifying the contents of a
+        nested container is, even if the modification is undone later.
         """
-        return self._data != self._last_loaded_data
+        if self._flag.dirty:
+            return True
+        return any(self._data.get(key, _MISSING) != original
+                   for key, original in self._modified.items())
 
     def __len__(self):
         """Returns the number of keys in memory."""
@@ -441,10 +1151,14 @@ class ConfigurationFile(AbstractContextManager):
         """Sets the element for `key` to `value`."""
         if self._read_only:
             raise PermissionError("Read-only configuration file.")
-        self._data[key] = value
+        if key not in self._modified:
+            self._modified[key] = self._data.get(key, _MISSING)
+        self._data[key] = _track(value, self._flag)
 
     def __delitem__(self, key):
         """Deletes the `key`."""
         if self._read_only:
             raise PermissionError("Read-only configuration file.")
+        if key in self._data and key not in self._modified:
+            self._modified[key] = self._data[key]
         del self._data[key]
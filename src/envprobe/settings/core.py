@@ -15,7 +15,6 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import os
-import tempfile
 
 
 def get_configuration_directory():
@@ -62,6 +61,7 @@ def get_runtime_directory(user_id):
         # is user-specific.
         directory = os.path.join(rootdir, "envprobe")
     except (KeyError, OSError):
+        import tempfile
         rootdir = tempfile.gettempdir()
         # Use 'envprobe-USERID' as top-level directory because the global
         # temporary directory is not user-specific.
@@ -0,0 +1,267 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Implements an indexed database backend for storing the additional information
+about variables, as an alternative to the per-letter JSON files.
+"""
+from collections.abc import MutableMapping
+from contextlib import AbstractContextManager
+import os
+import stat
+
+from envprobe.settings.config_file import ConfigurationFile
+from envprobe.settings.variable_information import K_VARIABLES, \
+    K_VARIABLE_CONFIGURATION_SOURCE, K_VARIABLE_DESCRIPTION, \
+    K_VARIABLE_TYPE, VariableInformation
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS variables (
+    name TEXT NOT NULL PRIMARY KEY,
+    type TEXT,
+    description TEXT,
+    source TEXT
+) WITHOUT ROWID;
+"""
+
+
+class VariableTable(MutableMapping):
+    """A mapping of variable names to their information records that is
+    backed by the ``variables`` table of an open database connection.
+    """
+
+    def __init__(self, connection, read_only=False):
+        self._connection = connection
+        self._read_only = read_only
+
+    def __len__(self):
+        """Returns the number of variables in the table."""
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM variables").fetchone()[0]
+
+    def __iter__(self):
+        """Returns an iterator over the names of the variables in the table."""
+        return iter(self.keys())
+
+    def keys(self):
+        """Returns the names of the variables in the table.
+
+        Note
+        ----
+        Unlike :py:meth:`dict.keys`, the result is not a view, and can be used
+        after the database has been closed.
+        """
+        return [row[0] for row in self._connection.execute(
+            "SELECT name FROM variables ORDER BY name")]
+
+    def __contains__(self, variable_name):
+        """Returns if there is a record for `variable_name`."""
+        return self._connection.execute(
+            "SELECT 1 FROM variables WHERE name = ?",
+            (variable_name,)).fetchone() is not None
+
+    def __getitem__(self, variable_name):
+        """Retrieves the information record for `variable_name`.
+
+        The fields that are not set (``NULL``) are not present in the record,
+        as if the record was read from a JSON file that did not contain them.
+        """
+        row = self._connection.execute(
+            "SELECT type, description, source FROM variables WHERE name = ?",
+            (variable_name,)).fetchone()
+        if row is None:
+            raise KeyError(variable_name)
+        return {key: value for key, value in
+                zip([K_VARIABLE_TYPE, K_VARIABLE_DESCRIPTION,
+                     K_VARIABLE_CONFIGURATION_SOURCE], row)
+                if value is not None}
+
+    def __setitem__(self, variable_name, record):
+        """Sets the information record for `variable_name` to `record`."""
+        if self._read_only:
+            raise PermissionError("Read-only configuration database.")
+        self._connection.execute(
+            "INSERT OR REPLACE INTO variables (name, type, description, "
+            "source) VALUES (?, ?, ?, ?)",
+            (variable_name,
+             record.get(K_VARIABLE_TYPE),
+             record.get(K_VARIABLE_DESCRIPTION),
+             record.get(K_VARIABLE_CONFIGURATION_SOURCE)))
+
+    def __delitem__(self, variable_name):
+        """Deletes the information record for `variable_name`."""
+        if self._read_only:
+            raise PermissionError("Read-only configuration database.")
+        cursor = self._connection.execute(
+            "DELETE FROM variables WHERE name = ?", (variable_name,))
+        if not cursor.rowcount:
+            raise KeyError(variable_name)
+
+
+class InformationDatabase(AbstractContextManager):
+    """A `SQLite <http://sqlite.org>`_ database file which stores the
+    information about variables in a single table, indexed by the variable's
+    name.
+
+    The instances are *context-capable dicts* which expose the table under the
+    :py:data:`envprobe.settings.variable_information.K_VARIABLES` key, and
+    thus can be used as the backend of a
+    :py:class:`envprobe.settings.variable_information.VariableInformation`.
+    Looking up a variable only reads the record of the variable, and not the
+    records of every other variable that would be in the same JSON file.
+    """
+
+    def __init__(self, file_path, read_only=False,
+                 file_mode=stat.S_IRUSR | stat.S_IWUSR,
+                 directory_mode=stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR):
+        """Initialise a database handle.
+
+        This instantiation is cheap, the database is only opened when the
+        context is entered.
+
+        Parameters
+        ----------
+        file_path : str
+            The path of the database file.
+        read_only : bool, optional
+            Whether the database is opened read-only.
+            A read-only database is never created, and if the backing file
+            does not exist, the database is considered empty.
+        file_mode : int, optional
+            If the database file does not exist, it will be created with the
+            mode flags given.
+        directory_mode : int, optional
+            If the directory where the database file should be put does not
+            exist, it will be created with the mode flags given.
+        """
+        self._connection = None
+        self._dmode = directory_mode
+        self._fmode = file_mode
+        self._path = file_path
+        self._read_only = read_only
+
+    def _connect(self):
+        """Opens the connection to the database file, creating it and the
+        table, if needed."""
+        # Importing the SQLite module is comparatively expensive, and most
+        # users never migrate, so only pay the cost when a database is opened.
+        import sqlite3
+
+        if self._read_only:
+            return sqlite3.connect(
+                "file:{}?mode=ro".format(
+                    os.path.abspath(self._path).replace('%', "%25")
+                    .replace('?', "%3f").replace('#', "%23")),
+                uri=True)
+
+        file_exists = os.path.isfile(self._path)
+        if not file_exists:
+            dir_path = os.path.dirname(self._path)
+            if dir_path and not os.path.isdir(dir_path):
+                os.makedirs(dir_path, self._dmode)
+
+        connection = sqlite3.connect(self._path)
+        try:
+            connection.executescript(_SCHEMA)
+        except sqlite3.Error:
+            connection.close()
+            raise
+        if not file_exists:
+            os.chmod(self._path, self._fmode)
+        return connection
+
+    def __enter__(self):
+        """Opens the database and returns the mapping which holds the
+        variables' information.
+
+        Returns
+        -------
+        dict
+            A mapping that contains the :py:class:`VariableTable` under the
+            ``K_VARIABLES`` key.
+        """
+        if self._read_only and not os.path.isfile(self._path):
+            return {K_VARIABLES: dict()}
+
+        self._connection = self._connect()
+        return {K_VARIABLES: VariableTable(self._connection,
+                                           self._read_only)}
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Commits the changes (if not read-only and no exception happened) and
+        closes the database.
+        """
+        if not self._connection:
+            return
+
+        try:
+            if not self._read_only:
+                if exc_type is None:
+                    self._connection.commit()
+                else:
+                    self._connection.rollback()
+        finally:
+            self._connection.close()
+            self._connection = None
+
+
+def migrate_information_files(directory, database_path):
+    """Move the variable information from the per-letter JSON files in
+    `directory` into the database at `database_path`.
+
+    The records are inserted in a single transaction, and the JSON files are
+    only removed after it was committed.
+    If the records of a variable are already in the database, they are
+    overwritten.
+
+    Returns
+    -------
+    int
+        The number of variable records migrated.
+    """
+    try:
+        files = sorted(file for file in os.listdir(directory)
+                       if file.endswith(".json"))
+    except OSError:
+        return 0
+
+    count = 0
+    with InformationDatabase(database_path, read_only=False) as database:
+        variables = database[K_VARIABLES]
+        for file in files:
+            config = ConfigurationFile(os.path.join(directory, file),
+                                       VariableInformation.config_schema,
+                                       read_only=True)
+            config.load()
+            for variable_name, record in config[K_VARIABLES].items():
+                variables[variable_name] = record
+                count += 1
+
+    for file in files:
+        for path in [os.path.join(directory, file),
+                     os.path.join(directory, file + ".lock")]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    try:
+        os.rmdir(directory)
+    except OSError:
+        # The directory contains some other files.
+        pass
+
+    return count
@@ -18,6 +18,7 @@ from copy import deepcopy
 import os
 
 from envprobe.compatibility import nullcontext
+from envprobe.settings.config_file import transaction
 
 
 K_VARIABLES = 'variables'
@@ -92,6 +93,13 @@ class Snapshot:
         self._config = configuration if configuration is not None \
             else nullcontext(deepcopy(self.config_schema))
 
+    def transaction(self):
+        """Returns a context in which the snapshot is loaded (and locked) only
+        once, and the changes are saved together at its end, see
+        :py:meth:`envprobe.settings.config_file.ConfigurationFile.transaction`.
+        """
+        return transaction(self._config)
+
     def keys(self):
         """Returns the variable names that are affected by the snapshot."""
         with self._config as conf:
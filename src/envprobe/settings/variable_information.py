@@ -50,6 +50,18 @@ def get_information_file_name(variable_name):
     return variable_name[0] + ".json"
 
 
+def get_information_database_name():
+    """Returns the expected name of the indexed database which stores the
+    information for all variables, if the per-letter files were migrated.
+
+    Warning
+    -------
+    This method only returns the **file name** for the database, not its
+    location or full path.
+    """
+    return "variables.sqlite"
+
+
 class VariableInformation:
     """Represents a persisted configuration file of the user which stores
     additional information about environment variables.
@@ -76,6 +88,13 @@ class VariableInformation:
         with self._config as conf:
             return conf[K_VARIABLES].keys()
 
+    def items(self):
+        """Returns the variable names that have a configuration, together with
+        the configuration mapping of each.
+        """
+        with self._config as conf:
+            return list(conf[K_VARIABLES].items())
+
     def __getitem__(self, variable_name):
         """Retrieve the configuration for the given variable.
 
@@ -91,6 +110,22 @@ class VariableInformation:
                 return conf[K_VARIABLES][variable_name]
             return None
 
+    def get_many(self, variable_names):
+        """Retrieve the configuration for multiple variables, accessing the
+        underlying storage only once.
+
+        Returns
+        -------
+        dict(str, dict)
+            The configuration mapping associated with each variable, as
+            returned by :py:meth:`__getitem__`.
+        """
+        with self._config as conf:
+            variables = conf[K_VARIABLES]
+            return {variable_name: variables[variable_name]
+                    if variable_name in variables else None
+                    for variable_name in variable_names}
+
     def set(self, variable_name, configuration, source):
         """Sets the stored configuration of the given variable to a new value.
 
@@ -107,10 +142,35 @@ class VariableInformation:
         """
         with self._config as conf:
             conf[K_VARIABLES][variable_name] = \
-                {K_VARIABLE_DESCRIPTION: configuration.description,
-                 K_VARIABLE_TYPE: configuration.type,
-                 K_VARIABLE_CONFIGURATION_SOURCE: source
-                 }
+                self._to_record(configuration, source)
+
+    def bulk_update(self, records=None, deleted=None):
+        """Sets and removes the stored configuration of multiple variables,
+        accessing the underlying storage only once.
+
+        Parameters
+        ----------
+        records : iterable(tuple), optional
+            The name of the variable, the configuration and the identifier of
+            the source, for each variable to set, as in :py:meth:`set`.
+        deleted : iterable(str), optional
+            The names of the variables to remove.
+        """
+        with self._config as conf:
+            for variable_name, configuration, source in records or list():
+                conf[K_VARIABLES][variable_name] = \
+                    self._to_record(configuration, source)
+            for variable_name in deleted or list():
+                if variable_name in conf[K_VARIABLES]:
+                    del conf[K_VARIABLES][variable_name]
+
+    @staticmethod
+    def _to_record(configuration, source):
+        """Maps the configuration to the persisted representation."""
+        return {K_VARIABLE_DESCRIPTION: configuration.description,
+                K_VARIABLE_TYPE: configuration.type,
+                K_VARIABLE_CONFIGURATION_SOURCE: source
+                }
 
     def __delitem__(self, variable_name):
         """Removes the configuration associated with the given variable.
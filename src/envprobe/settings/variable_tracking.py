@@ -17,6 +17,7 @@
 from copy import deepcopy
 
 from envprobe.compatibility import nullcontext
+from envprobe.settings.config_file import transaction
 
 
 K_DEFAULT_SETTING = 'default'
@@ -73,6 +74,14 @@ class VariableTracking:
             if local_configuration is not None \
             else nullcontext(deepcopy(self.config_schema_local))
 
+    def transaction(self):
+        """Returns a context in which both the global and the local
+        configuration is loaded (and locked) only once, and the changes are
+        saved together at its end, see
+        :py:meth:`envprobe.settings.config_file.ConfigurationFile.transaction`.
+        """
+        return transaction(self._global, self._local)
+
     @property
     def global_tracking(self):
         """Returns `True` if the default behaviour for tracking is `ON` in the
@@ -202,6 +211,35 @@ class VariableTracking:
         with self._global as conf:
             return self._config(variable_name, conf)
 
+    def _resolve(self, variable, local, global_):
+        """Resolves the tracking status of `variable` with the `local` and
+        `global_` configurations already opened.
+        """
+        # Explicit local track/ignore.
+        if self._tracked(variable, local):
+            return True
+        elif self._ignored(variable, local):
+            return False
+
+        # Explicit global track/ignore.
+        if self._tracked(variable, global_):
+            return True
+        if self._ignored(variable, global_):
+            return False
+
+        # Default local behaviour.
+        local_def = local.get(K_DEFAULT_SETTING, None)
+        if local_def is not None:
+            return local_def
+
+        # Default global behaviour.
+        global_def = global_.get(K_DEFAULT_SETTING, None)
+        if global_def is not None:
+            return global_def
+
+        # Fallback to always track if nothing matched prior.
+        return True
+
     def is_tracked(self, *variables):
         """Resolves whether the `variable_name` are tracked according to the
         loaded configuration.
@@ -239,35 +277,36 @@ class VariableTracking:
             variables = variables[0]
 
         with self._local as loc, self._global as glo:
-            def _handle_single_variable(variable):
-                # Explicit local track/ignore.
-                if self._tracked(variable, loc):
-                    return True
-                elif self._ignored(variable, loc):
-                    return False
-
-                # Explicit global track/ignore.
-                if self._tracked(variable, glo):
-                    return True
-                if self._ignored(variable, glo):
-                    return False
-
-                # Default local behaviour.
-                local_def = loc.get("default", None)
-                if local_def is not None:
-                    return local_def
-
-                # Default global behaviour.
-                global_def = glo.get("default", None)
-                if global_def is not None:
-                    return global_def
-
-                # Fallback to always track if nothing matched prior.
-                return True
-
-            results = list(map(_handle_single_variable, variables))
+            results = [self._resolve(variable, loc, glo)
+                       for variable in variables]
 
         if len(results) == 1:
             results = results[0]
 
         return results
+
+    def tracked_subset(self, variables):
+        """Resolves which of the `variables` are tracked according to the
+        loaded configuration.
+
+        The resolution for each variable is done the same way as in
+        :py:meth:`is_tracked`, but the configuration files are only accessed
+        once for the whole batch.
+
+        Parameters
+        ----------
+        variables : iterable(str)
+            The variable names to check.
+
+        Returns
+        -------
+        set(str)
+            The names from `variables` which should be considered tracked.
+        """
+        variables = set(variables)
+        if not variables:
+            return set()
+
+        with self._local as loc, self._global as glo:
+            return {variable for variable in variables
+                    if self._resolve(variable, loc, glo)}
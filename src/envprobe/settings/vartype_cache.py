@@ -0,0 +1,198 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Implements a persistent cache of the types the type heuristics resolved the
+variables to, so that the configuration files need not be consulted on every
+execution.
+"""
+import json
+import os
+import stat
+
+
+def get_vartype_cache_file_name():
+    """Returns the expected default name of the type resolution cache.
+
+    Warning
+    -------
+    This method only returns the **file name** for the cache, not its location
+    or full path.
+    """
+    return "vartypes.json"
+
+
+class VartypeCache:
+    """A mapping of variable names to the result of resolving their types,
+    persisted to a JSON file.
+
+    The cache is stamped with the state (modification time and size) of the
+    *sources*, the files and directories the resolution depends on.
+    If any of the sources change, the previously cached results are discarded
+    when the cache is loaded.
+    """
+
+    def __init__(self, file_path, sources=None,
+                 file_mode=stat.S_IRUSR | stat.S_IWUSR,
+                 directory_mode=stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR):
+        """Initialise a cache handle.
+
+        This instantiation is cheap, the cache is only loaded when
+        :py:meth:`load` is called.
+
+        Parameters
+        ----------
+        file_path : str
+            The path of the cache file.
+        sources : list(str), optional
+            The paths of the files and directories the cached results depend
+            on.
+            For directories, the state of every ``.json`` file inside is also
+            considered.
+        file_mode : int, optional
+            If the cache file does not exist, it will be created with the mode
+            flags given.
+        directory_mode : int, optional
+            If the directory where the cache file should be put does not
+            exist, it will be created with the mode flags given.
+        """
+        self._changed = False
+        self._dmode = directory_mode
+        self._entries = None
+        self._fmode = file_mode
+        self._path = file_path
+        self._signature = None
+        self._sources = sources if sources else list()
+
+    def source_signature(self):
+        """Returns the current state of the sources, which the cache's
+        contents must match to be used.
+        """
+        signature = list()
+        for path in self._sources:
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                signature.append([path, None, None])
+                continue
+
+            signature.append([path, stat_result.st_mtime_ns,
+                              stat_result.st_size])
+            if not stat.S_ISDIR(stat_result.st_mode):
+                continue
+
+            try:
+                entries = sorted(entry.name for entry in os.scandir(path)
+                                 if entry.name.endswith(".json"))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    stat_result = os.stat(os.path.join(path, entry))
+                except OSError:
+                    continue
+                signature.append([entry, stat_result.st_mtime_ns,
+                                  stat_result.st_size])
+
+        return signature
+
+    @property
+    def loaded(self):
+        """Whether :py:meth:`load` was called for the cache."""
+        return self._entries is not None
+
+    def load(self, key=None):
+        """Loads the cached results from the cache file.
+
+        If the file does not exist, or its contents were cached with a
+        different `key` or state of the sources, the cache is emptied.
+
+        Parameters
+        ----------
+        key : object, optional
+            An additional JSON-serialisable value, describing how the results
+            were calculated, that must also match for the cached results to
+            be used.
+        """
+        self._changed = False
+        self._entries = dict()
+        self._signature = [key, self.source_signature()]
+
+        try:
+            with open(self._path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if isinstance(data, dict) and \
+                data.get("signature") == self._signature and \
+                isinstance(data.get("types"), dict):
+            self._entries = data["types"]
+
+    def save(self):
+        """Writes the cached results to the cache file, if they changed since
+        loading.
+
+        Note
+        ----
+        As the file only contains a cache, failing to write it is not an
+        error.
+        The file is replaced atomically, so concurrent readers either see the
+        old or the new contents.
+        """
+        if not self._changed:
+            return
+
+        dir_path = os.path.dirname(self._path)
+        temp_path = "{0}.{1}.tmp".format(self._path, os.getpid())
+        try:
+            if dir_path:
+                os.makedirs(dir_path, self._dmode, exist_ok=True)
+            with open(temp_path, 'w') as f:
+                os.chmod(temp_path, self._fmode)
+                json.dump({"signature": self._signature,
+                           "types": self._entries
+                           }, f)
+            os.replace(temp_path, self._path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        self._changed = False
+
+    def __contains__(self, variable_name):
+        return variable_name in self._entries
+
+    def __getitem__(self, variable_name):
+        """Returns the cached result for `variable_name`.
+
+        Raises
+        ------
+        KeyError
+            If there is no result cached for the variable.
+        """
+        return self._entries[variable_name]
+
+    def __setitem__(self, variable_name, result):
+        """Caches the `result` for `variable_name`."""
+        if variable_name in self._entries and \
+                self._entries[variable_name] == result:
+            return
+        self._entries[variable_name] = result
+        self._changed = True
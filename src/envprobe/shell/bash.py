@@ -55,8 +55,14 @@ then
     {{
         local original_retcode="$?";
 
-        local CONTROL="$(envprobe-config consume)";
-        eval "$CONTROL";
+        # Only start Envprobe if there are pending changes to apply. Checking
+        # the control file's size with a builtin is orders of magnitude cheaper
+        # than starting the interpreter on every prompt.
+        if [[ -s "{CONTROL}" ]];
+        then
+            local CONTROL="$(envprobe-config consume)";
+            eval "$CONTROL";
+        fi;
 
         return $original_retcode;
     }};
@@ -86,6 +92,7 @@ fi
 """.format(PID=self.shell_pid,
            LOCATION=envprobe_callback_location,
            CONFIG=self.configuration_directory,
+           CONTROL=self.control_file,
            TYPE=self.shell_type)
 
     def get_shell_unhook(self):
@@ -97,6 +104,7 @@ then
     unset ENVPROBE_CONFIG;
     unset ENVPROBE_SHELL_PID;
     unset ENVPROBE_SHELL_TYPE;
+    unset ENVPROBE_DAEMON;
 
     # Destroy the convenience aliases.
     unalias ep;
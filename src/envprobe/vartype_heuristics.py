@@ -14,40 +14,30 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from envprobe.environment import EnvVarTypeHeuristic, HeuristicStack
-
-
-class EnvprobeEnvVarHeuristic(EnvVarTypeHeuristic):
-    """Disable access to internal variables that begin with ``ENVPROBE_``."""
-    def __call__(self, name, env=None):
-        if name.startswith("ENVPROBE_"):
-            return False
+import re
 
+from envprobe.environment import EnvVarTypeHeuristic, HeuristicStack
+from envprobe.settings.variable_information import get_information_file_name
 
-class HiddenEnvVarHeuristic(EnvVarTypeHeuristic):
-    """Disable access to every variable that begins with ``_``, similar to how
-    files named as such are considered "hidden"."""
-    def __call__(self, name, env=None):
-        if name.startswith('_'):
-            return False
 
+IGNORED_NAME_RULES = [("prefix", '_', False),
+                      ("prefix", "ENVPROBE_", False)
+                      ]
+"""The rules of the :py:class:`NameRulesHeuristic` that disable access to
+every variable that begins with ``_``, similar to how files named as such are
+considered "hidden", and to the internal variables that begin with
+``ENVPROBE_``.
+"""
 
-class PathNameEnvVarHeuristic(EnvVarTypeHeuristic):
-    """Regard ``PATH`` and variables that end with ``_PATH`` as
-    :py:class:`.vartypes.path.Path`.
-    """
-    def __call__(self, name, env=None):
-        if name == "PATH" or name.endswith("_PATH"):
-            return 'path'
-
-
-class NumericalNameEnvVarHeuristic(EnvVarTypeHeuristic):
-    """Regard commonly numeric-only variables as
-    :py:class:`.vartypes.numeric.Numeric`.
-    """
-    def __call__(self, name, env=None):
-        if name.endswith(("PID", "PORT")):
-            return 'numeric'
+STANDARD_NAME_RULES = [("exact", "PATH", 'path'),
+                       ("suffix", "_PATH", 'path'),
+                       ("suffix", "PID", 'numeric'),
+                       ("suffix", "PORT", 'numeric')
+                       ]
+"""The rules of the :py:class:`NameRulesHeuristic` that regard ``PATH`` and
+variables that end with ``_PATH`` as :py:class:`.vartypes.path.Path`, and
+commonly numeric-only variables as :py:class:`.vartypes.numeric.Numeric`.
+"""
 
 
 class NumericalValueEnvVarHeuristic(EnvVarTypeHeuristic):
@@ -66,13 +56,109 @@ class NumericalValueEnvVarHeuristic(EnvVarTypeHeuristic):
             return None
 
 
+def _glob_to_regex(pattern):
+    """Translates the ``*`` and ``?`` wildcards of `pattern` to a regular
+    expression without capturing groups."""
+    return ''.join(".*" if c == '*' else '.' if c == '?' else re.escape(c)
+                   for c in pattern)
+
+
+class NameRulesHeuristic(EnvVarTypeHeuristic):
+    """Resolves variables based on a table of rules matching the variable's
+    name.
+
+    Every rule is a ``(match, pattern, result)`` tuple, where `match` is one
+    of ``"exact"``, ``"prefix"``, ``"suffix"``, or ``"glob"`` (supporting
+    the ``*`` and ``?`` wildcards), and `result` is the type the matching
+    variables resolve to, or ``False`` if they are not to be managed.
+    If multiple rules match a variable, the one earlier in the table is used.
+
+    The table is compiled when the heuristic is created: the exact, prefix,
+    and suffix rules are looked up by the name's prefixes and suffixes, and
+    the glob rules are combined into a single regular expression.
+    Thus, the cost of resolving a variable does not grow with the number of
+    non-glob rules.
+    """
+    cacheable = True
+
+    def __init__(self, rules):
+        """
+        Parameters
+        ----------
+        rules : list(tuple(str, str, str or bool))
+            The rules of the table, in the order of their precedence.
+
+        Raises
+        ------
+        ValueError
+            If the `match` of a rule is invalid.
+        """
+        self.rules = [tuple(rule) for rule in rules]
+        self._exact, self._prefixes, self._suffixes = dict(), dict(), dict()
+        globs = list()
+        for index, (match, pattern, _) in enumerate(self.rules):
+            if match == "exact":
+                self._exact.setdefault(pattern, index)
+            elif match == "prefix":
+                self._prefixes.setdefault(pattern, index)
+            elif match == "suffix":
+                self._suffixes.setdefault(pattern, index)
+            elif match == "glob":
+                globs.append((index, pattern))
+            else:
+                raise ValueError("Invalid name rule match '{0}' for '{1}'"
+                                 .format(match, pattern))
+
+        self._prefix_lengths = sorted({len(p) for p in self._prefixes})
+        self._suffix_lengths = sorted({len(s) for s in self._suffixes})
+        self._glob_indices = [index for index, _ in globs]
+        self._globs = re.compile('|'.join(
+            '(' + _glob_to_regex(pattern) + ')' for _, pattern in globs),
+            re.DOTALL) if globs else None
+
+    @property
+    def cache_key(self):
+        return [super().cache_key, [list(rule) for rule in self.rules]]
+
+    def _match(self, name):
+        """Returns the index of the first rule that matches `name`, or
+        ``None``."""
+        candidates = list()
+        if name in self._exact:
+            candidates.append(self._exact[name])
+        for length in self._prefix_lengths:
+            if length > len(name):
+                break
+            if name[:length] in self._prefixes:
+                candidates.append(self._prefixes[name[:length]])
+        for length in self._suffix_lengths:
+            if length > len(name):
+                break
+            if name[len(name) - length:] in self._suffixes:
+                candidates.append(self._suffixes[name[len(name) - length:]])
+        if self._globs:
+            match = self._globs.fullmatch(name)
+            if match:
+                candidates.append(self._glob_indices[match.lastindex - 1])
+
+        return min(candidates) if candidates else None
+
+    def __call__(self, name, env=None):
+        index = self._match(name)
+        if index is None:
+            return None
+        return self.rules[index][2]
+
+
 class ConfigurationResolvedHeuristic(EnvVarTypeHeuristic):
     """Implements a heuristic that reads from a
     :py:class:`.settings.variable_information.VariableInformation`
     configuration manager, and resolves the type of the variable based on
     these settings contained therein.
     """
-    def __init__(self, loader):
+    cacheable = True
+
+    def __init__(self, loader, group_key=None, group_loader=None):
         """
         Parameters
         ----------
@@ -81,8 +167,23 @@ class ConfigurationResolvedHeuristic(EnvVarTypeHeuristic):
             return an object similar to
             :py:class:`.settings.variable_information.VariableInformation` in
             which the type can be looked up.
+        group_key : str -> object, optional
+            This function is called with the name of a variable, and the
+            variables for which it returns the same key are looked up in the
+            same object returned by `loader`, when resolving multiple
+            variables at once.
+            If not specified, every variable is looked up individually.
+        group_loader : list(str) -> list(tuple(object, list(str))), optional
+            This function is called with the names of the variables when
+            resolving multiple variables at once, and should return the
+            objects returned by `loader`, each with the names of the variables
+            to look up in it.
+            If specified, `group_key` is not used, and the function decides
+            the grouping, such as by the storage the information is kept in.
         """
         self.loader = loader
+        self.group_key = group_key
+        self.group_loader = group_loader
 
     def __call__(self, name, env=None):
         varinfo_manager = self.loader(name)
@@ -94,9 +195,41 @@ class ConfigurationResolvedHeuristic(EnvVarTypeHeuristic):
 
         return varinfo.get("type", None)
 
+    def _load_groups(self, names):
+        """Returns the objects returned by `loader` and the `names` to look
+        up in each."""
+        if self.group_loader:
+            return self.group_loader(names)
+
+        groups = dict()
+        for name in names:
+            key = self.group_key(name) if self.group_key else name
+            groups.setdefault(key, list()).append(name)
+        return [(self.loader(group[0]), group) for group in groups.values()]
+
+    def resolve_many(self, names, env=None):
+        results = dict()
+        for varinfo_manager, group in self._load_groups(names):
+            if not varinfo_manager:
+                continue
+
+            if hasattr(varinfo_manager, "get_many"):
+                records = varinfo_manager.get_many(group)
+            else:
+                records = {name: varinfo_manager[name] for name in group}
+            for name, varinfo in records.items():
+                if varinfo:
+                    results[name] = varinfo.get("type", None)
+        return results
+
 
-def assemble_standard_type_heuristics_pipeline(varcfg_user_loader,
-                                               varcfg_description_loader):
+def assemble_standard_type_heuristics_pipeline(
+        varcfg_user_loader,
+        varcfg_description_loader,
+        varcfg_group_key=get_information_file_name,
+        name_rules=None,
+        varcfg_user_group_loader=None,
+        varcfg_description_group_loader=None):
     """Creates the standard :py:class:`.environment.HeuristicStack` pipeline
     that decides the type for an environment variable.
 
@@ -120,6 +253,28 @@ def assemble_standard_type_heuristics_pipeline(varcfg_user_loader,
         an object similar to
         :py:class:`.settings.variable_information.VariableInformation` in which
         the type can be looked up.
+    varcfg_group_key : str -> object, optional
+        The function used to group the variables which are looked up in the
+        same object returned by the loaders, when resolving multiple variables
+        at once.
+        By default, the variables are grouped by the information file they
+        are stored in, see
+        :py:func:`.settings.variable_information.get_information_file_name`.
+    name_rules : list(tuple(str, str, str or bool)), optional
+        Additional rules for the :py:class:`NameRulesHeuristic`, which take
+        precedence over the :py:data:`STANDARD_NAME_RULES`, but not over the
+        configuration.
+    varcfg_user_group_loader : list(str) -> list(tuple(object, list(str))), \
+optional
+        The function that groups the variables for `varcfg_user_loader`
+        instead of `varcfg_group_key`, see
+        :py:class:`.ConfigurationResolvedHeuristic`.
+        Use it if the variables are not stored in the files
+        `varcfg_group_key` tells, e.g., if they are in a single database.
+    varcfg_description_group_loader : \
+list(str) -> list(tuple(object, list(str))), optional
+        The function that groups the variables for
+        `varcfg_description_loader` instead of `varcfg_group_key`.
     """
     p = HeuristicStack()
     # (This is a **stack**, the execution is bottom to top in the order of
@@ -128,22 +283,25 @@ def assemble_standard_type_heuristics_pipeline(varcfg_user_loader,
     # By default everything is a string, to conform with POSIX.
     p += EnvVarTypeHeuristic()
 
-    # If the value or the name feels numbery, make it a number.
+    # If the value feels numbery, make it a number.
     p += NumericalValueEnvVarHeuristic()
-    p += NumericalNameEnvVarHeuristic()
 
-    # If the variable looks like a path, use path.
-    p += PathNameEnvVarHeuristic()
+    # If the name looks like a path or a number, use the respective type.
+    # (The rules of the table are compiled, so additional rules do not slow
+    # down resolution.)
+    p += NameRulesHeuristic(list(name_rules or list()) + STANDARD_NAME_RULES)
     # TODO: Create a builtin heuristic like NumericalValue for PATH-like stuff?
 
     # If the built-in heuristics fail, try to use the description database.
-    p += ConfigurationResolvedHeuristic(varcfg_description_loader)
+    p += ConfigurationResolvedHeuristic(varcfg_description_loader,
+                                        varcfg_group_key,
+                                        varcfg_description_group_loader)
 
     # The user's own configuration should be respected highly, though.
-    p += ConfigurationResolvedHeuristic(varcfg_user_loader)
+    p += ConfigurationResolvedHeuristic(varcfg_user_loader, varcfg_group_key,
+                                        varcfg_user_group_loader)
 
     # Ignoring critical variables is number one priority.
-    p += EnvprobeEnvVarHeuristic()
-    p += HiddenEnvVarHeuristic()
+    p += NameRulesHeuristic(IGNORED_NAME_RULES)
 
     return p
@@ -14,9 +14,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from .envvar import EnvVar, EnvVarExtendedInformation, \
-    get_class, get_kind, get_known_kinds, \
-    load, load_all, register_type
+from envprobe.compatibility import lazy_package
 
 __all__ = [
     'EnvVar',
@@ -28,3 +26,7 @@ __all__ = [
     'load_all',
     'register_type'
     ]
+
+__getattr__, __dir__ = lazy_package(
+    __name__, globals(),
+    attributes={name: 'envvar' for name in __all__})
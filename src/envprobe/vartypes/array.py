@@ -14,11 +14,198 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from difflib import ndiff
-
 from envprobe.vartypes.envvar import EnvVar
 
 
+DIFF_MAX_SEARCH_DEPTH = 256
+"""The number of steps after which :py:func:`diff_elements` stops searching
+for the shortest edit script between two sequences."""
+
+
+def diff_elements(old, new):
+    """Calculate the shortest edit script that transforms the `old` sequence
+    into the `new` one.
+
+    The script is calculated with Myers' algorithm in its linear space
+    variant, which takes ``O((N + M) * D)`` time for sequences of length
+    ``N`` and ``M`` that differ in ``D`` elements.
+    To bound the time spent on sequences that differ in more than
+    :py:data:`DIFF_MAX_SEARCH_DEPTH` elements, such parts of the sequences are
+    reported as entirely changed, which is a correct, but not the shortest
+    script.
+
+    Elements that are only present in one of the sequences are never matched,
+    so they are left out before the script is calculated.
+
+    Parameters
+    ----------
+    old : list
+        The original sequence of hashable elements.
+    new : list
+        The changed sequence of hashable elements.
+
+    Returns
+    -------
+    list(tuple(str, object))
+        The actions of the edit script, in order.
+        Each action is ``'='`` for an element kept, ``'-'`` for an element
+        only in `old`, or ``'+'`` for an element only in `new`, and the
+        element itself.
+        In a run of changes between kept elements, the removals are always
+        listed before the additions.
+    """
+    prefix = 0
+    while prefix < len(old) and prefix < len(new) and \
+            old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < len(old) - prefix and suffix < len(new) - prefix and \
+            old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_end, new_end = len(old) - suffix, len(new) - suffix
+
+    old_elements = set(old[prefix:old_end])
+    new_elements = set(new[prefix:new_end])
+    old_indices = [i for i in range(prefix, old_end)
+                   if old[i] in new_elements]
+    new_indices = [j for j in range(prefix, new_end)
+                   if new[j] in old_elements]
+
+    script = list()
+    _diff_ranges([old[i] for i in old_indices],
+                 [new[j] for j in new_indices],
+                 script)
+
+    # Map the kept elements back to their original positions, and emit
+    # everything between two kept elements as changes.
+    ret = [('=', e) for e in old[:prefix]]
+    old_pos, new_pos, old_next, new_next = 0, 0, prefix, prefix
+    for mode, _ in script:
+        if mode == '-':
+            old_pos += 1
+        elif mode == '+':
+            new_pos += 1
+        else:
+            old_index, new_index = old_indices[old_pos], new_indices[new_pos]
+            ret.extend(('-', e) for e in old[old_next:old_index])
+            ret.extend(('+', e) for e in new[new_next:new_index])
+            ret.append(('=', old[old_index]))
+            old_pos, new_pos = old_pos + 1, new_pos + 1
+            old_next, new_next = old_index + 1, new_index + 1
+    ret.extend(('-', e) for e in old[old_next:old_end])
+    ret.extend(('+', e) for e in new[new_next:new_end])
+    ret.extend(('=', e) for e in old[old_end:])
+    return ret
+
+
+def _diff_ranges(old, new, script):
+    """Append the edit script between `old` and `new` to `script`."""
+    prefix = 0
+    while prefix < len(old) and prefix < len(new) and \
+            old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < len(old) - prefix and suffix < len(new) - prefix and \
+            old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+
+    script.extend(('=', e) for e in old[:prefix])
+    old_mid = old[prefix:len(old) - suffix]
+    new_mid = new[prefix:len(new) - suffix]
+
+    if not old_mid or not new_mid:
+        script.extend(('-', e) for e in old_mid)
+        script.extend(('+', e) for e in new_mid)
+    else:
+        split = _middle_snake(old_mid, new_mid)
+        if split is None:
+            # The sequences have nothing in common, or are too different.
+            script.extend(('-', e) for e in old_mid)
+            script.extend(('+', e) for e in new_mid)
+        else:
+            x, y = split
+            _diff_ranges(old_mid[:x], new_mid[:y], script)
+            _diff_ranges(old_mid[x:], new_mid[y:], script)
+
+    script.extend(('=', e) for e in old[len(old) - suffix:])
+
+
+def _middle_snake(old, new):
+    """Find the point where the shortest edit path between `old` and `new`
+    can be split in two, by searching from both ends at the same time.
+
+    Returns
+    -------
+    tuple(int, int)
+        The index in `old` and in `new` where the path should be split.
+    None
+        If there is no common element in the sequences, or the search took
+        more than :py:data:`DIFF_MAX_SEARCH_DEPTH` steps.
+    """
+    n, m = len(old), len(new)
+    max_d = min((n + m + 1) // 2, DIFF_MAX_SEARCH_DEPTH)
+    offset = max_d
+    length = 2 * max_d + 2
+    forward = [-1] * length
+    backward = [-1] * length
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    delta = n - m
+    # If the difference in length is odd, the forward search will collide
+    # with the backward one, otherwise vice versa.
+    check_forward = delta % 2 != 0
+    k1_start, k1_end, k2_start, k2_end = 0, 0, 0, 0
+
+    for d in range(max_d):
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = offset + k1
+            if k1 == -d or (k1 != d and
+                            forward[k1_offset - 1] < forward[k1_offset + 1]):
+                x1 = forward[k1_offset + 1]
+            else:
+                x1 = forward[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and old[x1] == new[y1]:
+                x1 += 1
+                y1 += 1
+            forward[k1_offset] = x1
+            if x1 > n:
+                k1_end += 2  # Ran off the right of the graph.
+            elif y1 > m:
+                k1_start += 2  # Ran off the bottom of the graph.
+            elif check_forward:
+                k2_offset = offset + delta - k1
+                if 0 <= k2_offset < length and backward[k2_offset] != -1:
+                    if x1 >= n - backward[k2_offset]:
+                        return x1, y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = offset + k2
+            if k2 == -d or (k2 != d and
+                            backward[k2_offset - 1] < backward[k2_offset + 1]):
+                x2 = backward[k2_offset + 1]
+            else:
+                x2 = backward[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and old[-1 - x2] == new[-1 - y2]:
+                x2 += 1
+                y2 += 1
+            backward[k2_offset] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not check_forward:
+                k1_offset = offset + delta - k2
+                if 0 <= k1_offset < length and forward[k1_offset] != -1:
+                    x1 = forward[k1_offset]
+                    y1 = offset + x1 - k1_offset
+                    if x1 >= n - x2:
+                        return x1, y1
+
+    return None
+
+
 class Array(EnvVar):
     """An environment variable where elements are separated by a
     :py:attr:`separator`.
@@ -28,6 +215,8 @@ class Array(EnvVar):
     The instance can be used like :py:class:`list`, i.e.
     :py:func:`__getitem__`, :py:func:`__setitem__` and :py:func:`__delitem__`
     are implemented.
+    Membership tests (``in``) are answered from an index of the elements,
+    which is built on first use, and dropped when the array is modified.
     """
 
     def __init__(self, name, separator, raw_value):
@@ -35,6 +224,7 @@ class Array(EnvVar):
         `raw_value`.
         """
         super().__init__(name, raw_value)
+        self._members = None
         self._separator = separator
         self.value = raw_value
 
@@ -83,6 +273,7 @@ class Array(EnvVar):
             Raised if `new_value` is neither a :py:class:`str` nor a
             :py:class:`list`.
         """
+        self._members = None
         if isinstance(new_value, list):
             self._value = [self._transform_element_set(e) for e in new_value]
         elif isinstance(new_value, str):
@@ -135,15 +326,24 @@ class Array(EnvVar):
         elem = self._transform_element_set(elem)
         if self._check_if_element_valid(elem):
             self._value[idx] = elem
+            self._members = None
 
     def __delitem__(self, idx):
         """Delete the element at index `idx`."""
         del self._value[idx]
+        self._members = None
 
     def __len__(self):
         """The length of the array."""
         return len(self._value)
 
+    def __contains__(self, elem):
+        """Returns whether `elem` is an element of the array."""
+        if self._members is None:
+            self._members = frozenset(
+                self._transform_element_get(e) for e in self._value)
+        return elem in self._members
+
     def insert_at(self, idx, elem):
         """Insert the element at a given index.
 
@@ -160,6 +360,7 @@ class Array(EnvVar):
         """
         elem = self._transform_element_set(elem)
         if self._check_if_element_valid(elem):
+            self._members = None
             if idx >= 0:
                 self._value.insert(idx, elem)
             elif idx < -1:
@@ -180,8 +381,8 @@ class Array(EnvVar):
     def remove_value(self, elem):
         """Removes all occurrences of `elem` from the array."""
         elem = self._transform_element_set(elem)
-        for _ in range(0, self._value.count(elem)):
-            self._value.remove(elem)
+        self._value = [e for e in self._value if e != elem]
+        self._members = None
 
     def raw(self):
         """Convert the value to raw shell representation, i.e. a
@@ -195,25 +396,11 @@ class Array(EnvVar):
         For :py:class:`Array` variables, the elements that are same in both
         `old` and `new` will be emitted with an ``=`` ("unchanged") side.
         """
-        if old.value == new.value:
+        old_value, new_value = old.value, new.value
+        if old_value == new_value:
             return list()
 
-        ret = list()
-        diff = ndiff(old.value, new.value)
-
-        for line in diff:
-            parts = line.split(' ', 1)
-            mode, value = parts[0], parts[1]
-            if mode == '-':
-                ret.append(('-', value))
-            elif mode == '':
-                # The line's format was " foo", indicating it's present in
-                # both lists.
-                ret.append(('=', value[1:]))
-            elif mode == '+':
-                ret.append(('+', value))
-
-        return ret
+        return diff_elements(old_value, new_value)
 
     def apply_diff(self, diff):
         """Applies the given `diff` actions.
@@ -225,13 +412,39 @@ class Array(EnvVar):
         if not diff:
             return
 
+        self._apply_diff_actions(diff, prepend=False)
+
+    def _apply_diff_actions(self, diff, prepend):
+        """Applies the `diff` actions in one pass over the array.
+
+        The result is the same as calling :py:meth:`remove_value` for every
+        ``'-'`` action and :py:meth:`insert_at` at the back (or, if `prepend`
+        is set, the front) for every ``'+'`` action, in order.
+        """
+        removed = set()
+        added = list()  # Each element added, and whether it was kept.
+        added_positions = dict()  # The indices in 'added' for an element.
+
         for mode, value in diff:
             if mode == '-':
-                self.remove_value(value)
-            elif mode == '=':
-                continue
+                value = self._transform_element_set(value)
+                removed.add(value)
+                for position in added_positions.pop(value, list()):
+                    added[position][1] = False
             elif mode == '+':
-                self.insert_at(-1, value)
+                value = self._transform_element_set(value)
+                self._check_if_element_valid(value)
+                added_positions.setdefault(value, list()).append(len(added))
+                added.append([value, True])
+
+        added = [e for e, kept in added if kept]
+        kept = [e for e in self._value if e not in removed]
+        if prepend:
+            added.reverse()
+            self._value = added + kept
+        else:
+            self._value = kept + added
+        self._members = None
 
     @classmethod
     def merge_diff(cls, diff_a, diff_b):
@@ -241,7 +454,8 @@ class Array(EnvVar):
         For :py:class:`Array` variables, the diff merging is element-wise, and
         the
         """
-        removals, appends = list(), list()
+        # (Dicts are used as sets that keep the order of insertion.)
+        removals, appends = dict(), dict()
 
         def _make_positive_tuple(entry):
             """Converts the diff that sets an array variable to a definite
@@ -256,19 +470,13 @@ class Array(EnvVar):
 
         for mode, value in diff_a + diff_b:
             if mode == '-':
-                if value not in removals:
-                    removals.append(value)
+                removals[value] = None
             elif mode == '=':
                 continue
             elif mode == '+':
-                if value not in appends:
-                    appends.append(value)
-
-        removed_and_added = set(removals) & set(appends)
-        removals = list(map(lambda x: ('-', x),
-                            filter(lambda x: x not in removed_and_added,
-                                   removals)))
-        appends = list(map(lambda x: ('+', x),
-                           filter(lambda x: x not in removed_and_added,
-                                  appends)))
+                appends[value] = None
+
+        removed_and_added = removals.keys() & appends.keys()
+        removals = [('-', x) for x in removals if x not in removed_and_added]
+        appends = [('+', x) for x in appends if x not in removed_and_added]
         return removals + appends
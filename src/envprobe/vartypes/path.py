@@ -69,13 +69,7 @@ class Path(ColonSeparatedArray):
         if not diff:
             return
 
-        for mode, value in diff:
-            if mode == '-':
-                self.remove_value(value)
-            elif mode == '=':
-                continue
-            elif mode == '+':
-                self.insert_at(0, value)
+        self._apply_diff_actions(diff, prepend=True)
 
 
 register_type('path', Path)
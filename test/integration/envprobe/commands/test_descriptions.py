@@ -0,0 +1,188 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from argparse import Namespace
+import csv
+import io
+import os
+import pytest
+import zipfile
+
+from envprobe.commands.descriptions import update_command
+from envprobe.community_descriptions import downloader, local_data
+from envprobe.settings.config_file import ConfigurationFile
+
+
+def _make_release(path, version, sources):
+    """Creates a release archive in the layout of the repository's zipball."""
+    root = "whisperity-Envprobe-Descriptions-{}/".format(version[:7])
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(root + "format.ver", "1.0")
+        for name, rows in sources.items():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, ["Variable", "TypeKind",
+                                             "Description"])
+            writer.writeheader()
+            writer.writerow({"Variable": "__META__",
+                             "TypeKind": "COMMENT",
+                             "Description": "Source {}.".format(name)})
+            for variable, kind, description in rows:
+                writer.writerow({"Variable": variable,
+                                 "TypeKind": kind,
+                                 "Description": description})
+            archive.writestr(root + name + ".csv", buffer.getvalue())
+    return path
+
+
+@pytest.fixture
+def releases(tmp_path):
+    yield [
+        ("1" * 40,
+         _make_release(os.path.join(tmp_path, "first.zip"), "1" * 40,
+                       {"core": [("PATH", "colon_separated", "path"),
+                                 ("PAGER", "string", "pager"),
+                                 ("HOME", "path", "home")]})),
+        ("2" * 40,
+         _make_release(os.path.join(tmp_path, "second.zip"), "2" * 40,
+                       {"core": [("PATH", "colon_separated", "path"),
+                                 ("HOME", "path", "Home directory.")],
+                        "extra": [("PYTHONPATH", "colon_separated",
+                                   "pythonpath")]}))
+        ]
+
+
+@pytest.fixture
+def release(tmp_path, monkeypatch):
+    """Serves the release archive set in the fixture's value instead of the
+    one downloaded from the Internet.
+    """
+    os.environ["XDG_DATA_HOME"] = os.path.join(tmp_path, "data")
+    current = {"version": None, "archive": None}
+
+    monkeypatch.setattr(downloader, "fetch_latest_version_information",
+                        lambda: current["version"])
+    monkeypatch.setattr(downloader, "download_latest_data",
+                        lambda: downloader.extract_release(current["archive"]))
+    yield current
+
+
+@pytest.fixture
+def saved_shards(monkeypatch):
+    """Records the name of the variable information files written."""
+    saved = list()
+    original_save = ConfigurationFile._save_data
+
+    def _save_data(self):
+        if os.path.basename(os.path.dirname(self._path)) == "variables":
+            saved.append(os.path.basename(self._path))
+        return original_save(self)
+
+    monkeypatch.setattr(ConfigurationFile, "_save_data", _save_data)
+    yield saved
+
+
+def test_update(capfd, monkeypatch, release, releases, saved_shards):
+    # The records are streamed, and not loaded into the sources.
+    monkeypatch.delattr(downloader.DescriptionSource, "parse")
+    release["version"], release["archive"] = releases[0]
+    update_command(Namespace())
+    stdout, stderr = capfd.readouterr()
+    assert(not stderr)
+    assert("extracted 3 variables." in stdout)
+    assert("3 new or changed, 0 removed, 0 unchanged records." in stdout)
+    assert("saved 3 records, cleaned up 0 records" in stdout)
+    assert("records/s" in stdout)
+    # Every shard is written exactly once.
+    assert(sorted(saved_shards) == ["H.json", "P.json"])
+
+    storage = local_data.get_storage_configuration()
+    assert(storage.version == "1" * 40)
+    assert(set(storage.record_hashes.keys()) == {"PATH", "PAGER", "HOME"})
+    assert(local_data.get_variable_information_manager("PATH")["PATH"] ==
+           {"type": "colon_separated", "description": "path",
+            "source": "core"})
+
+    update_command(Namespace())
+    stdout, _ = capfd.readouterr()
+    assert("Nothing to update" in stdout)
+
+
+def test_delta_update(capfd, release, releases, saved_shards):
+    release["version"], release["archive"] = releases[0]
+    update_command(Namespace())
+    capfd.readouterr()
+    first_hashes = local_data.get_storage_configuration().record_hashes
+
+    saved_shards.clear()
+    release["version"], release["archive"] = releases[1]
+    update_command(Namespace())
+    stdout, stderr = capfd.readouterr()
+    assert(not stderr)
+    assert("2 new or changed, 1 removed, 1 unchanged records." in stdout)
+    assert("saved 2 records, cleaned up 1 records" in stdout)
+    assert(sorted(saved_shards) == ["H.json", "P.json"])
+
+    storage = local_data.get_storage_configuration()
+    assert(storage.version == "2" * 40)
+    hashes = storage.record_hashes
+    assert(set(hashes.keys()) == {"PATH", "HOME", "PYTHONPATH"})
+    assert(hashes["PATH"] == first_hashes["PATH"])
+    assert(hashes["HOME"] != first_hashes["HOME"])
+
+    manager = local_data.get_variable_information_manager("PAGER")
+    assert(manager["PAGER"] is None)
+    assert(manager["HOME"]["description"] == "Home directory.")
+    assert(manager["PYTHONPATH"]["source"] == "extra")
+
+
+def test_update_without_hashes(capfd, release, releases):
+    release["version"], release["archive"] = releases[0]
+    update_command(Namespace())
+    capfd.readouterr()
+
+    # Simulate a storage installed by a version that did not record hashes.
+    storage = local_data.get_storage_configuration(read_only=False)
+    storage.record_hashes = dict()
+
+    release["version"], release["archive"] = releases[1]
+    update_command(Namespace())
+    stdout, _ = capfd.readouterr()
+    assert("3 new or changed, 1 removed, 0 unchanged records." in stdout)
+    assert(local_data.get_variable_information_manager("PAGER")["PAGER"]
+           is None)
+
+
+def test_concurrent_update(capfd, monkeypatch, release, releases):
+    release["version"], release["archive"] = releases[0]
+
+    def _download_while_updated():
+        # The storage is not locked while the release is downloaded, so
+        # another update might finish in the meantime.
+        local_data.get_storage_configuration(read_only=False).version = \
+            "3" * 40
+        return downloader.extract_release(release["archive"])
+
+    monkeypatch.setattr(downloader, "download_latest_data",
+                        _download_while_updated)
+    assert(update_command(Namespace()) == 1)
+    _, stderr = capfd.readouterr()
+    assert("updated by another process" in stderr)
+
+    storage = local_data.get_storage_configuration()
+    assert(storage.version == "3" * 40)
+    assert(not storage.record_hashes)
+    assert(local_data.get_variable_information_manager("PATH")["PATH"]
+           is None)
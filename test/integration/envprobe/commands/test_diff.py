@@ -32,6 +32,9 @@ class MockTracking:
     def is_tracked(self, variable_name):
         return variable_name not in self.ignored
 
+    def tracked_subset(self, variables):
+        return set(variables) - self.ignored
+
 
 class FakeShell2(FakeShell):
     @property
@@ -0,0 +1,80 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from argparse import Namespace
+import os
+import pytest
+
+from envprobe.commands.hook import command
+from envprobe.environment import EnvVarTypeHeuristic, Environment, \
+    HeuristicStack
+from envprobe.library import get_vartype_cache
+from envprobe.shell import FakeShell, load
+
+
+class NameHeuristic(EnvVarTypeHeuristic):
+    cacheable = True
+
+    def __call__(self, name, env=None):
+        if name.startswith('_'):
+            return False
+        return 'path' if name == "PATH" else None
+
+
+@pytest.fixture
+def args(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CONFIG_HOME", os.path.join(tmp_path, "cfg"))
+    monkeypatch.setenv("XDG_DATA_HOME", os.path.join(tmp_path, "data"))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", os.path.join(tmp_path, "run"))
+
+    pipeline = HeuristicStack()
+    pipeline += EnvVarTypeHeuristic()
+    pipeline += NameHeuristic()
+    envdict = {"PATH": "/Foo:/Bar",
+               "FOO": "Foo",
+               "_HIDDEN": "X"}
+
+    arg = Namespace()
+    arg.environment = Environment(FakeShell(), envdict, pipeline)
+    arg.envprobe_root = "/envprobe"
+    arg.daemon = False
+    arg.PID = 42
+    arg.SHELL = "bash"
+
+    yield arg
+
+
+def test_hook_precomputes_types(capfd, args):
+    command(args)
+    stdout, _ = capfd.readouterr()
+    assert("PROMPT_COMMAND" in stdout)
+
+    # The user's cache is not affected by the hook.
+    assert(args.environment.type_heuristics.cache is None)
+    user_cache = get_vartype_cache()
+    user_cache.load([NameHeuristic().cache_key])
+    assert("PATH" not in user_cache)
+
+    rundir = os.path.join(os.environ["XDG_RUNTIME_DIR"], "envprobe")
+    tempd, = [os.path.join(rundir, d) for d in os.listdir(rundir)
+              if d.startswith("42-")]
+    shell = load("bash")(42, tempd)
+
+    shell_cache = get_vartype_cache(shell)
+    shell_cache.load([NameHeuristic().cache_key])
+    assert(shell_cache["PATH"] == "path")
+    assert(shell_cache["FOO"] is None)
+    assert(shell_cache["_HIDDEN"] is False)
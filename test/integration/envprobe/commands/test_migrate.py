@@ -0,0 +1,78 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from argparse import Namespace
+import os
+import pytest
+
+from envprobe.commands.migrate import command
+from envprobe.community_descriptions import local_data
+from envprobe.library import get_variable_information_manager
+from envprobe.settings.information_database import InformationDatabase
+
+
+class MockExtendedData:
+    def __init__(self, type_, description):
+        self.type = type_
+        self.description = description
+
+
+@pytest.fixture
+def args(tmp_path):
+    os.environ["XDG_CONFIG_HOME"] = os.path.join(tmp_path, "cfg")
+    os.environ["XDG_DATA_HOME"] = os.path.join(tmp_path, "data")
+
+    yield Namespace()
+
+
+def test_migrate(capfd, args):
+    get_variable_information_manager("PATH", read_only=False).set(
+        "PATH", MockExtendedData("path", "User path."), "local")
+    get_variable_information_manager("EDITOR", read_only=False).set(
+        "EDITOR", MockExtendedData("string", None), "local")
+    for variable in ["PATH", "PAGER", "HOME"]:
+        local_data.get_variable_information_manager(
+            variable, read_only=False).set(
+                variable, MockExtendedData("string", variable), "community")
+
+    command(args)
+
+    stdout, stderr = capfd.readouterr()
+    assert("Migrated 2 user-specific records." in stdout)
+    assert("Migrated 3 community description records." in stdout)
+    assert(not stderr)
+
+    user = get_variable_information_manager("PATH")
+    assert(isinstance(user._config, InformationDatabase))
+    assert(user["PATH"]["description"] == "User path.")
+    assert(user["EDITOR"]["type"] == "string")
+    assert(user["PAGER"] is None)
+
+    community = local_data.get_variable_information_manager("PAGER")
+    assert(isinstance(community._config, InformationDatabase))
+    assert(community["PAGER"]["description"] == "PAGER")
+
+    managers = list(local_data.generate_variable_information_managers())
+    assert(len(managers) == 1)
+    assert(managers[0].keys() == ["HOME", "PAGER", "PATH"])
+
+    # Writes after the migration go to the database.
+    get_variable_information_manager("FOO", read_only=False).set(
+        "FOO", MockExtendedData("numeric", None), "local")
+    assert(get_variable_information_manager("FOO")["FOO"]["type"] ==
+           "numeric")
+    assert(not os.path.exists(os.path.join(os.environ["XDG_CONFIG_HOME"],
+                                           "envprobe", "variables")))
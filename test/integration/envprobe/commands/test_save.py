@@ -18,6 +18,7 @@ from argparse import Namespace
 import os
 import pytest
 
+from envprobe.commands import save
 from envprobe.commands.save import command
 from envprobe.environment import Environment
 from envprobe.library import get_snapshot
@@ -34,6 +35,9 @@ class MockTracking:
     def is_tracked(self, variable_name):
         return variable_name not in self.ignored
 
+    def tracked_subset(self, variables):
+        return set(variables) - self.ignored
+
 
 class FakeShell2(FakeShell):
     @property
@@ -149,3 +153,33 @@ def test_save_definition_overwrite(capfd, args):
 
     snapshot = get_snapshot(args.SNAPSHOT, read_only=True)
     assert(snapshot["NEW_VAR"] == "Another")
+
+
+def test_save_patch(capfd, monkeypatch, args):
+    args.VARIABLE = None
+    args.SNAPSHOT = "test_patch"
+    args.patch = True
+    answers = ["y", "n", "n", "y", "n"]
+    snapshots = list()
+
+    def _get_snapshot(name, read_only=True):
+        snapshots.append(get_snapshot(name, read_only))
+        return snapshots[-1]
+
+    def _input(prompt):
+        # The snapshot is not loaded, and thus not locked, while the user is
+        # asked.
+        assert(not snapshots[0]._config._depth)
+        return answers.pop(0)
+
+    monkeypatch.setattr(save, "get_snapshot", _get_snapshot)
+    monkeypatch.setattr("builtins.input", _input)
+    command(args)
+    capfd.readouterr()
+    assert(not answers)
+
+    snapshot = get_snapshot(args.SNAPSHOT, read_only=True)
+    assert(snapshot["FOO"] == "Bar")
+    assert(snapshot["NEW_VAR"] is None)
+    assert(snapshot["NUM"] is None)
+    assert(snapshot["PATH"] == [('-', "/Bar")])
@@ -0,0 +1,119 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import io
+import pytest
+import threading
+import zipfile
+
+from envprobe.community_descriptions.downloader import download_latest_data
+
+
+CSV_HEADER = "Variable,TypeKind,Description\r\n"
+
+
+def _make_release(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr("whisperity-Envprobe-Descriptions-0123456/" +
+                             name, content)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def server():
+    """Serves the contents of the `files` dict of the fixture over HTTP."""
+    files = dict()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            content = files.get(self.path)
+            if content is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+
+    yield "http://127.0.0.1:{}".format(httpd.server_address[1]), files
+
+    httpd.shutdown()
+    httpd.server_close()
+    thread.join()
+
+
+def test_download(server):
+    url, files = server
+    files["/release.zip"] = _make_release({
+        "format.ver": "1.0",
+        "README.md": "Not a source.",
+        "core.csv": CSV_HEADER +
+        "__META__,COMMENT,Core variables.\r\n"
+        "PATH,colon_separated,\"Where programs are, \"\"found\"\".\"\r\n"
+        "LANG,string,Árvíztűrő tükörfúrógép.\r\n",
+        "sub/extra.csv": CSV_HEADER +
+        "PYTHONPATH,colon_separated,Python modules.\r\n"})
+
+    names, records = list(), dict()
+    for source in download_latest_data(url + "/release.zip"):
+        names.append(source.name)
+        source.parse()
+        records.update({variable: source[variable] for variable in source})
+        if source.name == "core":
+            assert(source.comment == "Core variables.")
+
+    assert(names == ["core", "extra"])
+    assert(records["PATH"] == {"type": "colon_separated",
+                               "description": "Where programs are, "
+                                              "\"found\"."})
+    assert(records["LANG"]["description"] == "Árvíztűrő tükörfúrógép.")
+    assert(records["PYTHONPATH"]["type"] == "colon_separated")
+
+
+def test_records_are_streamed(server):
+    url, files = server
+    files["/release.zip"] = _make_release({
+        "format.ver": "1.0",
+        "big.csv": CSV_HEADER + "".join("VAR_{0},string,Variable {0}.\r\n"
+                                        .format(i) for i in range(10000))})
+
+    sources = download_latest_data(url + "/release.zip")
+    source = next(sources)
+    records = source.records()
+    assert(next(records) == ("VAR_0", {"type": "string",
+                                       "description": "Variable 0."}))
+    assert(len(source) == 0)  # Generating records does not store them.
+    assert(sum(1 for _ in records) == 9999)
+
+
+def test_unsupported_format(server):
+    url, files = server
+    files["/release.zip"] = _make_release({"format.ver": "99.0",
+                                           "core.csv": CSV_HEADER})
+
+    with pytest.raises(ValueError):
+        list(download_latest_data(url + "/release.zip"))
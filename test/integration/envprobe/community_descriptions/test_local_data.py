@@ -17,6 +17,8 @@
 import os
 import pytest
 
+from envprobe.community_descriptions import local_data
+from envprobe.community_descriptions.index import DescriptionIndex
 from envprobe.community_descriptions.local_data import MetaConfiguration
 from envprobe.settings.config_file import ConfigurationFile
 
@@ -40,3 +42,38 @@ def test_meta_uses_config_file(tmp_json):
     data2 = MetaConfiguration(cfg2)
     assert(data2.version == "TEST_VERSION")
     assert(data2.get_comment_for("foo-source") == "The Comment")
+
+
+class MockExtendedData:
+    def __init__(self, type_, description):
+        self.type = type_
+        self.description = description
+
+
+def test_compiled_index(tmp_path):
+    os.environ["XDG_DATA_HOME"] = os.path.join(tmp_path, "data")
+    for variable in ["PATH", "PAGER", "HOME"]:
+        local_data.get_variable_information_manager(
+            variable, read_only=False).set(
+                variable, MockExtendedData("string", variable), "test")
+
+    assert(not local_data.is_index_compiled())
+    assert(local_data.compile_index() == 3)
+    assert(local_data.is_index_compiled())
+
+    manager = local_data.get_variable_information_manager("PAGER")
+    assert(isinstance(manager._config, DescriptionIndex))
+    assert(manager["PAGER"] == {"type": "string",
+                                "description": "PAGER",
+                                "source": "test"})
+    assert(manager["EDITOR"] is None)
+
+    # Writing still goes to the stored data, not the index.
+    writer = local_data.get_variable_information_manager("EDITOR",
+                                                         read_only=False)
+    assert(not isinstance(writer._config, DescriptionIndex))
+    writer.set("EDITOR", MockExtendedData("string", None), "test")
+    assert(manager["EDITOR"] is None)
+
+    local_data.compile_index()
+    assert(manager["EDITOR"]["type"] == "string")
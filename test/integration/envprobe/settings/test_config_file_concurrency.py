@@ -0,0 +1,90 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import json
+import multiprocessing
+import os
+import pytest
+import sys
+
+from envprobe.settings.config_file import ConfigurationFile, LockMode
+
+
+WRITERS = 4
+READERS = 4
+INCREMENTS = 50
+
+
+def _writer(path, lock_mode):
+    for _ in range(INCREMENTS):
+        with ConfigurationFile(path, {"count": 0, "padding": list()},
+                               lock_mode=lock_mode) as c:
+            c["count"] += 1
+            # Make the file large enough that writing it in place would be
+            # observable by the readers.
+            c["padding"] = ["x" * 64] * (c["count"] % 97)
+
+
+def _reader(path, done):
+    while not done.is_set():
+        with open(path, 'r') as f:
+            data = json.load(f)
+        assert(isinstance(data["count"], int))
+
+        c = ConfigurationFile(path, read_only=True)
+        c.load()
+        assert(c["count"] >= data["count"])
+
+
+def _run(target, *args):
+    try:
+        target(*args)
+    except BaseException:
+        sys.exit(1)
+    sys.exit(0)
+
+
+@pytest.mark.parametrize("lock_mode", [LockMode.SIDECAR, LockMode.DIRECT])
+def test_concurrent_writers_and_readers(tmp_path, lock_mode):
+    path = os.path.join(tmp_path, "counter.json")
+    c = ConfigurationFile(path)
+    c["count"] = 0
+    c.save()
+
+    context = multiprocessing.get_context("fork")
+    done = context.Event()
+    readers = [context.Process(target=_run, args=(_reader, path, done))
+               for _ in range(READERS)]
+    writers = [context.Process(target=_run, args=(_writer, path, lock_mode))
+               for _ in range(WRITERS)]
+    for process in readers + writers:
+        process.start()
+
+    for process in writers:
+        process.join()
+    done.set()
+    for process in readers:
+        process.join()
+
+    assert(all(process.exitcode == 0 for process in writers + readers))
+
+    c = ConfigurationFile(path, read_only=True)
+    c.load()
+    assert(c["count"] == WRITERS * INCREMENTS)
+    # No temporary files are left behind.
+    assert(sorted(os.listdir(tmp_path)) in [["counter.json"],
+                                            ["counter.json",
+                                             "counter.json.lock"]])
@@ -0,0 +1,149 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
+import pytest
+import threading
+
+from envprobe import daemon
+
+
+@pytest.fixture
+def environment(tmp_path):
+    shell_dir = os.path.join(tmp_path, "shell")
+    os.makedirs(shell_dir)
+    return {"ENVPROBE_CONFIG": shell_dir,
+            "ENVPROBE_SHELL_PID": "1",
+            "ENVPROBE_SHELL_TYPE": "bash",
+            "XDG_CONFIG_HOME": os.path.join(tmp_path, "config"),
+            "XDG_DATA_HOME": os.path.join(tmp_path, "data"),
+            "FOO": "bar"
+            }
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = os.path.join(tmp_path, "daemon.sock")
+    with daemon.Server(socket_path, idle_timeout=1) as srv:
+        thread = threading.Thread(target=srv.serve)
+        thread.start()
+        yield socket_path
+        thread.join()
+
+    assert(not os.path.exists(socket_path))
+
+
+def _execute(argv, environment, socket_path):
+    return daemon.execute(["envprobe"] + argv, "/envprobe", environment,
+                          os.getcwd(), socket_path)
+
+
+def test_not_running(tmp_path, environment):
+    socket_path = os.path.join(tmp_path, "daemon.sock")
+    assert(not daemon.is_running(socket_path))
+    assert(_execute(["main", "get", "FOO"], environment, socket_path) is None)
+
+
+def test_only_one_server(server):
+    assert(daemon.is_running(server))
+    with pytest.raises(OSError):
+        with daemon.Server(server):
+            pass
+    assert(daemon.is_running(server))
+
+
+def test_get(server, environment):
+    assert(_execute(["main", "get", "FOO"], environment, server) ==
+           (0, "FOO=bar\n", ""))
+
+    environment["FOO"] = "baz"
+    assert(_execute(["main", "get", "FOO"], environment, server) ==
+           (0, "FOO=baz\n", ""))
+
+    returncode, stdout, stderr = _execute(["main", "get", "ENVPROBE_CONFIG"],
+                                          environment, server)
+    assert(returncode == 1)
+    assert(not stdout)
+    assert("[ERROR]" in stderr)
+
+
+def test_set_writes_control_file(server, environment):
+    assert(_execute(["main", "set", "FOO", "qux"], environment, server) ==
+           (0, "", ""))
+
+    with open(os.path.join(environment["ENVPROBE_CONFIG"], "control.sh"),
+              'r') as f:
+        assert("export FOO=qux;" in f.read())
+
+
+def test_usage_error(server, environment):
+    returncode, stdout, stderr = _execute(["main", "get"], environment,
+                                          server)
+    assert(returncode == 2)
+    assert(not stdout)
+    assert("usage:" in stderr)
+
+
+def test_interactive_not_served(server, environment):
+    assert(_execute(["main", "save", "-p", "snap"], environment, server)
+           is None)
+
+
+def test_dispatch_requires_opt_in(monkeypatch):
+    monkeypatch.delenv(daemon.OPT_IN_VARIABLE, raising=False)
+    monkeypatch.setattr(daemon, "execute",
+                        lambda *args, **kwargs: (42, "", ""))
+    assert(daemon.dispatch(["envprobe", "main", "get", "FOO"], "/envprobe")
+           is None)
+
+    monkeypatch.setenv(daemon.OPT_IN_VARIABLE, "1")
+    assert(daemon.dispatch(["envprobe", "main", "get", "FOO"], "/envprobe")
+           == 42)
+
+
+def test_not_private(tmp_path, server, environment):
+    os.chmod(server, 0o666)
+    assert(_execute(["main", "get", "FOO"], environment, server) is None)
+    os.chmod(server, 0o600)
+
+    mode = os.stat(tmp_path).st_mode
+    os.chmod(tmp_path, 0o777)
+    try:
+        assert(_execute(["main", "get", "FOO"], environment, server) is None)
+    finally:
+        os.chmod(tmp_path, mode)
+
+    link = os.path.join(tmp_path, "link.sock")
+    os.symlink(server, link)
+    assert(_execute(["main", "get", "FOO"], environment, link) is None)
+
+    assert(_execute(["main", "get", "FOO"], environment, server) ==
+           (0, "FOO=bar\n", ""))
+
+
+def test_error_answered(server, environment, monkeypatch):
+    def handle_request(**kwargs):
+        raise OSError("Failed after executing.")
+
+    monkeypatch.setattr(daemon.Server, "handle_request",
+                        staticmethod(handle_request))
+    # The command might have been executed, so the client must not run it
+    # again.
+    returncode, stdout, stderr = _execute(["main", "set", "FOO", "qux"],
+                                          environment, server)
+    assert(returncode == 1)
+    assert(not stdout)
+    assert("[ERROR]" in stderr and "Failed after executing." in stderr)
@@ -264,3 +264,33 @@ def test_diff(dummy_shell, mock_envvar, dummy_env):
     assert(diff["USER"].diff_actions == [('-', "envprobe")])
     assert(diff["X"].diff_actions == [('+', 8)])
     assert(diff["INIT_PID"].diff_actions == [('-', 1), ('+', 42)])
+
+
+def test_diff_only_resolves_changed_variables(dummy_shell, mock_envvar):
+    shell, _ = dummy_shell
+    _, MockHeuristics = mock_envvar
+
+    class CountingHeuristic(EnvVarTypeHeuristic):
+        def __init__(self):
+            self.resolved = list()
+
+        def __call__(self, name, env=None):
+            self.resolved.append(name)
+            return MockHeuristics(name, env)
+
+    heuristic = CountingHeuristic()
+    osenv = {"VAR_{0}".format(i): str(i) for i in range(500)}
+    environment = Environment(shell, osenv, heuristic)
+    environment.stamp()
+    assert(not environment.diff())
+    assert(not heuristic.resolved)
+
+    var, _ = environment["VAR_42"]
+    heuristic.resolved.clear()
+    var.value = "foo"
+    environment.set_variable(var)
+
+    diff = environment.diff()
+    assert(list(diff.keys()) == ["VAR_42"])
+    assert(diff["VAR_42"].diff_actions == [('-', "42"), ('+', "foo")])
+    assert(heuristic.resolved == ["VAR_42", "VAR_42"])
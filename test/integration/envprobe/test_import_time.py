@@ -0,0 +1,120 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
+import pytest
+import subprocess  # nosec: The tests execute our own interpreter.
+import sys
+
+
+ENTRY_POINT = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir,
+                           os.pardir, "envprobe")
+
+CONSUME_ENVPROBE_MODULES = {
+    "envprobe",
+    "envprobe.commands",
+    "envprobe.commands.core",
+    "envprobe.commands.shortcuts",
+    "envprobe.compatibility",
+    "envprobe.daemon",
+    "envprobe.main",
+    "envprobe.settings",
+    "envprobe.settings.core",
+    "envprobe.shell",
+    "envprobe.shell.bash_like",
+    "envprobe.shell.core"
+}
+"""The modules of Envprobe that may be imported when the prompt hook consumes
+the control file."""
+
+CONSUME_FORBIDDEN_MODULES = {
+    "argparse",
+    "csv",
+    "envprobe.community_descriptions",
+    "envprobe.community_descriptions.downloader",
+    "envprobe.community_descriptions.local_data",
+    "envprobe.environment",
+    "envprobe.settings.config_file",
+    "http.client",
+    "sqlite3",
+    "ssl",
+    "subprocess",
+    "urllib.request",
+    "zipfile"
+}
+"""Expensive modules that must not be imported when consuming the control
+file."""
+
+
+@pytest.fixture
+def environment(tmp_path):
+    shell_dir = os.path.join(tmp_path, "shell")
+    os.makedirs(shell_dir)
+    env = dict(os.environ)
+    env.update({"ENVPROBE_CONFIG": shell_dir,
+                "ENVPROBE_SHELL_PID": "1",
+                "ENVPROBE_SHELL_TYPE": "bash",
+                "XDG_CONFIG_HOME": os.path.join(tmp_path, "config"),
+                "XDG_DATA_HOME": os.path.join(tmp_path, "data"),
+                "XDG_RUNTIME_DIR": os.path.join(tmp_path, "runtime")
+                })
+    return env
+
+
+def _imported_modules(argv, environment):
+    """Execute Envprobe with `argv` and return the modules that were imported
+    according to ``python -X importtime``.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime",  # nosec
+                             ENTRY_POINT] + argv,
+                            env=environment,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE,
+                            universal_newlines=True)
+    assert(result.returncode == 0)
+
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        modules.add(line.split('|')[-1].strip())
+    return modules
+
+
+def test_consume_import_budget(environment):
+    modules = _imported_modules(["config", "consume"], environment)
+
+    envprobe_modules = {m for m in modules if m.startswith("envprobe")}
+    assert(envprobe_modules <= CONSUME_ENVPROBE_MODULES)
+    assert(not modules & CONSUME_FORBIDDEN_MODULES)
+
+
+@pytest.mark.parametrize("argv", [["main", "get", "HOME"],
+                                  ["main", "HOME"],
+                                  ["main", "+PATH", "/foo"]
+                                  ])
+def test_hot_commands_do_not_build_parser(environment, argv):
+    modules = _imported_modules(argv, environment)
+    assert("argparse" not in modules)
+
+
+@pytest.mark.parametrize("argv", [["config", "consume"],
+                                  ["main", "list"]
+                                  ])
+def test_environment_not_created(environment, argv):
+    modules = _imported_modules(argv, environment)
+    assert("envprobe.environment" not in modules)
+    assert("envprobe.vartype_heuristics" not in modules)
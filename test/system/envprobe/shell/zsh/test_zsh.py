@@ -59,6 +59,40 @@ def test_alias(sh):
     assert("epc=envprobe-config" in result)
 
 
+def test_idle_prompt_does_not_start_python(sh, tmp_path):
+    calls_file = os.path.join(tmp_path, "python_calls.txt")
+
+    # Shadow the interpreter with a function that logs every invocation, so
+    # the calls made by the prompt hook can be observed.
+    retcode, _ = sh.execute_command("python3() {{ echo \"$*\" >> \"{0}\"; "
+                                    "command python3 \"$@\"; }}"
+                                    .format(calls_file), timeout=1)
+    assert(not retcode)
+
+    for _ in range(3):
+        retcode, _ = sh.execute_command("true", timeout=1)
+        assert(not retcode)
+    assert(not os.path.isfile(calls_file))
+
+    retcode, result = sh.execute_command("ep IDLE_VAR=foo", timeout=1)
+    assert(not retcode)
+    assert(not result)
+    _, result = sh.execute_command("echo $IDLE_VAR", timeout=1)
+    assert(result == "foo")
+
+    with open(calls_file, 'r') as f:
+        calls = f.read().splitlines()
+    assert(len(calls) == 2)
+    assert(calls[0].endswith("main IDLE_VAR=foo"))
+    assert(calls[1].endswith("config consume"))
+
+    retcode, _ = sh.execute_command("unset -f python3", timeout=1)
+    assert(not retcode)
+    retcode, result = sh.execute_command("ep ^IDLE_VAR", timeout=1)
+    assert(not retcode)
+    assert(not result)
+
+
 def test_get_variable(sh):
     retcode, _ = sh.execute_command("envprobe get", timeout=1)
     assert(retcode == 2)
@@ -14,10 +14,11 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from argparse import Namespace
+from argparse import ArgumentParser, Namespace
 import pytest
 
-from envprobe.commands.add import command
+from envprobe.commands.add import command, parse_fast, register
+from envprobe.shell import FakeShell
 
 
 class MockVar:
@@ -47,3 +48,36 @@ def test_add_not_array(args):
         args.VARIABLE = "TEST"
         args.VALUE = [""]
         command(args)
+
+
+class MockShell:
+    is_envprobe_capable = True
+    manages_environment_variables = True
+
+
+def _parse(argv):
+    parser = ArgumentParser()
+    register(parser.add_subparsers(), MockShell())
+    return parser.parse_args(["add"] + argv)
+
+
+@pytest.mark.parametrize("argv", [["PATH", "/foo"],
+                                  ["PATH", "/foo", "/bar"],
+                                  ["--position", "-1", "PATH", "/foo"],
+                                  ["--position", "2", "PATH", "/foo", "/bar"]
+                                  ])
+def test_parse_fast(argv):
+    assert(vars(parse_fast(argv, MockShell())) == vars(_parse(argv)))
+
+
+@pytest.mark.parametrize("argv", [[], ["PATH"], ["--position", "1", "PATH"],
+                                  ["--position", "X", "PATH", "/foo"],
+                                  ["--position=1", "PATH", "/foo"],
+                                  ["PATH", "/foo", "--position", "1"],
+                                  ["-h"]])
+def test_parse_fast_fallback(argv):
+    assert(parse_fast(argv, MockShell()) is None)
+
+
+def test_parse_fast_incapable_shell():
+    assert(parse_fast(["PATH", "/foo"], FakeShell()) is None)
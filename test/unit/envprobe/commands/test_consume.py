@@ -0,0 +1,45 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from argparse import ArgumentParser
+import pytest
+
+from envprobe.commands.consume import parse_fast, register
+from envprobe.shell import FakeShell
+
+
+class MockShell:
+    is_envprobe_capable = True
+
+
+def _parse(argv):
+    parser = ArgumentParser()
+    register(parser.add_subparsers(), MockShell())
+    return parser.parse_args(["consume"] + argv)
+
+
+@pytest.mark.parametrize("argv", [[], ["-d"], ["--detach"]])
+def test_parse_fast(argv):
+    assert(vars(parse_fast(argv, MockShell())) == vars(_parse(argv)))
+
+
+@pytest.mark.parametrize("argv", [["--det"], ["-d", "-d"], ["-h"], ["X"]])
+def test_parse_fast_fallback(argv):
+    assert(parse_fast(argv, MockShell()) is None)
+
+
+def test_parse_fast_incapable_shell():
+    assert(parse_fast([], FakeShell()) is None)
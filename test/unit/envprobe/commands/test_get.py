@@ -14,10 +14,11 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from argparse import Namespace
+from argparse import ArgumentParser, Namespace
 import pytest
 
-from envprobe.commands.get import command
+from envprobe.commands.get import command, parse_fast, register
+from envprobe.shell import FakeShell
 
 
 class MockVar:
@@ -83,3 +84,29 @@ def test_info_builtin(capfd, args):
     assert("Description" not in stdout)
     assert("Source" not in stdout)
     assert(not stderr)
+
+
+class MockShell:
+    is_envprobe_capable = True
+    manages_environment_variables = True
+
+
+def _parse(argv):
+    parser = ArgumentParser()
+    register(parser.add_subparsers(), MockShell())
+    return parser.parse_args(["get"] + argv)
+
+
+@pytest.mark.parametrize("argv", [["TEST"], ["A B"], [""]])
+def test_parse_fast(argv):
+    assert(vars(parse_fast(argv, MockShell())) == vars(_parse(argv)))
+
+
+@pytest.mark.parametrize("argv", [[], ["-i", "TEST"], ["TEST", "--info"],
+                                  ["TEST", "OTHER"]])
+def test_parse_fast_fallback(argv):
+    assert(parse_fast(argv, MockShell()) is None)
+
+
+def test_parse_fast_incapable_shell():
+    assert(parse_fast(["TEST"], FakeShell()) is None)
@@ -57,3 +57,32 @@ def test_description_source_parsing(csv_source):
 
     with pytest.raises(KeyError):
         p["__META__"]
+
+
+def test_description_source_record_hash(tmp_path, csv_source):
+    p = DescriptionSource(csv_source)
+    p.parse()
+    h = p.record_hash("MY_VAR")
+    assert(h == p.record_hash("MY_VAR"))
+    assert(h != p.record_hash("__INVALID__"))
+
+    # The same record in a differently named source hashes differently.
+    other_path = os.path.join(tmp_path, "other.csv")
+    with open(csv_source, 'r') as src, open(other_path, 'w') as dst:
+        dst.write(src.read())
+    o = DescriptionSource(other_path)
+    o.parse()
+    assert(o["MY_VAR"] == p["MY_VAR"])
+    assert(o.record_hash("MY_VAR") != h)
+
+    with pytest.raises(KeyError):
+        p.record_hash("__META__")
+
+    # Streamed records hash the same as the parsed ones.
+    streamed = DescriptionSource(csv_source)
+    assert(dict(streamed.records()) == {"MY_VAR": p["MY_VAR"],
+                                        "__INVALID__": p["__INVALID__"]})
+    for variable, record in streamed.records():
+        assert(streamed.record_hash(variable, record) ==
+               p.record_hash(variable))
+    assert(len(streamed) == 0)
@@ -0,0 +1,117 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
+import pytest
+
+from envprobe.community_descriptions.index import compile_index, \
+    DescriptionIndex, IndexTable
+from envprobe.settings.variable_information import VariableInformation
+
+
+RECORDS = {"PATH": {"type": "path",
+                    "description": "Where programs are found.",
+                    "source": "core"},
+           "EDITOR": {"type": "string",
+                      "description": None,
+                      "source": "core"},
+           "ÁRVÍZTŰRŐ": {"type": "",
+                         "description": "Tükörfúrógép.",
+                         "source": "unicode"}
+           }
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    path = os.path.join(tmp_path, "variables.idx")
+    assert(compile_index(RECORDS.items(), path) == 3)
+    yield path
+
+
+def test_lookup(index_file):
+    with open(index_file, 'rb') as handle:
+        table = IndexTable(handle.read())
+
+    assert(len(table) == 3)
+    assert(table.keys() == sorted(RECORDS.keys(),
+                                  key=lambda n: n.encode("utf-8")))
+    for name, record in RECORDS.items():
+        assert(name in table)
+        assert(table[name] == record)
+
+    assert("PAGER" not in table)
+    assert("" not in table)
+    with pytest.raises(KeyError):
+        table["ZZZ"]
+
+
+def test_undecodable_name(tmp_path):
+    # The name of a variable whose name is not valid UTF-8, as decoded by
+    # os.environ.
+    name = b"BAD_\xff".decode("utf-8", "surrogateescape")
+    path = os.path.join(tmp_path, "variables.idx")
+    assert(compile_index([(name, {"type": "string"})], path) == 1)
+
+    with open(path, 'rb') as handle:
+        table = IndexTable(handle.read())
+    assert(table.keys() == [name])
+    assert(name in table)
+    assert(table[name]["type"] == "string")
+    assert("BAD_\xff" not in table)
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        IndexTable(b"")
+    with pytest.raises(ValueError):
+        IndexTable(b"NOT AN INDEX FILE")
+
+
+def test_empty(tmp_path):
+    path = os.path.join(tmp_path, "variables.idx")
+    assert(compile_index([], path) == 0)
+
+    i = VariableInformation(DescriptionIndex(path))
+    assert(not i.keys())
+    assert(i["PATH"] is None)
+
+
+def test_missing(tmp_path):
+    i = VariableInformation(DescriptionIndex(os.path.join(tmp_path, "x.idx")))
+    assert(not i.keys())
+    assert(i["PATH"] is None)
+
+
+def test_variable_information(index_file):
+    i = VariableInformation(DescriptionIndex(index_file))
+    assert(i["PATH"]["type"] == "path")
+    assert(i["EDITOR"]["description"] is None)
+    assert(i["PAGER"] is None)
+    assert(dict(i.items()) == RECORDS)
+
+    with pytest.raises(PermissionError):
+        del i["PATH"]
+
+
+def test_replaced_file_is_remapped(index_file):
+    i = VariableInformation(DescriptionIndex(index_file))
+    assert(i["PAGER"] is None)
+
+    compile_index([("PAGER", {"type": "string",
+                              "description": "Pager.",
+                              "source": "core"})], index_file)
+    assert(i["PAGER"]["description"] == "Pager.")
+    assert(i["PATH"] is None)
@@ -41,3 +41,15 @@ def test_delete():
 
     with pytest.raises(KeyError):
         i.get_comment_for("foo")
+
+
+def test_record_hashes():
+    i = MetaConfiguration()
+    assert(i.record_hashes == dict())
+
+    i.record_hashes = {"FOO": "0123456789abcdef"}
+    hashes = i.record_hashes
+    assert(hashes == {"FOO": "0123456789abcdef"})
+
+    hashes["BAR"] = "fedcba9876543210"
+    assert("BAR" not in i.record_hashes)
@@ -14,12 +14,17 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import copy
 import io
 import json
 import os
+import pickle
 import pytest
 
-from envprobe.settings.config_file import ConfigurationFile
+from envprobe.compatibility import nullcontext
+from envprobe.settings.config_file import ConfigurationFile, JSONCodec, \
+    LockMode, LockedFileHandle, compact_json_codec, json_codec, read_cache, \
+    transaction
 
 
 @pytest.fixture
@@ -81,6 +86,78 @@ def test_accessors(tmp):
         print(c["x"])
 
 
+def test_nested_changes_tracked(tmp):
+    c = ConfigurationFile("test.json", {"dict": {"list": [1]},
+                                        "set": set()})
+    assert(not c.changed)
+
+    c["dict"]["list"][0] = 1  # Setting the same value is not a change.
+    c["set"].discard("x")
+    assert(not c.changed)
+
+    c["set"].add("x")
+    assert(c.changed)
+    c.save()
+    assert(not c.changed)
+
+    c["dict"]["list"].append({"nested": set()})
+    assert(c.changed)
+    c.save()
+    c["dict"]["list"][1]["nested"] |= {"y"}
+    assert(c.changed)
+    c.save()
+
+    c2 = ConfigurationFile("test.json")
+    c2.load()
+    assert(not c2.changed)
+    assert(c2["dict"] == {"list": [1, {"nested": {"y"}}]})
+    assert(c2["set"] == {"x"})
+
+
+def test_assigned_value_copied(tmp):
+    c = ConfigurationFile("test.json")
+    value = {"x": [1]}
+    c["key"] = value
+    c.save()
+    assert(not c.changed)
+
+    value["x"].append(2)  # The configuration stores a copy.
+    assert(not c.changed)
+    assert(c["key"] == {"x": [1]})
+
+    c["key"] = {"x": [1]}  # Setting an equal value is not a change.
+    assert(not c.changed)
+    c["key"]["x"].append(2)
+    assert(c.changed)
+
+
+def test_copies_untracked(tmp):
+    c = ConfigurationFile("test.json", {"dict": {"list": [1], "tuple": (2,)},
+                                        "set": {"x"}})
+
+    shallow = copy.copy(c["dict"])
+    assert(type(shallow) is dict)
+    shallow["new"] = True
+    assert(not c.changed)
+
+    deep = copy.deepcopy(c["dict"])
+    assert(deep == {"list": [1], "tuple": (2,)})
+    assert(type(deep) is dict and type(deep["list"]) is list)
+    deep["list"].append(3)
+    assert(not c.changed)
+
+    pickled = pickle.loads(pickle.dumps(c["dict"]))
+    assert(pickled == {"list": [1], "tuple": (2,)})
+    assert(type(pickled) is dict and type(pickled["list"]) is list)
+
+    for element in [copy.copy(c["set"]), copy.deepcopy(c["set"]),
+                    pickle.loads(pickle.dumps(c["set"]))]:
+        assert(type(element) is set)
+        element.add("y")
+    assert(c["set"] == {"x"})
+    assert(not c.changed)
+
+
 def test_readonly(tmp):
     c = ConfigurationFile("test.json", {"Default": True}, read_only=True)
     assert(len(c) == 1)
@@ -213,11 +290,11 @@ def test_context_saves(tmp):
                         "str": "Foobar"})
 
 
-def test_context_removes_file_readonly(tmp):
+def test_context_doesnt_create_file_readonly(tmp):
     assert(not os.path.isfile("test.json"))
 
     with ConfigurationFile("test.json", read_only=True):
-        assert(os.path.isfile("test.json"))
+        assert(not os.path.isfile("test.json"))
 
     assert(not os.path.isfile("test.json"))
 
@@ -231,6 +308,91 @@ def test_context_doesnt_remove_default_file_non_readonly(tmp):
     assert(os.path.isfile("test.json"))
 
 
+def test_context_reentrant(tmp):
+    def on_disk():
+        with open("test.json", 'r') as f:
+            return json.load(f)
+
+    c = ConfigurationFile("test.json")
+    with c:
+        lock = c._in_context
+        c["x"] = 1
+        with c as inner:
+            assert(inner is c)
+            assert(c._in_context is lock)  # The lock is not taken again.
+            assert(c["x"] == 1)  # The data is not reloaded.
+            c["y"] = 2
+        assert(c._in_context is lock)
+        assert(on_disk() == {})  # Only the outermost context saves.
+
+        with pytest.raises(EnvironmentError):
+            c.load()
+    assert(on_disk() == {"x": 1, "y": 2})
+    assert(not c._in_context)
+
+    r = ConfigurationFile("test.json", read_only=True)
+    with r:
+        with r:
+            assert(r["x"] == 1)
+        assert(r._in_context)
+    assert(not r._in_context)
+
+
+def test_transaction(tmp):
+    c = ConfigurationFile("test.json", {"default": True})
+    with c.transaction() as conf:
+        conf["x"] = 1
+    c2 = ConfigurationFile("test.json")
+    c2.load()
+    assert(c2["x"] == 1)
+
+    with pytest.raises(ValueError):
+        with c.transaction() as conf:
+            conf["x"] = 2
+            conf["y"] = [3]
+            del conf["default"]
+            raise ValueError()
+    # The changes were discarded, and the file was not written.
+    assert(c["x"] == 1 and "y" not in c and c["default"] is True)
+    assert(not c.changed)
+    c2.load()
+    assert(c2["x"] == 1 and "y" not in c2)
+
+    # A failing nested transaction discards the changes of the enclosing
+    # context too, but the enclosing context can continue.
+    with c:
+        c["x"] = 3
+        with pytest.raises(ValueError):
+            with c.transaction():
+                c["y"] = 4
+                raise ValueError()
+        assert(c["x"] == 1 and "y" not in c)
+        c["z"] = 5
+    c2.load()
+    assert(c2["x"] == 1 and c2["z"] == 5 and "y" not in c2)
+
+
+def test_transaction_helper(tmp):
+    c1 = ConfigurationFile("1.json")
+    c2 = ConfigurationFile("2.json", read_only=True)
+    plain = nullcontext({"x": 0})
+    with transaction(c1, None, c2, plain):
+        assert(c1._in_context and c2._in_context)
+        c1["x"] = 1
+        with plain as p:
+            p["x"] = 1
+    assert(not c1._in_context and not c2._in_context)
+    with plain as p:
+        assert(p["x"] == 1)
+
+    with pytest.raises(KeyError):
+        with transaction(c1):
+            c1["x"] = 2
+            raise KeyError()
+    c1.load()
+    assert(c1["x"] == 1)
+
+
 def test_nonlocal_file(tmp):
     c = ConfigurationFile(os.path.join("foo", "bar", "cfg.json"))
     c.load()
@@ -265,3 +427,191 @@ def test_extended_encode_decode(tmp):
     assert(c["mylist"] == a_list)
     assert(c["myset"] == a_set)
     assert(c["mytuple"] == a_tuple)
+
+
+@pytest.mark.parametrize("codec", [json_codec, compact_json_codec])
+def test_codec_round_trip(codec):
+    data = {"set": {"a", "b", (1, "c")},
+            "tuple": (1, [2, (3, 4)], {"x": set()}),
+            "list": [set(), (), [(5,)]],
+            "dict": {"nested": {"tuple": (None, True, 1.5)}},
+            "empty": {}
+            }
+    decoded = codec.decode(codec.encode(data))
+    assert(decoded == data)
+    assert(type(decoded["tuple"]) is tuple)
+    assert(type(decoded["tuple"][1][1]) is tuple)
+    assert(type(decoded["tuple"][2]["x"]) is set)
+    assert(type(decoded["list"][0]) is set)
+    assert(type(decoded["list"][1]) is tuple)
+    assert(type(decoded["list"][2][0]) is tuple)
+
+    # Containers without a tuple are not copied when encoding.
+    plain = {"list": [1, 2], "dict": {"x": "y"}}
+    assert(codec.decode(codec.encode(plain)) == plain)
+
+
+def test_codec_formats(tmp):
+    data = {"b": [1, 2], "a": {"x": "y"}}
+    assert(b'\n' not in compact_json_codec.encode(data))
+    assert(json_codec.encode(data).startswith(b'{\n  "a": {'))
+
+    with pytest.raises(ValueError):
+        JSONCodec().decode(b"")
+
+    # The files written by the different JSON codecs are interchangeable.
+    c = ConfigurationFile("test.json", codec=compact_json_codec)
+    c["set"] = {1, 2}
+    c.save()
+    with open("test.json", 'rb') as f:
+        assert(b' ' not in f.read())
+
+    c = ConfigurationFile("test.json")
+    c.load()
+    assert(c["set"] == {1, 2})
+    c["tuple"] = (1, 2)
+    c.save()
+
+    c = ConfigurationFile("test.json", codec=compact_json_codec)
+    c.load()
+    assert(c["tuple"] == (1, 2))
+
+
+def test_read_cache(tmp):
+    with open("test.json", 'w') as f:
+        json.dump({"Default": False, "list": [1, 2]}, f)
+    read_cache.clear()
+
+    c = ConfigurationFile("test.json", {"Default": True}, read_only=True)
+    c.load()
+    assert(c["Default"] is False)
+    assert(read_cache.misses == 1 and read_cache.hits == 0)
+
+    for _ in range(3):
+        with ConfigurationFile("test.json", read_only=True) as c2:
+            assert(c2["Default"] is False)
+            assert(c2["list"] == [1, 2])
+            c2["list"].append(3)  # Must not leak into the cache.
+    assert(read_cache.misses == 1 and read_cache.hits == 3)
+    assert(read_cache.hit_rate == 0.75)
+
+    # Modifications by a different writer invalidate the cached data.
+    with open("test.json", 'w') as f:
+        json.dump({"Default": True, "list": [1, 2, 3, 4]}, f)
+    c.load()
+    assert(c["Default"] is True)
+    assert(c["list"] == [1, 2, 3, 4])
+    assert(read_cache.misses == 2 and read_cache.hits == 3)
+
+    # Saving through a writable configuration invalidates the cached data.
+    with ConfigurationFile("test.json") as w:
+        w["list"] = []
+    c.load()
+    assert(c["list"] == [])
+    assert(read_cache.misses == 3 and read_cache.hits == 3)
+
+
+def test_read_cache_not_used_for_writing(tmp):
+    with open("test.json", 'w') as f:
+        json.dump({"Default": False}, f)
+    read_cache.clear()
+
+    ConfigurationFile("test.json", read_only=True).load()
+    with ConfigurationFile("test.json") as c:
+        assert(c["Default"] is False)
+        c["Default"] = True
+    assert(read_cache.hits == 0)
+
+    with ConfigurationFile("test.json", read_only=True) as c:
+        assert(c["Default"] is True)
+
+
+def test_lockline_opt_in(tmp):
+    with LockedFileHandle("test.json", 'w') as f:
+        f.write("{}")
+        with open("test.json.lock") as lock:
+            assert(not lock.read().strip())
+
+    with LockedFileHandle("test.json", 'r', lockline=True):
+        with open("test.json.lock") as lock:
+            assert(lock.read().strip().endswith(":sh"))
+    with open("test.json.lock") as lock:
+        assert(not lock.read().strip())
+
+    with pytest.raises(ValueError):
+        LockedFileHandle("test.json", lock_mode=LockMode.DIRECT,
+                         lockline=True)
+
+
+def test_direct_lock(tmp):
+    with LockedFileHandle("test.json", 'w', lock_mode=LockMode.DIRECT) as f:
+        f.write("{\"x\": 1}")
+
+    with LockedFileHandle("test.json", 'r', lock_mode=LockMode.DIRECT) as f:
+        # Shared locks do not exclude each other.
+        with LockedFileHandle("test.json", 'r', blocking=False,
+                              lock_mode=LockMode.DIRECT) as f2:
+            assert(f2.read() == "{\"x\": 1}")
+
+        # The file must not be truncated if the lock can not be acquired.
+        with pytest.raises(OSError):
+            with LockedFileHandle("test.json", 'w', blocking=False,
+                                  lock_mode=LockMode.DIRECT):
+                pass
+        assert(f.read() == "{\"x\": 1}")
+
+    with LockedFileHandle("test.json", 'w', lock_mode=LockMode.DIRECT) as f:
+        f.write("{}")
+    with open("test.json") as f:
+        assert(f.read() == "{}")
+    assert(not os.path.exists("test.json.lock"))
+
+
+def test_direct_lock_configuration(tmp):
+    c = ConfigurationFile("test.json", lock_mode=LockMode.DIRECT)
+    c["x"] = 1
+    c.save()
+
+    with ConfigurationFile("test.json", lock_mode=LockMode.DIRECT) as c2:
+        assert(c2["x"] == 1)
+        c2["y"] = 2
+
+    c3 = ConfigurationFile("test.json", lock_mode=LockMode.DIRECT)
+    c3.load()
+    assert(c3["x"] == 1)
+    assert(c3["y"] == 2)
+    assert(not os.path.exists("test.json.lock"))
+
+
+def test_save_replaces_atomically(tmp):
+    c = ConfigurationFile("test.json", fsync=True)
+    c["x"] = 1
+    c.save()
+    os.chmod("test.json", 0o640)
+    inode = os.stat("test.json").st_ino
+
+    c["x"] = 2
+    c.save()
+    assert(os.stat("test.json").st_ino != inode)
+    assert(os.stat("test.json").st_mode & 0o777 == 0o640)
+
+    c["x"] = object()
+    with pytest.raises(TypeError):
+        c.save()
+    with open("test.json") as f:
+        assert(json.load(f) == {"x": 2})
+    assert(sorted(os.listdir()) == ["test.json", "test.json.lock"])
+
+
+def test_save_through_symlink(tmp):
+    os.mkdir("real")
+    with open(os.path.join("real", "test.json"), 'w') as f:
+        json.dump({"x": 1}, f)
+    os.symlink(os.path.join("real", "test.json"), "test.json")
+
+    with ConfigurationFile("test.json") as c:
+        c["x"] = 2
+
+    assert(os.path.islink("test.json"))
+    with open(os.path.join("real", "test.json")) as f:
+        assert(json.load(f) == {"x": 2})
@@ -0,0 +1,111 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import json
+import os
+import pytest
+
+from envprobe.settings.information_database import InformationDatabase, \
+    migrate_information_files
+from envprobe.settings.variable_information import VariableInformation
+
+
+class MockExtendedData:
+    def __init__(self, type_, description):
+        self.type = type_
+        self.description = description
+
+
+@pytest.fixture
+def tmp(tmp_path):
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path  # Allow the tests to run.
+    os.chdir(cwd)
+
+
+def test_read_only_missing(tmp):
+    i = VariableInformation(InformationDatabase("test.sqlite",
+                                                read_only=True))
+    assert(i["FOO"] is None)
+    assert(not i.keys())
+    assert(not os.path.isfile("test.sqlite"))
+
+
+def test_set_get_delete(tmp):
+    i = VariableInformation(InformationDatabase("test.sqlite"))
+    i.set("FOO", MockExtendedData("string", "Foo."), "test")
+    i.set("BAR", MockExtendedData(None, "Bar."), "local")
+    assert(os.path.isfile("test.sqlite"))
+
+    r = VariableInformation(InformationDatabase("test.sqlite",
+                                                read_only=True))
+    assert(r["FOO"] == {"type": "string",
+                        "description": "Foo.",
+                        "source": "test"})
+    # Unset fields are not present, like in the JSON files.
+    assert(r["BAR"] == {"description": "Bar.", "source": "local"})
+    assert(r["BAZ"] is None)
+    assert(r.keys() == ["BAR", "FOO"])
+
+    with pytest.raises(PermissionError):
+        r.set("BAZ", MockExtendedData("string", "Baz."), "test")
+    with pytest.raises(PermissionError):
+        del r["FOO"]
+
+    del i["FOO"]
+    del i["NEVER EXISTED"]
+    assert(r["FOO"] is None)
+    assert(r.keys() == ["BAR"])
+
+
+def test_rollback_on_error(tmp):
+    db = InformationDatabase("test.sqlite")
+    VariableInformation(db).set("FOO", MockExtendedData("string", "Foo."),
+                                "test")
+
+    with pytest.raises(ValueError):
+        with db as conf:
+            del conf["variables"]["FOO"]
+            raise ValueError("Abort.")
+
+    assert(VariableInformation(db)["FOO"]["source"] == "test")
+
+
+def test_migrate(tmp):
+    os.makedirs("variables")
+    with open(os.path.join("variables", "F.json"), 'w') as f:
+        json.dump({"variables": {"FOO": {"type": "string",
+                                         "description": "Foo.",
+                                         "source": "test"},
+                                 "FOOBAR": {"type": "path",
+                                            "description": None,
+                                            "source": "local"}}}, f)
+    with open(os.path.join("variables", "P.json"), 'w') as f:
+        json.dump({"variables": {"PATH": {"type": "path",
+                                          "description": "Path.",
+                                          "source": "test"}}}, f)
+
+    assert(migrate_information_files("variables", "variables.sqlite") == 3)
+    assert(not os.path.exists("variables"))
+
+    i = VariableInformation(InformationDatabase("variables.sqlite",
+                                                read_only=True))
+    assert(i.keys() == ["FOO", "FOOBAR", "PATH"])
+    assert(i["FOOBAR"]["type"] == "path")
+    assert(i["PATH"]["description"] == "Path.")
+
+    assert(migrate_information_files("variables", "variables.sqlite") == 0)
@@ -14,7 +14,11 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from envprobe.settings.snapshot import Snapshot
+import os
+import pytest
+
+from envprobe.settings.config_file import ConfigurationFile
+from envprobe.settings.snapshot import K_UNSETS, K_VARIABLES, Snapshot
 
 
 def test_setup():
@@ -40,3 +44,29 @@ def test_delete():
     assert(s["FOO"] is s.UNDEFINE)
     assert(s["BAR"] is None)
     assert(s.keys() == {"FOO"})
+
+
+def test_transaction(tmp_path):
+    c = ConfigurationFile(os.path.join(tmp_path, "snapshot.json"),
+                          Snapshot.config_schema)
+    s = Snapshot(c)
+    with s.transaction():
+        s["FOO"] = 1
+        del s["BAR"]
+        assert(s["FOO"] == 1)
+        # The changes are only saved once the transaction is done.
+        c2 = ConfigurationFile(os.path.join(tmp_path, "snapshot.json"),
+                               Snapshot.config_schema, read_only=True)
+        c2.load()
+        assert(not c2[K_VARIABLES] and not c2[K_UNSETS])
+
+    s2 = Snapshot(c2)
+    assert(s2["FOO"] == 1)
+    assert(s2["BAR"] is s2.UNDEFINE)
+
+    with pytest.raises(KeyError):
+        with s.transaction():
+            s["BAZ"] = 2
+            raise KeyError("BAZ")
+    assert(s["BAZ"] is None)
+    assert(Snapshot(c2)["BAZ"] is None)
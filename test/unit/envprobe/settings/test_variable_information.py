@@ -56,3 +56,28 @@ def test_delete():
     assert(i["FOO"] is None)
     assert(i["BAR"] is None)
     assert(not i.keys())
+
+
+def test_bulk_update():
+    i = VariableInformation()
+    i.set("FOO", MockExtendedData(), "test")
+    i.set("BAR", MockExtendedData(), "test")
+
+    i.bulk_update([("BAZ", MockExtendedData(), "bulk"),
+                   ("FOO", MockExtendedData(), "bulk")],
+                  ["BAR", "NEVER EXISTED"])
+
+    assert(i.keys() == {"BAZ", "FOO"})
+    assert(i["FOO"]["source"] == "bulk")
+    assert(i["BAZ"]["type"] == "mock")
+    assert(i["BAR"] is None)
+
+
+def test_get_many():
+    i = VariableInformation()
+    i.set("FOO", MockExtendedData(), "test")
+
+    records = i.get_many(["FOO", "BAR"])
+    assert(records.keys() == {"FOO", "BAR"})
+    assert(records["FOO"]["source"] == "test")
+    assert(records["BAR"] is None)
@@ -14,9 +14,12 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from copy import deepcopy
+import os
 import pytest
 
 from envprobe.compatibility import nullcontext
+from envprobe.settings.config_file import ConfigurationFile
 from envprobe.settings.variable_tracking import VariableTracking
 
 
@@ -114,3 +117,67 @@ def test_empty_config():
 
     with pytest.raises(KeyError):
         t.track_local("FOO")
+
+
+def test_tracked_subset():
+    t = VariableTracking()
+    t.local_tracking = False
+    t.track_local("LOCAL_TRACKED")
+    t.ignore_global("GLOBAL_IGNORED")
+    t.track_global("GLOBAL_TRACKED")
+
+    assert(t.tracked_subset([]) == set())
+    assert(t.tracked_subset(["DEFAULT", "LOCAL_TRACKED", "GLOBAL_IGNORED",
+                             "GLOBAL_TRACKED"])
+           == {"LOCAL_TRACKED", "GLOBAL_TRACKED"})
+
+    t.local_tracking = True
+    assert(t.tracked_subset({"DEFAULT", "GLOBAL_IGNORED"}) == {"DEFAULT"})
+
+
+def test_tracked_subset_enters_configuration_once():
+    class CountingContext:
+        def __init__(self, data):
+            self.data = data
+            self.entered = 0
+
+        def __enter__(self):
+            self.entered += 1
+            return self.data
+
+        def __exit__(self, *args):
+            pass
+
+    L = CountingContext(deepcopy(VariableTracking.config_schema_local))
+    G = CountingContext(deepcopy(VariableTracking.config_schema_global))
+    t = VariableTracking(G, L)
+
+    variables = ["VAR_{0}".format(i) for i in range(400)]
+    assert(t.tracked_subset(variables) == set(variables))
+    assert(L.entered == 1)
+    assert(G.entered == 1)
+
+
+def test_transaction(tmp_path):
+    global_file = ConfigurationFile(os.path.join(tmp_path, "global.json"),
+                                    VariableTracking.config_schema_global)
+    local_file = ConfigurationFile(os.path.join(tmp_path, "local.json"),
+                                   VariableTracking.config_schema_local)
+    t = VariableTracking(global_file, local_file)
+    with t.transaction():
+        t.track_global("FOO")
+        t.ignore_local("FOO")
+        t.ignore_global("BAR")
+        assert(not t.is_tracked("FOO"))
+        assert(global_file._depth == 1 and local_file._depth == 1)
+
+    t2 = VariableTracking(
+        ConfigurationFile(os.path.join(tmp_path, "global.json"),
+                          VariableTracking.config_schema_global,
+                          read_only=True),
+        ConfigurationFile(os.path.join(tmp_path, "local.json"),
+                          VariableTracking.config_schema_local,
+                          read_only=True))
+    assert(t2.is_tracked_global("FOO"))
+    assert(not t2.is_tracked_local("FOO"))
+    assert(not t2.is_tracked("BAR"))
@@ -0,0 +1,136 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import json
+import os
+import pytest
+
+from envprobe.settings.vartype_cache import VartypeCache
+
+
+@pytest.fixture
+def tmp(tmp_path):
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path  # Allow the tests to run.
+    os.chdir(cwd)
+
+
+def test_missing(tmp):
+    c = VartypeCache("cache.json")
+    assert(not c.loaded)
+    c.load()
+    assert(c.loaded)
+    assert("FOO" not in c)
+    with pytest.raises(KeyError):
+        c["FOO"]
+
+    c.save()
+    assert(not os.path.isfile("cache.json"))
+
+
+def test_save_and_load(tmp):
+    c = VartypeCache("dir/cache.json")
+    c.load(["key"])
+    c["FOO"] = "string"
+    c["_HIDDEN"] = False
+    c["BAR"] = None
+    c.save()
+    assert(os.path.isfile("dir/cache.json"))
+    assert(not [f for f in os.listdir("dir") if f.endswith(".tmp")])
+
+    r = VartypeCache("dir/cache.json")
+    r.load(["key"])
+    assert(r["FOO"] == "string")
+    assert(r["_HIDDEN"] is False)
+    assert("BAR" in r)
+    assert(r["BAR"] is None)
+
+
+def test_unchanged_not_saved(tmp):
+    c = VartypeCache("cache.json")
+    c.load()
+    c["FOO"] = "string"
+    c.save()
+    os.remove("cache.json")
+
+    c["FOO"] = "string"
+    c.save()
+    assert(not os.path.isfile("cache.json"))
+
+
+def test_key_mismatch(tmp):
+    c = VartypeCache("cache.json")
+    c.load(["key"])
+    c["FOO"] = "string"
+    c.save()
+
+    r = VartypeCache("cache.json")
+    r.load(["other-key"])
+    assert("FOO" not in r)
+
+
+def test_source_change_invalidates(tmp):
+    os.mkdir("variables")
+    with open("variables/F.json", 'w') as f:
+        json.dump({"variables": {}}, f)
+    with open("meta.json", 'w') as f:
+        f.write("{}")
+    sources = ["variables", "meta.json", "missing.sqlite"]
+
+    c = VartypeCache("cache.json", sources)
+    c.load()
+    c["FOO"] = "string"
+    c.save()
+
+    r = VartypeCache("cache.json", sources)
+    r.load()
+    assert(r["FOO"] == "string")
+
+    # Rewriting a file in place does not change the directory's timestamp.
+    stat = os.stat("variables/F.json")
+    os.utime("variables/F.json", ns=(stat.st_atime_ns,
+                                     stat.st_mtime_ns + 1000000000))
+    r = VartypeCache("cache.json", sources)
+    r.load()
+    assert("FOO" not in r)
+    r["FOO"] = "path"
+    r.save()
+
+    r = VartypeCache("cache.json", sources)
+    r.load()
+    assert(r["FOO"] == "path")
+
+    with open("missing.sqlite", 'w') as f:
+        f.write("x")
+    r = VartypeCache("cache.json", sources)
+    r.load()
+    assert("FOO" not in r)
+
+
+def test_corrupt_file(tmp):
+    with open("cache.json", 'w') as f:
+        f.write("{not JSON")
+
+    c = VartypeCache("cache.json")
+    c.load()
+    assert("FOO" not in c)
+    c["FOO"] = "string"
+    c.save()
+
+    r = VartypeCache("cache.json")
+    r.load()
+    assert(r["FOO"] == "string")
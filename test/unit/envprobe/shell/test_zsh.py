@@ -46,6 +46,7 @@ def test_load(sh):
     assert(sh.is_envprobe_capable)
     assert(sh.manages_environment_variables)
     assert("precmd_functions" in sh.get_shell_hook(""))
+    assert(sh.control_file in sh.get_shell_hook(""))
 
 
 def test_set(sh):
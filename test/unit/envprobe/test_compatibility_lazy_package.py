@@ -0,0 +1,49 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import pytest
+
+from envprobe import compatibility
+from envprobe.compatibility import lazy_package, Version
+
+
+def test_lazy_package():
+    namespace = dict()
+    getter, lister = lazy_package("envprobe", namespace,
+                                  submodules=["compatibility"],
+                                  attributes={"Version": "compatibility"})
+
+    assert("Version" not in namespace)
+    assert(getter("compatibility") is compatibility)
+    assert(getter("Version") is Version)
+    assert(namespace["Version"] is Version)
+
+    with pytest.raises(AttributeError):
+        getter("Missing")
+
+    assert(lister() == ["Version", "compatibility"])
+
+
+def test_lazy_package_without_module_getattr(monkeypatch):
+    monkeypatch.setattr(compatibility.sys, "version_info", (3, 6, 15))
+    namespace = dict()
+    lazy_package("envprobe", namespace,
+                 submodules=["compatibility"],
+                 attributes={"Version": "compatibility"})
+
+    # Only the attributes are bound, the submodules are left to the import
+    # system.
+    assert(namespace == {"Version": Version})
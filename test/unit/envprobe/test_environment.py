@@ -89,3 +89,20 @@ def test_apply_change(env):
 
     assert(env.current_environment["TEST"] == "Foo")
     assert("TEST" not in env.stamped_environment)
+
+
+def test_variables(env):
+    env.stamp()
+    env.set_variable(MockVar("NEW", "Bar"))
+
+    current = env.variables(["TEST", "NEW", "UNDEFINED"])
+    assert(current.keys() == {"TEST", "NEW", "UNDEFINED"})
+    assert(current["TEST"][0].value == "Foo")
+    assert(current["TEST"][1])
+    assert(current["NEW"][0].value == "Bar")
+    assert(not current["UNDEFINED"][1])
+
+    stamped = env.variables(["TEST", "NEW"], stamped=True)
+    assert(stamped["TEST"][1])
+    assert(stamped["NEW"][0].value == "")
+    assert(not stamped["NEW"][1])
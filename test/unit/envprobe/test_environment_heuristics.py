@@ -17,8 +17,10 @@
 import pytest
 
 from envprobe.environment import EnvVarTypeHeuristic, HeuristicStack, \
-        create_environment_variable
-from envprobe.vartype_heuristics import ConfigurationResolvedHeuristic
+        create_environment_variable, create_environment_variables
+from envprobe.vartype_heuristics import ConfigurationResolvedHeuristic, \
+        IGNORED_NAME_RULES, NameRulesHeuristic, STANDARD_NAME_RULES, \
+        assemble_standard_type_heuristics_pipeline
 
 
 def test_default():
@@ -129,3 +131,238 @@ def test_resolving_heuristic():
     assert(p("pathlike") == "path")
     assert(p("USER") == "string")
     assert(p("foo") is None)
+
+
+class CountingHeuristic(EnvVarTypeHeuristic):
+    cacheable = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, name, env=None):
+        self.calls += 1
+        if name == "test":
+            return "test"
+        if name == "break":
+            return False
+        return None
+
+
+class MockCache(dict):
+    def __init__(self):
+        super().__init__()
+        self.key = None
+
+    @property
+    def loaded(self):
+        return self.key is not None
+
+    def load(self, key=None):
+        self.key = key
+
+
+def test_cache():
+    counting = CountingHeuristic()
+    cache = MockCache()
+    p = HeuristicStack(cache)
+    p += EnvVarTypeHeuristic()
+    p += NumericHeuristic()
+    p += counting
+
+    assert(p("test", {}) == "test")
+    assert(cache.key == ["{0}.{1}".format(__name__, "CountingHeuristic")])
+    assert(cache == {"test": "test"})
+    assert(p("test", {}) == "test")
+    assert(counting.calls == 1)
+
+    assert(p("break", {}) is None)
+    assert(p("break", {}) is None)
+    assert(cache["break"] is False)
+    assert(counting.calls == 2)
+
+    # The result of the non-cacheable heuristics below the cached ones is not
+    # stored, as it depends on the value of the variable.
+    assert(p("variable", {"variable": "5"}) == "numeric")
+    assert(p("variable", {"variable": "X"}) == "string")
+    assert(cache["variable"] is None)
+    assert(counting.calls == 3)
+
+
+def test_cache_not_cacheable():
+    cache = MockCache()
+    p = HeuristicStack(cache)
+    p += EnvVarTypeHeuristic()
+    p += TestHeuristic()
+
+    assert(p("test") == "test")
+    assert(not cache.loaded)
+    assert(not cache)
+
+
+class BatchHeuristic(EnvVarTypeHeuristic):
+    def __init__(self):
+        self.batches = list()
+
+    def __call__(self, name, env=None):
+        raise AssertionError("Batch heuristic called for a single name.")
+
+    def resolve_many(self, names, env=None):
+        self.batches.append(list(names))
+        return {name: "batch" for name in names if name.startswith("b")}
+
+
+def test_resolve_many():
+    batch = BatchHeuristic()
+    p = HeuristicStack()
+    p += EnvVarTypeHeuristic()
+    p += batch
+    p += TestHeuristic()
+
+    assert(p.resolve_many(["test", "break", "bar", "foo", "bar"]) ==
+           {"test": "test", "break": None, "bar": "batch", "foo": "string"})
+    # Every heuristic is executed once, with the unresolved names only.
+    assert(batch.batches == [["bar", "foo"]])
+
+    assert(p.resolve_many([]) == dict())
+
+
+def test_resolve_many_cache():
+    counting = CountingHeuristic()
+    cache = MockCache()
+    p = HeuristicStack(cache)
+    p += EnvVarTypeHeuristic()
+    p += NumericHeuristic()
+    p += counting
+
+    assert(p.resolve_many(["test", "variable"], {"variable": "5"}) ==
+           {"test": "test", "variable": "numeric"})
+    assert(counting.calls == 2)
+    assert(p.resolve_many(["test", "variable", "break"], {"variable": "X"}) ==
+           {"test": "test", "variable": "string", "break": None})
+    assert(counting.calls == 3)
+    assert(cache == {"test": "test", "variable": None, "break": False})
+
+
+def test_create_environment_variables():
+    p = HeuristicStack()
+    p += EnvVarTypeHeuristic()
+    p += NumericHeuristic()
+    p += TestHeuristic()
+
+    env = {"variable": "5", "other": "X"}
+    variables = create_environment_variables(
+        ["variable", "other", "undefined", "break"], env, p)
+    assert(variables.keys() == {"variable", "other", "undefined"})
+    assert(variables["variable"].value == 5)
+    assert(variables["other"].value == "X")
+    assert(variables["undefined"].value == "")
+
+
+class CountingConfigurationStore(MockConfigurationStore):
+    loads = list()
+
+    def __init__(self, name):
+        self.loads.append(name)
+
+
+class BatchConfigurationStore(CountingConfigurationStore):
+    def get_many(self, names):
+        return {name: self[name] for name in names}
+
+
+def test_resolving_heuristic_many():
+    for store in [CountingConfigurationStore, BatchConfigurationStore]:
+        store.loads.clear()
+        h = ConfigurationResolvedHeuristic(store,
+                                           group_key=lambda name: name[0])
+        assert(h.resolve_many(["pathlike", "pwd", "USER", "foo"]) ==
+               {"pathlike": "path", "USER": "string"})
+        assert(store.loads == ["pathlike", "USER", "foo"])
+
+    CountingConfigurationStore.loads.clear()
+    h = ConfigurationResolvedHeuristic(CountingConfigurationStore)
+    assert(h.resolve_many(["pathlike", "pwd"]) == {"pathlike": "path"})
+    assert(CountingConfigurationStore.loads == ["pathlike", "pwd"])
+
+    # The group loader decides the grouping instead of the group key.
+    CountingConfigurationStore.loads.clear()
+    h = ConfigurationResolvedHeuristic(
+        CountingConfigurationStore, group_key=lambda name: name[0],
+        group_loader=lambda names: [(BatchConfigurationStore(names[0]),
+                                     list(names))])
+    assert(h.resolve_many(["pathlike", "pwd", "USER", "foo"]) ==
+           {"pathlike": "path", "USER": "string"})
+    assert(CountingConfigurationStore.loads == ["pathlike"])
+
+
+def test_name_rules():
+    h = NameRulesHeuristic([("exact", "FOO", "exact"),
+                            ("suffix", "_DIR", "path"),
+                            ("prefix", "FOO", "prefix"),
+                            ("glob", "*_DIR_?", "glob"),
+                            ("prefix", "", "fallback"),
+                            ("prefix", "FOO_", "never"),
+                            ("glob", "X*", "never")
+                            ])
+    assert(h("FOO") == "exact")
+    assert(h("FOO_DIR") == "path")
+    assert(h("FOO_BAR") == "prefix")
+    assert(h("BAR_DIR_1") == "glob")
+    assert(h("BAR_DIR_12") == "fallback")
+    assert(h("X.Y") == "fallback")
+    assert(h("") == "fallback")
+
+    h = NameRulesHeuristic([("glob", "A.B*", False)])
+    assert(h("A.BC") is False)
+    assert(h("AXBC") is None)
+
+    h = NameRulesHeuristic([])
+    assert(h("FOO") is None)
+
+    with pytest.raises(ValueError):
+        NameRulesHeuristic([("regex", ".*", "string")])
+
+
+def test_name_rules_cache_key():
+    rules = [("exact", "FOO", "string")]
+    assert(NameRulesHeuristic(rules).cache_key ==
+           NameRulesHeuristic(list(rules)).cache_key)
+    assert(NameRulesHeuristic(rules).cache_key !=
+           NameRulesHeuristic(rules + [("exact", "BAR", "path")]).cache_key)
+
+
+def test_standard_name_rules():
+    ignored = NameRulesHeuristic(IGNORED_NAME_RULES)
+    standard = NameRulesHeuristic(STANDARD_NAME_RULES)
+
+    expected = {"PATH": 'path',
+                "LD_LIBRARY_PATH": 'path',
+                "PATHS": None,
+                "MY_PID": 'numeric',
+                "PORT": 'numeric',
+                "_HIDDEN": False,
+                "_HIDDEN_PATH": False,
+                "ENVPROBE_CONFIG": False,
+                "ENVPROBE": None,
+                "USER": None,
+                "": None
+                }
+    for name, kind in expected.items():
+        result = ignored(name)
+        if result is None:
+            result = standard(name)
+        assert(result == kind)
+
+
+def test_standard_pipeline_name_rules():
+    p = assemble_standard_type_heuristics_pipeline(
+        MockConfigurationStore, MockConfigurationStore,
+        name_rules=[("suffix", "_PORT", "string"),
+                    ("exact", "pathlike", "string")])
+
+    assert(p("_PATH") is None)
+    assert(p("FOO_PATH") == "path")
+    assert(p("FOO_PORT") == "string")
+    assert(p("OTHER_PORT") == "string")
+    assert(p("PORT") == "numeric")
+    assert(p("pathlike") == "path")
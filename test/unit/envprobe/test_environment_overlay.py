@@ -0,0 +1,104 @@
+# Copyright (C) 2018 Whisperity
+#
+# SPDX-License-Identifier: GPL-3.0
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import pytest
+import random
+
+from envprobe.environment import OverlayMapping
+
+
+@pytest.fixture
+def base():
+    return {"A": "a", "B": "b", "C": "c"}
+
+
+def test_read_through(base):
+    overlay = OverlayMapping(base)
+    assert(overlay["A"] == "a")
+    assert("B" in overlay)
+    assert("X" not in overlay)
+    assert(len(overlay) == 3)
+    assert(overlay == base)
+
+    with pytest.raises(KeyError):
+        overlay["X"]
+
+
+def test_changes_do_not_touch_base(base):
+    overlay = OverlayMapping(base)
+    overlay["A"] = "x"
+    overlay["D"] = "d"
+    del overlay["B"]
+
+    assert(overlay == {"A": "x", "C": "c", "D": "d"})
+    assert(base == {"A": "a", "B": "b", "C": "c"})
+    assert(list(overlay) == ["A", "C", "D"])
+
+    with pytest.raises(KeyError):
+        overlay["B"]
+    with pytest.raises(KeyError):
+        del overlay["B"]
+
+    overlay["B"] = "y"
+    assert(overlay["B"] == "y")
+    assert(len(overlay) == 4)
+
+
+def test_copy(base):
+    overlay = OverlayMapping(base)
+    overlay["A"] = "x"
+    del overlay["C"]
+
+    copy = overlay.copy()
+    assert(copy == overlay)
+
+    copy["A"] = "y"
+    copy["C"] = "z"
+    del copy["B"]
+    assert(overlay == {"A": "x", "B": "b"})
+    assert(copy == {"A": "y", "C": "z"})
+
+    # Overlays over an overlay are flattened to the original base.
+    assert(OverlayMapping(copy) == copy)
+    assert(OverlayMapping(copy)._base is base)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_same_as_dict(base, seed):
+    rng = random.Random(seed)
+    expected = dict(base)
+    overlay = OverlayMapping(base)
+
+    for _ in range(100):
+        key = rng.choice("ABCDEF")
+        action = rng.randrange(4)
+        if action == 0:
+            expected[key] = overlay[key] = str(rng.random())
+        elif action == 1:
+            if key in expected:
+                del expected[key]
+                del overlay[key]
+            else:
+                with pytest.raises(KeyError):
+                    del overlay[key]
+        elif action == 2:
+            overlay = overlay.copy()
+        else:
+            assert((key in overlay) == (key in expected))
+            assert(overlay.get(key) == expected.get(key))
+
+        assert(len(overlay) == len(expected))
+        assert(dict(overlay) == expected)
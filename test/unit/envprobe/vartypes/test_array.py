@@ -14,8 +14,11 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from difflib import ndiff
 import pytest
+import random
 
+from envprobe.vartypes.array import diff_elements
 from envprobe.vartypes.colon_separated import ColonSeparatedArray
 from envprobe.vartypes.semi_separated import SemicolonSeparatedArray
 
@@ -180,6 +183,118 @@ def test_diff():
     assert(diff[2] == ('-', "Baz"))
 
 
+def _ndiff_elements(old, new):
+    """The element diff that was implemented with :py:func:`difflib.ndiff`,
+    used as the reference implementation."""
+    ret = list()
+    for line in ndiff(old, new):
+        parts = line.split(' ', 1)
+        mode, value = parts[0], parts[1]
+        if mode == '-':
+            ret.append(('-', value))
+        elif mode == '':
+            ret.append(('=', value[1:]))
+        elif mode == '+':
+            ret.append(('+', value))
+    return ret
+
+
+def _lcs_length(old, new):
+    row = [0] * (len(new) + 1)
+    for o in old:
+        previous_diagonal = 0
+        for j, n in enumerate(new):
+            previous_diagonal, row[j + 1] = row[j + 1], \
+                previous_diagonal + 1 if o == n \
+                else max(row[j + 1], row[j])
+    return row[-1]
+
+
+def _per_mode(diff):
+    return {mode: [value for m, value in diff if m == mode]
+            for mode in "-=+"}
+
+
+def _check_diff(old, new, diff):
+    assert([v for m, v in diff if m in "-="] == old)
+    assert([v for m, v in diff if m in "=+"] == new)
+    # Removals always come before additions in a run of changes.
+    for previous, current in zip(diff, diff[1:]):
+        assert(not (previous[0] == '+' and current[0] == '-'))
+
+
+def test_diff_elements_examples():
+    assert(diff_elements([], []) == [])
+    assert(diff_elements(["a"], []) == [('-', "a")])
+    assert(diff_elements([], ["a"]) == [('+', "a")])
+    assert(diff_elements(["a", "b", "c"], ["a", "x", "c"]) ==
+           [('=', "a"), ('-', "b"), ('+', "x"), ('=', "c")])
+    assert(diff_elements(["a", "b"], ["c", "d"]) ==
+           [('-', "a"), ('-', "b"), ('+', "c"), ('+', "d")])
+    assert(diff_elements(["x", "a", "b", "c", "y"],
+                         ["a", "c", "z", "y", "b"]) ==
+           [('-', "x"), ('=', "a"), ('-', "b"), ('=', "c"), ('+', "z"),
+            ('=', "y"), ('+', "b")])
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_diff_elements_minimal(seed):
+    """The edit script is valid and minimal for arbitrary sequences, even
+    with many repeated elements."""
+    rng = random.Random(seed)
+    alphabet = "abcde"[:rng.randint(1, 5)]
+    old = [rng.choice(alphabet) for _ in range(rng.randint(0, 30))]
+    new = [rng.choice(alphabet) for _ in range(rng.randint(0, 30))]
+
+    diff = diff_elements(old, new)
+    _check_diff(old, new, diff)
+    lcs = _lcs_length(old, new)
+    assert(len(_per_mode(diff)['=']) == lcs)
+    assert(len(_per_mode(_ndiff_elements(old, new))['=']) <= lcs)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_diff_elements_matches_ndiff(seed):
+    """For arrays of distinct elements (like PATH) changed by removing
+    elements and adding new ones, the result is the same as the old
+    implementation's. Only the order of removals and additions in a run of
+    changes may differ, as ndiff interleaves similar-looking elements."""
+    rng = random.Random(seed)
+    old = ["/opt/module-{}/bin".format(i)
+           for i in rng.sample(range(1000), rng.randint(0, 40))]
+    new = list()
+    for element in old:
+        while rng.random() < 0.2:
+            new.append("/usr/local/new-{}/bin".format(rng.randint(0, 10**6)))
+        if rng.random() > 0.3:
+            new.append(element)
+    new = list(dict.fromkeys(new))
+
+    diff = diff_elements(old, new)
+    reference = _ndiff_elements(old, new)
+    _check_diff(old, new, diff)
+    assert(_per_mode(diff) == _per_mode(reference))
+    assert([m for m, _ in diff if m == '='] ==
+           [m for m, _ in reference if m == '='])
+    if all(not (a[0] == '+' and b[0] == '-')
+           for a, b in zip(reference, reference[1:])):
+        assert(diff == reference)
+
+
+def test_diff_elements_long():
+    old = ["/opt/module-{}/bin".format(i) for i in range(1000)]
+
+    new = old[:400] + ["/opt/module-{}/lib".format(i)
+                       for i in range(400, 600)] + old[600:]
+    diff = diff_elements(old, new)
+    _check_diff(old, new, diff)
+    assert(len(_per_mode(diff)['=']) == 800)
+
+    # Too different sequences still result in a valid diff.
+    new = list(reversed(old))
+    _check_diff(old, new, diff_elements(old, new))
+
+
 def test_no_diff():
     a = ColonSeparatedArray("test_array", "Foo:Bar")
     diff = ColonSeparatedArray.diff(a, a)
@@ -207,6 +322,47 @@ def test_apply_diff():
     assert(a.value == ["Foo", "Baz", "Qux"])
 
 
+def test_contains():
+    a = ColonSeparatedArray("test_array", "Foo:Bar:Foo")
+    assert("Foo" in a)
+    assert("Baz" not in a)
+
+    a.remove_value("Foo")
+    assert("Foo" not in a)
+    a.insert_at(0, "Baz")
+    assert("Baz" in a)
+    a[0] = "Qux"
+    assert("Baz" not in a)
+    del a[0]
+    assert("Qux" not in a)
+    a.value = "Foo"
+    assert("Foo" in a)
+    assert("Bar" not in a)
+
+
+def _apply_diff_one_by_one(array, diff, position):
+    for mode, value in diff:
+        if mode == '-':
+            array.remove_value(value)
+        elif mode == '+':
+            array.insert_at(position, value)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_apply_diff_same_as_one_by_one(seed):
+    rng = random.Random(seed)
+    elements = ["E{}".format(i) for i in range(rng.randint(1, 10))]
+    initial = [rng.choice(elements) for _ in range(rng.randint(0, 20))]
+    diff = [(rng.choice("-=+"), rng.choice(elements))
+            for _ in range(rng.randint(0, 20))]
+
+    a = ColonSeparatedArray("test_array", ':'.join(initial))
+    a.apply_diff(diff)
+    b = ColonSeparatedArray("test_array", ':'.join(initial))
+    _apply_diff_one_by_one(b, diff, -1)
+    assert(a.value == b.value)
+
+
 def test_merge_diff():
     diff_1 = [('=', "Foo"), ('+', "Bar")]
     assert(ColonSeparatedArray.merge_diff(diff_1, []) == [('+', "Bar")])
@@ -168,3 +168,16 @@ def test_apply_diff(cwd_to_root):
 
     a.apply_diff([('-', "NonexistentValue")])
     assert(a.value == ["/Qux", "/xxx/Baz", "/Foo"])
+
+
+def test_apply_diff_prepends(cwd_to_root):
+    a = Path("test_path", "Foo:Bar:Foo")
+    a.apply_diff([('+', "Baz"), ('-', "Foo"), ('+', "Qux"), ('+', "Foo"),
+                  ('-', "Baz"), ('=', "Bar"), ('+', "Baz")])
+
+    # The same as adding the new elements one by one to the front.
+    assert(a.value == ["/Baz", "/Foo", "/Qux", "/Bar"])
+
+    with pytest.raises(ValueError):
+        a.apply_diff([('-', "Bar"), ('+', "Foo:Bar")])
+    assert(a.value == ["/Baz", "/Foo", "/Qux", "/Bar"])